@@ -14,6 +14,10 @@ from routes.dashboard import register_dashboard_routes
 from routes.movies import register_movies_routes
 from routes.screenings import register_screenings_routes
 from routes.admin import register_admin_routes
+from routes.metrics import register_metrics_routes
+from backend.cache_invalidation import start_invalidation_listener
+from backend.seat_counters import start_counter_reconciler
+from database.db import is_database_degraded
 
 
 def create_app():
@@ -38,6 +42,17 @@ def create_app():
     register_movies_routes(app)
     register_screenings_routes(app)
     register_admin_routes(app)
+    register_metrics_routes(app)
+    
+    # Keep this worker's caches in sync with writes made by other workers
+    start_invalidation_listener()
+    # Repair drifted seats-left counters of the screening listings
+    start_counter_reconciler()
+    
+    @app.context_processor
+    def inject_degraded_mode():
+        """Let templates show a notice while the database is unavailable"""
+        return {'degraded_mode': is_database_degraded()}
     
     # Register error handlers
     from flask import render_template
@@ -0,0 +1,124 @@
+"""
+Live seat availability fan-out for the booking page stream
+Author: Zhou Li
+Date: 2026-10-17
+
+Every committed booking or cancellation is published here once per
+process: by the service layer for this worker's own writes and by the
+cache invalidation listener for the other workers' (PostgreSQL NOTIFY).
+Each event is serialized once and handed to every open stream of the
+screening, so any number of open seat maps share a single source of
+changes instead of polling.
+"""
+
+import json
+import threading
+from collections import deque
+
+from database.db import STREAM_CONFIG
+
+
+class AvailabilitySubscriber:
+    """One open stream: a bounded queue of serialized events"""
+
+    __slots__ = ('screening_id', '_events', '_condition', 'overflowed')
+
+    def __init__(self, screening_id, queue_size):
+        self.screening_id = screening_id
+        self._events = deque(maxlen=queue_size)
+        self._condition = threading.Condition()
+        # Set when events were dropped; the client has to resync
+        self.overflowed = False
+
+    def put(self, event):
+        with self._condition:
+            if len(self._events) == self._events.maxlen:
+                self.overflowed = True
+            self._events.append(event)
+            self._condition.notify()
+
+    def get(self, timeout):
+        """
+        Wait for events
+        Returns (queued events oldest first, whether older events were
+        dropped since the last call); ([], False) on timeout
+        """
+        with self._condition:
+            if not self._events:
+                self._condition.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            overflowed, self.overflowed = self.overflowed, False
+            return events, overflowed
+
+
+class AvailabilityHub:
+    """
+    Per-screening publish/subscribe of seat booked/released events
+    Publishing to a screening nobody watches only costs a dict lookup.
+    """
+
+    def __init__(self, queue_size=100, max_subscribers=500):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, screening_id):
+        """
+        Open a subscription to a screening's events
+        Returns an AvailabilitySubscriber, or None if this process already
+        serves max_subscribers streams
+        """
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                return None
+            subscriber = AvailabilitySubscriber(screening_id, self.queue_size)
+            self._subscribers.setdefault(screening_id, set()).add(subscriber)
+            self._count += 1
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.screening_id)
+            if subscribers is None or subscriber not in subscribers:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.screening_id]
+            self._count -= 1
+
+    def publish(self, screening_id, booked=(), released=()):
+        """Send seats booked/released for a screening to its subscribers"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(screening_id, ()))
+            if not subscribers:
+                return
+            self.published += 1
+            self.delivered += len(subscribers)
+        event = format_event('seats', {'booked': list(booked), 'released': list(released)})
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': self._count,
+                'screenings': len(self._subscribers),
+                'published': self.published,
+                'delivered': self.delivered
+            }
+
+
+def format_event(event, data):
+    """Serialize one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+# Process-wide hub shared by the service layer, the invalidation listener
+# and the stream endpoint
+availability_hub = AvailabilityHub(queue_size=STREAM_CONFIG['queue_size'],
+                                   max_subscribers=STREAM_CONFIG['max_subscribers'])
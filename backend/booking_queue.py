@@ -0,0 +1,127 @@
+"""
+Group-commit booking queue for hot screenings
+Author: Zhou Li
+Date: 2026-10-17
+"""
+
+import threading
+from collections import deque
+
+from database.db import BOOKING_QUEUE_CONFIG, book_seats, book_seats_batch
+
+
+class _BookingRequest:
+    """One queued booking and the caller waiting for its result"""
+
+    __slots__ = ('user_id', 'seat_ids', 'booking_number', 'hold_key', 'done', 'result')
+
+    def __init__(self, user_id, seat_ids, booking_number, hold_key):
+        self.user_id = user_id
+        self.seat_ids = seat_ids
+        self.booking_number = booking_number
+        self.hold_key = hold_key
+        self.done = threading.Event()
+        self.result = None
+
+
+class BookingQueue:
+    """
+    Per-screening booking queues, each drained by its own worker thread
+    that commits whole batches with book_seats_batch
+    While a batch commits, new bookings for the screening pile up and go
+    into the next one, so under load a single transaction (and a single
+    commit) serves many customers instead of each one waiting on the same
+    rows. A screening's bookings are only queued while more than
+    hot_threshold of them are in flight in this process; quiet screenings
+    keep using book_seats directly. Workers exit when their queue is empty.
+    """
+
+    def __init__(self, enabled=False, hot_threshold=4, max_batch=50):
+        self.enabled = enabled
+        self.hot_threshold = hot_threshold
+        self.max_batch = max_batch
+        self._queues = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.direct = 0
+        self.queued = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    def book(self, screening_id, user_id, seat_ids, booking_number, hold_key=None):
+        """
+        Book seats like book_seats(), through the screening's queue when
+        the screening is hot
+        Returns (booking_id, total_amount, errors, taken_seat_ids)
+        """
+        with self._lock:
+            in_flight = self._in_flight.get(screening_id, 0) + 1
+            self._in_flight[screening_id] = in_flight
+            use_queue = self.enabled and in_flight > self.hot_threshold
+            if use_queue:
+                self.queued += 1
+            else:
+                self.direct += 1
+        try:
+            if not use_queue:
+                return book_seats(user_id, screening_id, seat_ids, booking_number, hold_key=hold_key)
+            return self._submit(screening_id, _BookingRequest(user_id, seat_ids, booking_number, hold_key))
+        finally:
+            with self._lock:
+                self._in_flight[screening_id] -= 1
+                if not self._in_flight[screening_id]:
+                    del self._in_flight[screening_id]
+
+    def _submit(self, screening_id, request):
+        """Queue a request, starting the screening's worker if needed, and wait for it"""
+        with self._lock:
+            queue = self._queues.get(screening_id)
+            if queue is None:
+                queue = self._queues[screening_id] = deque()
+                threading.Thread(target=self._drain, args=(screening_id, queue),
+                                 name=f'booking-queue-{screening_id}', daemon=True).start()
+            queue.append(request)
+        # The worker always sets a result, so there is no timeout: a caller
+        # that gave up could otherwise still end up with a booking
+        request.done.wait()
+        return request.result
+
+    def _drain(self, screening_id, queue):
+        """Worker: commit the screening's queued requests batch by batch"""
+        while True:
+            with self._lock:
+                if not queue:
+                    del self._queues[screening_id]
+                    return
+                batch = [queue.popleft() for _ in range(min(len(queue), self.max_batch))]
+                self.batches += 1
+                self.largest_batch = max(self.largest_batch, len(batch))
+            try:
+                results = book_seats_batch(screening_id, [
+                    (request.user_id, request.seat_ids, request.booking_number, request.hold_key)
+                    for request in batch
+                ])
+            except Exception as e:
+                print(f"Error in booking queue for screening {screening_id}: {e}")
+                results = [(None, None, None, [])] * len(batch)
+            for request, result in zip(batch, results):
+                request.result = result
+                request.done.set()
+
+    def stats(self):
+        """Get queue counters"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'hot_threshold': self.hot_threshold,
+                'direct': self.direct,
+                'queued': self.queued,
+                'batches': self.batches,
+                'avg_batch': round(self.queued / self.batches, 2) if self.batches else 0.0,
+                'largest_batch': self.largest_batch,
+                'active_queues': len(self._queues)
+            }
+
+
+# Process-wide booking queue used by BookingService
+booking_queue = BookingQueue(**BOOKING_QUEUE_CONFIG)
@@ -0,0 +1,140 @@
+"""
+Cross-worker cache invalidation
+Author: Zhou Li
+Date: 2026-10-17
+
+Writes queue a message with database.db.notify_cache_invalidation() in
+their own transaction; PostgreSQL delivers it on commit. Every worker runs
+a listener thread that applies the message to its in-process caches, so
+a write handled by one worker reaches the caches of all the others.
+"""
+
+import json
+import threading
+
+import psycopg
+
+from database.db import DB_CONFIG, CACHE_CONFIG, INVALIDATION_CHANNEL, get_process_id
+from backend.catalog_cache import catalog_cache
+from backend.hall_layout import hall_layouts
+from backend.seat_availability import seat_availability
+from backend.availability_stream import availability_hub
+
+
+def invalidate_local(entity, entity_id=None, booked=None, released=None):
+    """
+    Evict (or update) the caches in this process affected by a write
+    entity: 'movie', 'cinema', 'hall' or 'screening'
+    booked/released: seat IDs of a committed booking or cancellation; the
+                     screening's availability is updated in place instead
+                     of being dropped, and its open streams are told
+    """
+    if entity in ('movie', 'cinema'):
+        catalog_cache.invalidate(entity, entity_id)
+    elif entity == 'hall':
+        catalog_cache.invalidate('hall', entity_id)
+        if entity_id is not None:
+            hall_layouts.invalidate(entity_id)
+    elif entity == 'screening':
+        if entity_id is not None and booked:
+            seat_availability.mark_booked(entity_id, booked)
+            availability_hub.publish(entity_id, booked=booked)
+        elif entity_id is not None and released:
+            seat_availability.mark_released(entity_id, released)
+            availability_hub.publish(entity_id, released=released)
+        else:
+            seat_availability.invalidate(entity_id)
+    else:
+        print(f"Warning: unknown cache invalidation entity {entity!r}")
+
+
+def clear_local_caches():
+    """Drop every cached entry in this process (used when messages may have been missed)"""
+    catalog_cache.clear()
+    hall_layouts.clear()
+    seat_availability.invalidate()
+
+
+class InvalidationListener(threading.Thread):
+    """
+    Daemon thread that LISTENs on the invalidation channel on its own
+    connection (outside the pool) and applies each message
+    If the connection drops it reconnects with backoff and clears the local
+    caches, since messages sent in between were lost.
+    """
+
+    def __init__(self, poll_timeout=5.0, max_backoff=30.0):
+        super().__init__(name='cache-invalidation-listener', daemon=True)
+        self.poll_timeout = poll_timeout
+        self.max_backoff = max_backoff
+        self.received = 0
+        self.applied = 0
+        self.reconnects = 0
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def handle(self, payload):
+        """Apply one notification payload"""
+        self.received += 1
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            print(f"Warning: invalid cache invalidation message: {payload[:200]}")
+            return
+        # This process already updated its caches after committing
+        if message.get('origin') == get_process_id():
+            return
+        invalidate_local(message.get('entity'), message.get('id'),
+                         booked=message.get('booked'), released=message.get('released'))
+        self.applied += 1
+
+    def run(self):
+        backoff = 1.0
+        connected_before = False
+        while not self._stop_event.is_set():
+            try:
+                with psycopg.connect(**DB_CONFIG, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {INVALIDATION_CHANNEL}")
+                    if connected_before:
+                        self.reconnects += 1
+                        clear_local_caches()
+                    connected_before = True
+                    backoff = 1.0
+                    while not self._stop_event.is_set():
+                        for notify in conn.notifies(timeout=self.poll_timeout):
+                            self.handle(notify.payload)
+            except Exception as e:
+                print(f"Error in cache invalidation listener: {e}")
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def stats(self):
+        return {
+            'alive': self.is_alive(),
+            'received': self.received,
+            'applied': self.applied,
+            'reconnects': self.reconnects
+        }
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def start_invalidation_listener():
+    """Start this process's listener thread (once; no-op if notifications are disabled)"""
+    global _listener
+    if not CACHE_CONFIG['notify']:
+        return None
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = InvalidationListener()
+            _listener.start()
+    return _listener
+
+
+def get_listener_stats():
+    """Get the listener's message counters, or {} if it is not running"""
+    return _listener.stats() if _listener is not None else {}
@@ -0,0 +1,178 @@
+"""
+Catalog read-through cache
+Author: Zhou Li
+Date: 2026-10-17
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from database.db import CACHE_CONFIG
+from backend.singleflight import catalog_flights
+
+
+class CatalogCache:
+    """
+    Bounded TTL cache for catalog rows (movies, cinemas, halls)
+    Keys are (entity, kind, arg) tuples, e.g. ('movie', 'all', None) or
+    ('hall', 'cinema', cinema_id). Entries are fresh for ttl seconds; for
+    stale_window seconds after that they are still served while a
+    background thread refreshes them, so pages keep rendering the last good
+    values when the database is slow or down. The least recently used entry
+    is evicted beyond max_entries. Admin writes call invalidate(); a load
+    that raced with an invalidation of its entity is returned but not stored.
+    """
+
+    # Seconds between background refresh attempts for a key whose refresh failed
+    REFRESH_RETRY = 5.0
+
+    def __init__(self, max_entries=1000, ttl=300, stale_window=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_window = stale_window
+        # key -> (expires_at, value)
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        # key -> monotonic time before which no new refresh is started
+        self._refreshing = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _token(self, entity):
+        return self._epoch, self._generations.get(entity, 0)
+
+    def _lookup(self, key):
+        """
+        Look a key up
+        Returns (value, token, refresh): token is None on a fresh hit; a
+        stale hit has both a value and a token, and refresh tells whether
+        this caller should start the background refresh
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], None, False
+                if entry[0] + self.stale_window > now:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    refresh = self._refreshing.get(key, 0) <= now
+                    if refresh:
+                        # Claim the refresh; retried after REFRESH_RETRY if it fails
+                        self._refreshing[key] = now + self.REFRESH_RETRY
+                    return entry[1], self._token(key[0]), refresh
+                del self._entries[key]
+                self._refreshing.pop(key, None)
+                self.expirations += 1
+            self.misses += 1
+            return None, self._token(key[0]), False
+
+    def _store(self, key, value, token):
+        with self._lock:
+            if self._token(key[0]) != token:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _load(self, key, loader, token):
+        """Call loader() and cache a non-empty result"""
+        value = loader()
+        if value:
+            # Store lists as tuples so callers can't mutate the cached list
+            self._store(key, tuple(value) if isinstance(value, list) else value, token)
+        return value
+
+    def _refresh(self, key, loader, token):
+        """Background refresh of a stale entry (the stale value stays on failure)"""
+        try:
+            value = self._load(key, loader, token)
+        except Exception as e:
+            print(f"Error refreshing catalog cache: {e}")
+            value = None
+        with self._lock:
+            if value:
+                self.refreshes += 1
+                self._refreshing.pop(key, None)
+            else:
+                self.refresh_failures += 1
+
+    def get_or_load(self, key, loader):
+        """
+        Get a cached value, calling loader() on a miss
+        Concurrent misses for the same key share one loader() call. Empty
+        results (None, [] - also what the DAO returns on errors) are passed
+        through without being cached
+        """
+        value, token, refresh = self._lookup(key)
+        if token is None:
+            return value
+        if value is not None:
+            if refresh:
+                threading.Thread(target=self._refresh, args=(key, loader, token),
+                                 name='catalog-cache-refresh', daemon=True).start()
+            return value
+        return catalog_flights.do(key, lambda: self._load(key, loader, token))
+
+    def invalidate(self, entity, entity_id=None):
+        """
+        Drop cached entries of an entity
+        With entity_id, only that row and the entity's lists are dropped;
+        other rows of the entity stay cached.
+        """
+        with self._lock:
+            self._generations[entity] = self._generations.get(entity, 0) + 1
+            self.invalidations += 1
+            for key in [key for key in self._entries if key[0] == entity]:
+                if entity_id is None or key[1] != 'id' or key[2] == entity_id:
+                    del self._entries[key]
+                    self._refreshing.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._refreshing.clear()
+            self._generations.clear()
+            self._epoch += 1
+            self.invalidations += 1
+
+    def stats(self):
+        """Get size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'stale_window': self.stale_window,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_ratio': round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+                'refreshes': self.refreshes,
+                'refresh_failures': self.refresh_failures,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+# Process-wide catalog cache shared by the service layer
+catalog_cache = CatalogCache(max_entries=CACHE_CONFIG['catalog_max_entries'],
+                             ttl=CACHE_CONFIG['catalog_ttl'],
+                             stale_window=CACHE_CONFIG['catalog_stale_window'])
@@ -0,0 +1,108 @@
+"""
+Static hall seat layouts
+Author: Zhou Li
+Date: 2026-10-17
+"""
+
+import threading
+from types import MappingProxyType
+
+
+class HallLayout:
+    """
+    Immutable seat layout of a cinema hall, shared by every screening in it
+    Seats are numbered by position (ordered by row, then seat number); the
+    per-screening SeatAvailability bitmaps are indexed by that position.
+    """
+
+    __slots__ = ('hall_id', 'seats', 'seat_ids', 'positions', 'rows', 'row_positions',
+                 'seat_numbers', 'seat_types', 'price_multipliers', 'inactive_positions',
+                 'seat_map_encoder')
+
+    def __init__(self, hall_id, seats):
+        """
+        hall_id: hall the seats belong to
+        seats: Seat objects ordered by row and seat number; they are shared
+               by every screening in the hall and must not be modified
+        """
+        rows = {}
+        for pos, seat in enumerate(seats):
+            rows.setdefault(seat.row_number, []).append(pos)
+
+        self.hall_id = hall_id
+        self.seats = tuple(seats)
+        self.seat_ids = tuple(seat.seat_id for seat in self.seats)
+        self.positions = MappingProxyType({seat_id: pos for pos, seat_id in enumerate(self.seat_ids)})
+        # row_number -> positions of that row's seats, in seat number order
+        self.rows = MappingProxyType({row: tuple(positions) for row, positions in rows.items()})
+        # The rows' positions, front row first
+        self.row_positions = tuple(self.rows.values())
+        self.seat_numbers = tuple(seat.seat_number for seat in self.seats)
+        self.seat_types = tuple(seat.seat_type for seat in self.seats)
+        self.price_multipliers = tuple(seat.price_multiplier for seat in self.seats)
+        self.inactive_positions = frozenset(pos for pos, seat in enumerate(self.seats) if not seat.is_active)
+        # Booking page seat map encoder (see backend/seat_map.py), built on first use
+        self.seat_map_encoder = None
+
+    def __len__(self) -> int:
+        return len(self.seat_ids)
+
+    def position(self, seat_id):
+        """Get a seat's position, or None if it is not in this hall"""
+        return self.positions.get(seat_id)
+
+    def seat_at(self, pos):
+        """Get the Seat at a position"""
+        return self.seats[pos]
+
+    def __repr__(self) -> str:
+        return f"<HallLayout hall {self.hall_id}: {len(self.rows)} rows, {len(self.seat_ids)} seats>"
+
+
+class HallLayoutCache:
+    """
+    In-process map of hall_id -> HallLayout
+    Layouts are only dropped when an admin creates or deletes a hall or
+    regenerates its seats; invalidating a hall also discards any load of
+    that hall that was in flight.
+    """
+
+    def __init__(self):
+        self._layouts = {}
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def _token(self, hall_id):
+        return self._epoch, self._generations.get(hall_id, 0)
+
+    def lookup(self, hall_id):
+        """
+        Get the cached layout for a hall
+        Returns (layout or None, token to pass to store())
+        """
+        with self._lock:
+            return self._layouts.get(hall_id), self._token(hall_id)
+
+    def store(self, hall_id, layout, token):
+        """Cache a layout built from seats read after lookup() returned token"""
+        with self._lock:
+            if self._token(hall_id) == token:
+                self._layouts[hall_id] = layout
+
+    def invalidate(self, hall_id):
+        """Drop a hall's layout"""
+        with self._lock:
+            self._layouts.pop(hall_id, None)
+            self._generations[hall_id] = self._generations.get(hall_id, 0) + 1
+
+    def clear(self):
+        """Drop every layout"""
+        with self._lock:
+            self._layouts.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+
+# Process-wide layout cache shared by the service layer
+hall_layouts = HallLayoutCache()
@@ -0,0 +1,140 @@
+"""
+Model base class and row factories
+Author: Zhou Li
+Date: 2026-10-17
+"""
+
+from operator import itemgetter
+from typing import Tuple
+
+
+class Model:
+    """
+    Base class of the slotted data models
+    Subclasses list their attributes in COLUMNS (also their __slots__), in
+    the column order of their table's SELECTs. Rows are turned into
+    instances by a builder made once per column layout, so the layout is
+    checked once per query shape instead of once per field per row:
+    - row_factory(cursor) is a psycopg row factory mapping columns to
+      attributes by name (columns the model doesn't have are ignored)
+    - from_db_row(row) maps a positional tuple in COLUMNS order; trailing
+      columns may be missing
+    Missing columns get their DEFAULTS value (None if not listed); values
+    that were selected are kept as they are, NULL included, except in the
+    DEFAULT_IF_FALSY columns, where any falsy value (NULL, '', 0) gets the
+    default too, like `value or default`. CONVERTERS are applied to values
+    that are kept (NULL stays None). Building a row without one of the
+    REQUIRED columns raises ValueError.
+    """
+
+    __slots__ = ()
+
+    COLUMNS: Tuple[str, ...] = ()
+    REQUIRED: Tuple[str, ...] = ()
+    DEFAULTS = {}
+    DEFAULT_IF_FALSY: Tuple[str, ...] = ()
+    CONVERTERS = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # column names -> builder, per model class
+        cls._builders = {}
+
+    @classmethod
+    def _builder(cls, columns):
+        """Get the function building instances from rows with these columns"""
+        builder = cls._builders.get(columns)
+        if builder is not None:
+            return builder
+
+        index = {}
+        for i, name in enumerate(columns):
+            index.setdefault(name, i)
+        missing = [name for name in cls.REQUIRED if name not in index]
+        if missing:
+            raise ValueError(f"{cls.__name__} rows need column(s) {', '.join(missing)}, "
+                             f"got ({', '.join(columns)})")
+
+        # Worked out once per column layout: which row values go to which
+        # attributes, which of them need a default or conversion, and the
+        # attributes the query didn't select
+        names = [name for name in cls.COLUMNS if name in index]
+        if len(names) == 1:
+            # itemgetter with one index returns the value, not a tuple
+            get_values = lambda values, i=index[names[0]]: (values[i],)
+        else:
+            get_values = itemgetter(*(index[name] for name in names))
+        unselected = [(name, cls.DEFAULTS.get(name)) for name in cls.COLUMNS if name not in index]
+        # (position in names, default, converter or None, `value or default`)
+        fixups = [(pos, cls.DEFAULTS.get(name), cls.CONVERTERS.get(name), name in cls.DEFAULT_IF_FALSY)
+                  for pos, name in enumerate(names)
+                  if name in cls.DEFAULT_IF_FALSY or name in cls.CONVERTERS]
+
+        def builder(values):
+            obj = object.__new__(cls)
+            selected = get_values(values)
+            if fixups:
+                selected = list(selected)
+                for pos, default, convert, if_falsy in fixups:
+                    value = selected[pos]
+                    if if_falsy and not value:
+                        selected[pos] = default
+                    elif value is not None and convert is not None:
+                        selected[pos] = convert(value)
+            for name, value in zip(names, selected):
+                setattr(obj, name, value)
+            for name, default in unselected:
+                setattr(obj, name, default)
+            return obj
+
+        cls._builders[columns] = builder
+        return builder
+
+    @classmethod
+    def row_factory(cls, cursor):
+        """psycopg row factory: cursor.execute(...) then fetch* returns instances"""
+        return cls._builder(tuple(column.name for column in cursor.description))
+
+    @classmethod
+    def from_db_row(cls, db_row: Tuple):
+        """Create an instance from a positional row tuple in COLUMNS order"""
+        return cls._builder(cls.COLUMNS[:len(db_row)])(db_row)
+
+
+def joined_row_factory(*models):
+    """
+    psycopg row factory for joins: each row becomes a tuple with one
+    instance per model, e.g. joined_row_factory(Screening, Movie)
+    The columns are split between the models in order; a model's columns
+    run until one it doesn't have or has already seen, so the select list
+    must list each table's columns together, in the order of models
+    """
+    splits = {}
+
+    def row_factory(cursor):
+        columns = tuple(column.name for column in cursor.description)
+        make_row = splits.get(columns)
+        if make_row is None:
+            make_row = splits[columns] = _split_columns(models, columns)
+        return make_row
+
+    return row_factory
+
+
+def _split_columns(models, columns):
+    """Make the function building one instance per model from a joined row"""
+    parts = []
+    start = 0
+    for model in models:
+        end = start
+        seen = set()
+        while end < len(columns) and columns[end] in model.COLUMNS and columns[end] not in seen:
+            seen.add(columns[end])
+            end += 1
+        parts.append((model._builder(columns[start:end]), start, end))
+        start = end
+
+    def make_row(values):
+        return tuple(build(values[start:end]) for build, start, end in parts)
+
+    return make_row
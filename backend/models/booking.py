@@ -4,12 +4,23 @@ Author: Zhou Li
 Date: 2025-10-17
 """
 
-from typing import Optional, Tuple
+from typing import Optional
 from datetime import datetime
 
+from backend.models.base import Model
 
-class Booking:
+
+class Booking(Model):
     """Booking data model"""
+
+    COLUMNS = ('booking_id', 'user_id', 'screening_id', 'booking_number', 'num_tickets',
+               'total_amount', 'booking_status', 'payment_status', 'booking_date',
+               'created_at', 'updated_at')
+    __slots__ = COLUMNS
+    REQUIRED = ('booking_id', 'user_id', 'screening_id', 'booking_number', 'num_tickets')
+    DEFAULTS = {'total_amount': 0.00, 'booking_status': 'pending', 'payment_status': 'unpaid'}
+    DEFAULT_IF_FALSY = ('total_amount', 'booking_status', 'payment_status')
+    CONVERTERS = {'total_amount': float}
     
     def __init__(self, booking_id: int, user_id: int, screening_id: int,
                  booking_number: str, num_tickets: int, total_amount: float,
@@ -28,28 +39,6 @@ class Booking:
         self.created_at = created_at
         self.updated_at = updated_at
     
-    @classmethod
-    def from_db_row(cls, db_row: Tuple) -> 'Booking':
-        """
-        Create Booking instance from database row tuple
-        db_row: (booking_id, user_id, screening_id, booking_number, num_tickets,
-                 total_amount, booking_status, payment_status, booking_date,
-                 created_at, updated_at)
-        """
-        return cls(
-            booking_id=db_row[0],
-            user_id=db_row[1],
-            screening_id=db_row[2],
-            booking_number=db_row[3],
-            num_tickets=db_row[4],
-            total_amount=float(db_row[5]) if db_row[5] else 0.00,
-            booking_status=db_row[6] if len(db_row) > 6 and db_row[6] else 'pending',
-            payment_status=db_row[7] if len(db_row) > 7 and db_row[7] else 'unpaid',
-            booking_date=db_row[8] if len(db_row) > 8 else None,
-            created_at=db_row[9] if len(db_row) > 9 else None,
-            updated_at=db_row[10] if len(db_row) > 10 else None
-        )
-    
     def to_dict(self) -> dict:
         """Convert Booking to dictionary"""
         return {
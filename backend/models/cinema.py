@@ -4,12 +4,21 @@ Author: Zhou Li
 Date: 2025-10-13
 """
 
-from typing import Optional, Tuple
+from typing import Optional
 from datetime import datetime
 
+from backend.models.base import Model
 
-class Cinema:
+
+class Cinema(Model):
     """Cinema data model"""
+
+    COLUMNS = ('cinema_id', 'cinema_name', 'address', 'suburb', 'postcode', 'phone', 'email',
+               'facilities', 'created_at', 'updated_at', 'is_active')
+    __slots__ = COLUMNS
+    REQUIRED = ('cinema_id', 'cinema_name', 'address', 'suburb', 'postcode')
+    DEFAULTS = {'is_active': True}
+    DEFAULT_IF_FALSY = ('phone', 'email', 'facilities')
     
     def __init__(self, cinema_id: int, cinema_name: str, address: str, 
                  suburb: str, postcode: str, phone: str = None, 
@@ -28,26 +37,6 @@ class Cinema:
         self.updated_at = updated_at
         self.is_active = is_active
     
-    @classmethod
-    def from_db_row(cls, db_row: Tuple) -> 'Cinema':
-        """
-        Create Cinema instance from database row tuple
-        db_row: (cinema_id, cinema_name, address, suburb, postcode, phone, email, facilities, created_at, updated_at, is_active)
-        """
-        return cls(
-            cinema_id=db_row[0],
-            cinema_name=db_row[1],
-            address=db_row[2],
-            suburb=db_row[3],
-            postcode=db_row[4],
-            phone=db_row[5] if len(db_row) > 5 and db_row[5] else None,
-            email=db_row[6] if len(db_row) > 6 and db_row[6] else None,
-            facilities=db_row[7] if len(db_row) > 7 and db_row[7] else None,
-            created_at=db_row[8] if len(db_row) > 8 else None,
-            updated_at=db_row[9] if len(db_row) > 9 else None,
-            is_active=db_row[10] if len(db_row) > 10 else True
-        )
-    
     def to_dict(self) -> dict:
         """Convert Cinema to dictionary"""
         return {
@@ -4,12 +4,23 @@ Author: Zhou Li
 Date: 2025-10-13
 """
 
-from typing import Optional, Tuple
+from typing import Optional
 from datetime import datetime, date
 
+from backend.models.base import Model
 
-class Movie:
+
+class Movie(Model):
     """Movie data model"""
+
+    COLUMNS = ('movie_id', 'title', 'description', 'genre', 'duration_minutes', 'release_date',
+               'director', 'cast', 'language', 'subtitles', 'poster_url', 'created_at',
+               'updated_at', 'is_active')
+    __slots__ = COLUMNS
+    REQUIRED = ('movie_id', 'title')
+    DEFAULTS = {'is_active': True}
+    DEFAULT_IF_FALSY = ('description', 'genre', 'duration_minutes', 'release_date', 'director',
+                        'cast', 'language', 'subtitles', 'poster_url')
     
     def __init__(self, movie_id: int, title: str, description: str = None, 
                  genre: str = None, duration_minutes: int = None,
@@ -32,30 +43,6 @@ class Movie:
         self.updated_at = updated_at
         self.is_active = is_active
     
-    @classmethod
-    def from_db_row(cls, db_row: Tuple) -> 'Movie':
-        """
-        Create Movie instance from database row tuple
-        db_row: (movie_id, title, description, genre, duration_minutes, release_date, 
-                 director, cast, language, subtitles, poster_url, created_at, updated_at, is_active)
-        """
-        return cls(
-            movie_id=db_row[0],
-            title=db_row[1],
-            description=db_row[2] if len(db_row) > 2 and db_row[2] else None,
-            genre=db_row[3] if len(db_row) > 3 and db_row[3] else None,
-            duration_minutes=db_row[4] if len(db_row) > 4 and db_row[4] else None,
-            release_date=db_row[5] if len(db_row) > 5 and db_row[5] else None,
-            director=db_row[6] if len(db_row) > 6 and db_row[6] else None,
-            cast=db_row[7] if len(db_row) > 7 and db_row[7] else None,
-            language=db_row[8] if len(db_row) > 8 and db_row[8] else None,
-            subtitles=db_row[9] if len(db_row) > 9 and db_row[9] else None,
-            poster_url=db_row[10] if len(db_row) > 10 and db_row[10] else None,
-            created_at=db_row[11] if len(db_row) > 11 else None,
-            updated_at=db_row[12] if len(db_row) > 12 else None,
-            is_active=db_row[13] if len(db_row) > 13 else True
-        )
-    
     def to_dict(self) -> dict:
         """Convert Movie to dictionary"""
         return {
@@ -4,18 +4,30 @@ Author: Zhou Li
 Date: 2025-10-16
 """
 
-from typing import Optional, Tuple
+from typing import Optional
 from datetime import datetime, date, time
 
+from backend.models.base import Model
 
-class Screening:
+
+class Screening(Model):
     """Screening data model"""
+
+    COLUMNS = ('screening_id', 'movie_id', 'cinema_id', 'hall_id', 'screening_date',
+               'start_time', 'end_time', 'ticket_price', 'screening_type', 'language',
+               'subtitles', 'is_active', 'created_at', 'updated_at', 'seats_left')
+    __slots__ = COLUMNS
+    REQUIRED = ('screening_id', 'movie_id', 'cinema_id', 'hall_id')
+    DEFAULTS = {'ticket_price': 0.00, 'is_active': True}
+    DEFAULT_IF_FALSY = ('ticket_price', 'screening_type', 'language', 'subtitles')
+    CONVERTERS = {'ticket_price': float}
     
     def __init__(self, screening_id: int, movie_id: int, cinema_id: int, hall_id: int,
                  screening_date: date, start_time: time, end_time: time,
                  ticket_price: float, screening_type: str = None,
                  language: str = None, subtitles: str = None,
-                 is_active: bool = True, created_at: datetime = None, updated_at: datetime = None):
+                 is_active: bool = True, created_at: datetime = None, updated_at: datetime = None,
+                 seats_left: Optional[int] = None):
         self.screening_id = screening_id
         self.movie_id = movie_id
         self.cinema_id = cinema_id
@@ -30,31 +42,8 @@ class Screening:
         self.is_active = is_active
         self.created_at = created_at
         self.updated_at = updated_at
-    
-    @classmethod
-    def from_db_row(cls, db_row: Tuple) -> 'Screening':
-        """
-        Create Screening instance from database row tuple
-        db_row: (screening_id, movie_id, cinema_id, hall_id, screening_date,
-                 start_time, end_time, ticket_price, screening_type, language,
-                 subtitles, is_active, created_at, updated_at)
-        """
-        return cls(
-            screening_id=db_row[0],
-            movie_id=db_row[1],
-            cinema_id=db_row[2],
-            hall_id=db_row[3],
-            screening_date=db_row[4] if len(db_row) > 4 else None,
-            start_time=db_row[5] if len(db_row) > 5 else None,
-            end_time=db_row[6] if len(db_row) > 6 else None,
-            ticket_price=float(db_row[7]) if len(db_row) > 7 and db_row[7] else 0.00,
-            screening_type=db_row[8] if len(db_row) > 8 and db_row[8] else None,
-            language=db_row[9] if len(db_row) > 9 and db_row[9] else None,
-            subtitles=db_row[10] if len(db_row) > 10 and db_row[10] else None,
-            is_active=db_row[11] if len(db_row) > 11 else True,
-            created_at=db_row[12] if len(db_row) > 12 else None,
-            updated_at=db_row[13] if len(db_row) > 13 else None
-        )
+        # Only filled in by the listing queries (from the seat counters)
+        self.seats_left = seats_left
     
     def to_dict(self) -> dict:
         """Convert Screening to dictionary"""
@@ -72,7 +61,8 @@ class Screening:
             'subtitles': self.subtitles,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'seats_left': self.seats_left
         }
     
     def get_time_formatted(self) -> str:
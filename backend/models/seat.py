@@ -4,12 +4,22 @@ Author: Zhou Li
 Date: 2025-10-15
 """
 
-from typing import Optional, Tuple
+from typing import Optional
 from datetime import datetime
 
+from backend.models.base import Model
 
-class Seat:
+
+class Seat(Model):
     """Seat data model"""
+
+    COLUMNS = ('seat_id', 'hall_id', 'row_number', 'seat_number', 'seat_type',
+               'price_multiplier', 'is_active')
+    __slots__ = COLUMNS
+    REQUIRED = ('seat_id', 'hall_id', 'row_number', 'seat_number')
+    DEFAULTS = {'price_multiplier': 1.00, 'is_active': True}
+    DEFAULT_IF_FALSY = ('seat_type', 'price_multiplier')
+    CONVERTERS = {'price_multiplier': float}
     
     def __init__(self, seat_id: int, hall_id: int, row_number: int, seat_number: int,
                  seat_type: str = None, price_multiplier: float = 1.00, is_active: bool = True):
@@ -21,22 +31,6 @@ class Seat:
         self.price_multiplier = price_multiplier
         self.is_active = is_active
     
-    @classmethod
-    def from_db_row(cls, db_row: Tuple) -> 'Seat':
-        """
-        Create Seat instance from database row tuple
-        db_row: (seat_id, hall_id, row_number, seat_number, seat_type, price_multiplier, is_active)
-        """
-        return cls(
-            seat_id=db_row[0],
-            hall_id=db_row[1],
-            row_number=db_row[2],
-            seat_number=db_row[3],
-            seat_type=db_row[4] if len(db_row) > 4 and db_row[4] else None,
-            price_multiplier=float(db_row[5]) if len(db_row) > 5 and db_row[5] else 1.00,
-            is_active=db_row[6] if len(db_row) > 6 else True
-        )
-    
     def to_dict(self) -> dict:
         """Convert Seat to dictionary"""
         return {
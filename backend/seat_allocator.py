@@ -0,0 +1,94 @@
+"""
+Best-available seat allocation
+Author: Zhou Li
+Date: 2026-10-17
+"""
+
+# Score weights (lower scores are better). Both distances are scaled to
+# 0..1: 0 in the centre, 1 at the front/back row or the end of the row
+ROW_WEIGHT = 1.0
+COLUMN_WEIGHT = 1.0
+# Added per seat (as a fraction of the group) of a type other than the one
+# asked for, so a group of the right type wins over a slightly better
+# placed mixed one
+SEAT_TYPE_WEIGHT = 1.5
+
+
+def best_available(layout, free, count, seat_type=None):
+    """
+    Find the best group of count adjacent free seats in one row
+    layout: HallLayout of the hall
+    free: bytearray of per-position flags, 1 = free (see SeatAvailability.free_flags)
+    seat_type: preferred seat type, or None for no preference
+    Groups are scored by their row's distance from the middle row, their
+    own distance from the middle of the row and, with seat_type, the share
+    of seats of another type. Each row is scanned once with a sliding
+    window, so the search is linear in the number of seats; rows are
+    visited from the middle out and the search stops at the first row
+    too far out to beat the best group found.
+    Returns the group's seat IDs in seat number order, or [] if no row has
+    count adjacent free seats
+    """
+    if count < 1:
+        return []
+    seat_numbers = layout.seat_numbers
+    seat_types = layout.seat_types
+    row_count = len(layout.rows)
+    middle_row = (row_count - 1) / 2
+
+    wanted = b'\x01' * count
+
+    best_score = None
+    best_start = None
+    for row_index in sorted(range(row_count), key=lambda index: abs(index - middle_row)):
+        positions = layout.row_positions[row_index]
+        row_cost = ROW_WEIGHT * abs(row_index - middle_row) / middle_row if middle_row else 0.0
+        if best_score is not None and row_cost >= best_score:
+            # No group in this row or any row further out can beat the best one
+            break
+        if len(positions) < count:
+            continue
+        if positions[-1] - positions[0] + 1 == len(positions) and \
+                free.find(wanted, positions[0], positions[-1] + 1) < 0:
+            # Not even count free positions in a row (checked in C); skip the scan
+            continue
+        first, last = seat_numbers[positions[0]], seat_numbers[positions[-1]]
+        middle = (first + last) / 2
+        half_width = (last - first) / 2 or 1
+
+        run = 0
+        mismatched = 0
+        previous_number = None
+        for i, pos in enumerate(positions):
+            number = seat_numbers[pos]
+            if not free[pos]:
+                run = 0
+                mismatched = 0
+                previous_number = None
+                continue
+            if previous_number is None or number != previous_number + 1:
+                # Gap in the seat numbers (aisle or missing seat)
+                run = 0
+                mismatched = 0
+            previous_number = number
+            run += 1
+            if seat_type is not None and seat_types[pos] != seat_type:
+                mismatched += 1
+            if run > count:
+                # Slide the window: drop the seat that fell out of it
+                if seat_type is not None and seat_types[positions[i - count]] != seat_type:
+                    mismatched -= 1
+            if run >= count:
+                group_middle = number - (count - 1) / 2
+                score = (row_cost
+                         + COLUMN_WEIGHT * abs(group_middle - middle) / half_width
+                         + SEAT_TYPE_WEIGHT * mismatched / count)
+                if best_score is None or score < best_score:
+                    best_score = score
+                    best_start = (positions, i - count + 1)
+
+    if best_start is None:
+        return []
+    positions, start = best_start
+    seat_ids = layout.seat_ids
+    return [seat_ids[pos] for pos in positions[start:start + count]]
@@ -0,0 +1,214 @@
+"""
+Per-screening seat availability index
+Author: Zhou Li
+Date: 2026-10-17
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from database.db import CACHE_CONFIG
+
+
+# Bitmap byte -> its 8 free flags (bit clear = free), lowest bit first
+_FREE_FLAGS = tuple(bytes(0 if byte & (1 << bit) else 1 for bit in range(8)) for byte in range(256))
+
+
+class SeatAvailability:
+    """
+    Seat availability for one screening, stored as a bitmap indexed by the
+    seat's position in the hall's shared HallLayout
+    Supports `seat_id in availability` as a booked-seat check, so it can be
+    passed to templates in place of a set of booked seat IDs.
+    """
+
+    def __init__(self, layout, booked_seat_ids=()):
+        """
+        layout: HallLayout of the screening's hall
+        booked_seat_ids: seats already taken for this screening
+        """
+        self.layout = layout
+        self.positions = layout.positions
+        self._booked = bytearray((len(layout) + 7) // 8)
+        self._inactive = layout.inactive_positions
+        self._lock = threading.Lock()
+        self._free_count = len(layout) - len(self._inactive)
+        self.mark_booked(booked_seat_ids)
+
+    @staticmethod
+    def _get_bit(bits, pos):
+        return bits[pos >> 3] & (1 << (pos & 7))
+
+    @staticmethod
+    def _set_bit(bits, pos):
+        bits[pos >> 3] |= 1 << (pos & 7)
+
+    @staticmethod
+    def _clear_bit(bits, pos):
+        bits[pos >> 3] &= ~(1 << (pos & 7))
+
+    def is_booked(self, seat_id) -> bool:
+        """Check if a seat is taken for this screening"""
+        pos = self.positions.get(seat_id)
+        return pos is not None and bool(self._get_bit(self._booked, pos))
+
+    def is_free(self, seat_id) -> bool:
+        """Check if a seat exists, is active and is not taken"""
+        pos = self.positions.get(seat_id)
+        if pos is None:
+            return False
+        return not (pos in self._inactive or self._get_bit(self._booked, pos))
+
+    def free_count(self) -> int:
+        """Get number of free seats"""
+        return self._free_count
+
+    def free_seats(self) -> list:
+        """Get free seat IDs in position order"""
+        return [seat_id for pos, seat_id in enumerate(self.layout.seat_ids)
+                if not (pos in self._inactive or self._get_bit(self._booked, pos))]
+
+    def booked_seats(self) -> list:
+        """Get booked seat IDs in position order"""
+        return [seat_id for pos, seat_id in enumerate(self.layout.seat_ids)
+                if self._get_bit(self._booked, pos)]
+
+    def booked_bitmap(self) -> bytes:
+        """Get a copy of the booked bitmap (bit per position, lowest bit first)"""
+        with self._lock:
+            return bytes(self._booked)
+
+    def free_flags(self, exclude=()):
+        """
+        Get a flag per position, 1 if the seat is free (for the seat allocator)
+        exclude: seat IDs to treat as taken, e.g. seats held by others
+        """
+        flags = bytearray(b''.join(_FREE_FLAGS[byte] for byte in self._booked)[:len(self.layout)])
+        for pos in self._inactive:
+            flags[pos] = 0
+        for seat_id in exclude:
+            pos = self.positions.get(seat_id)
+            if pos is not None:
+                flags[pos] = 0
+        return flags
+
+    def mark_booked(self, seat_ids):
+        """Mark seats as taken (unknown or already taken seats are ignored)"""
+        with self._lock:
+            for seat_id in seat_ids:
+                pos = self.positions.get(seat_id)
+                if pos is None or self._get_bit(self._booked, pos):
+                    continue
+                self._set_bit(self._booked, pos)
+                if pos not in self._inactive:
+                    self._free_count -= 1
+
+    def mark_released(self, seat_ids):
+        """Mark seats as free again (unknown or already free seats are ignored)"""
+        with self._lock:
+            for seat_id in seat_ids:
+                pos = self.positions.get(seat_id)
+                if pos is None or not self._get_bit(self._booked, pos):
+                    continue
+                self._clear_bit(self._booked, pos)
+                if pos not in self._inactive:
+                    self._free_count += 1
+
+    def __contains__(self, seat_id) -> bool:
+        return self.is_booked(seat_id)
+
+    def __repr__(self) -> str:
+        return f"<SeatAvailability {self._free_count}/{len(self.layout)} free>"
+
+
+class SeatAvailabilityCache:
+    """
+    Bounded in-process map of screening_id -> SeatAvailability
+    Booking writes update cached entries in place. A write for a screening
+    that is not cached bumps its generation, so an entry built from a read
+    that raced with that write is not stored. Entries are reloaded after
+    ttl seconds, so changes this process missed (another worker's write
+    without a notification) show up within that time.
+    """
+
+    def __init__(self, max_screenings=2000, ttl=60.0):
+        self.max_screenings = max_screenings
+        self.ttl = ttl
+        # screening_id -> (availability, monotonic expiry time)
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def _token(self, screening_id):
+        return self._epoch, self._generations.get(screening_id, 0)
+
+    def _bump(self, screening_id):
+        self._generations[screening_id] = self._generations.get(screening_id, 0) + 1
+        if len(self._generations) > 4 * self.max_screenings:
+            # Keep the generation map bounded; starting a new epoch
+            # invalidates every load that is still in flight
+            self._generations.clear()
+            self._epoch += 1
+
+    def lookup(self, screening_id):
+        """
+        Get cached availability for a screening
+        Returns (availability or None, token to pass to store())
+        """
+        with self._lock:
+            entry = self._entries.get(screening_id)
+            if entry is None:
+                return None, self._token(screening_id)
+            availability, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[screening_id]
+                return None, self._token(screening_id)
+            self._entries.move_to_end(screening_id)
+            return availability, self._token(screening_id)
+
+    def store(self, screening_id, availability, token):
+        """Cache availability built from data read after lookup() returned token"""
+        with self._lock:
+            if self._token(screening_id) != token:
+                return
+            self._entries[screening_id] = (availability, time.monotonic() + self.ttl)
+            self._entries.move_to_end(screening_id)
+            while len(self._entries) > self.max_screenings:
+                self._entries.popitem(last=False)
+
+    def _apply(self, screening_id, seat_ids, booked):
+        with self._lock:
+            entry = self._entries.get(screening_id)
+            if entry is None:
+                self._bump(screening_id)
+                return
+        availability = entry[0]
+        if booked:
+            availability.mark_booked(seat_ids)
+        else:
+            availability.mark_released(seat_ids)
+
+    def mark_booked(self, screening_id, seat_ids):
+        """Record seats taken by a committed booking"""
+        self._apply(screening_id, seat_ids, True)
+
+    def mark_released(self, screening_id, seat_ids):
+        """Record seats freed by a committed cancellation"""
+        self._apply(screening_id, seat_ids, False)
+
+    def invalidate(self, screening_id=None):
+        """Drop one screening (or every screening if screening_id is None)"""
+        with self._lock:
+            if screening_id is None:
+                self._entries.clear()
+                self._generations.clear()
+                self._epoch += 1
+            else:
+                self._entries.pop(screening_id, None)
+                self._bump(screening_id)
+
+
+# Process-wide availability index shared by the service layer
+seat_availability = SeatAvailabilityCache(ttl=CACHE_CONFIG['availability_ttl'])
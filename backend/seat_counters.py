@@ -0,0 +1,82 @@
+"""
+Seat counter reconciliation job
+Author: Zhou Li
+Date: 2026-10-17
+
+The listing pages show seats left from counters kept by triggers (see
+database/migrations/0005_seat_counters.sql). Every worker runs a thread
+that periodically repairs counters that drifted from the seat bookings;
+an advisory lock makes the workers take turns instead of all recounting.
+The same thread prunes the seat change log kept for delta sync
+(database/migrations/0006_seat_changes.sql), taking turns under the
+same lock.
+"""
+
+import threading
+
+from database.db import COUNTER_CONFIG, reconcile_seat_counters, prune_seat_changes
+
+
+class SeatCounterReconciler(threading.Thread):
+    """Daemon thread running reconcile_seat_counters() and prune_seat_changes() every interval seconds"""
+
+    def __init__(self, interval):
+        super().__init__(name='seat-counter-reconciler', daemon=True)
+        self.interval = interval
+        self.runs = 0
+        self.skipped = 0
+        self.screenings_repaired = 0
+        self.halls_repaired = 0
+        self.seat_changes_pruned = 0
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            pruned = prune_seat_changes()
+            if pruned is not None:
+                self.seat_changes_pruned += pruned
+            result = reconcile_seat_counters()
+            if result is None:
+                # Another worker was reconciling, or the database failed
+                self.skipped += 1
+                continue
+            self.runs += 1
+            screenings, halls = result
+            self.screenings_repaired += screenings
+            self.halls_repaired += halls
+            if screenings or halls:
+                print(f"Warning: repaired seat counters of {screenings} screening(s) and {halls} hall(s)")
+
+    def stats(self):
+        return {
+            'alive': self.is_alive(),
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'screenings_repaired': self.screenings_repaired,
+            'halls_repaired': self.halls_repaired,
+            'seat_changes_pruned': self.seat_changes_pruned
+        }
+
+
+_reconciler = None
+_reconciler_lock = threading.Lock()
+
+
+def start_counter_reconciler():
+    """Start this process's reconciliation thread (once; no-op if the interval is 0)"""
+    global _reconciler
+    if COUNTER_CONFIG['reconcile_interval'] <= 0:
+        return None
+    with _reconciler_lock:
+        if _reconciler is None or not _reconciler.is_alive():
+            _reconciler = SeatCounterReconciler(COUNTER_CONFIG['reconcile_interval'])
+            _reconciler.start()
+    return _reconciler
+
+
+def get_reconciler_stats():
+    """Get the reconciliation counters, or {} if the job is not running"""
+    return _reconciler.stats() if _reconciler is not None else {}
@@ -0,0 +1,75 @@
+"""
+Compact seat map encoding for the booking page
+Author: Zhou Li
+Date: 2026-10-17
+
+The booking page gets its seat map as one JSON blob that
+web/static/js/main.js (renderSeatMap) turns into seat buttons:
+
+    {"rows": [[row_number, seats in row], ...],
+     "ids": [[first seat ID, count], ...],
+     "numbers": [[first seat number, count], ...],
+     "types": [[seat_type, price_multiplier, is_active], ...],
+     "codes": "<base64, one byte per seat: index into types>",
+     "booked": "<base64 booked bitmap, lowest bit first>"}
+
+Everything is in hall layout position order (by row, then seat number).
+ids and numbers are runs of consecutive values, usually one per hall and
+one per row. Only the booked bitmap depends on the screening, so the rest
+is serialized once per hall layout and reused for all its screenings.
+"""
+
+import base64
+import json
+
+
+def _runs(values):
+    """Run-length encode consecutive integers as [first, count] pairs"""
+    runs = []
+    for value in values:
+        if runs and runs[-1][0] + runs[-1][1] == value:
+            runs[-1][1] += 1
+        else:
+            runs.append([value, 1])
+    return runs
+
+
+class SeatMapEncoder:
+    """Seat map JSON for one hall layout, with the static part serialized once"""
+
+    __slots__ = ('layout', '_prefix')
+
+    def __init__(self, layout):
+        types = {}
+        codes = bytearray()
+        for seat in layout.seats:
+            seat_class = (seat.seat_type, seat.price_multiplier, bool(seat.is_active))
+            code = types.setdefault(seat_class, len(types))
+            if code > 255:
+                raise ValueError(f"hall {layout.hall_id} has more than 256 seat classes")
+            codes.append(code)
+
+        static = {
+            'rows': [[row, len(positions)] for row, positions in layout.rows.items()],
+            'ids': _runs(layout.seat_ids),
+            'numbers': _runs(layout.seat_numbers),
+            'types': [list(seat_class) for seat_class in types],
+            'codes': base64.b64encode(codes).decode('ascii')
+        }
+        self.layout = layout
+        # Everything but the closing brace; encode() appends the bitmap
+        self._prefix = json.dumps(static, separators=(',', ':'))[:-1]
+
+    def encode(self, availability):
+        """Get the seat map JSON for a screening's SeatAvailability on this layout"""
+        booked = base64.b64encode(availability.booked_bitmap()).decode('ascii')
+        return f'{self._prefix},"booked":"{booked}"}}'
+
+
+def get_seat_map_encoder(layout):
+    """Get the encoder of a hall layout (built on first use, kept on the layout)"""
+    encoder = layout.seat_map_encoder
+    if encoder is None:
+        # Racing builds produce equal encoders; the last one is kept
+        encoder = layout.seat_map_encoder = SeatMapEncoder(layout)
+    return encoder
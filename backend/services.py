@@ -4,15 +4,20 @@ Author: Zhou Li
 Date: 2025-10-10
 """
 
+import itertools
+
 from database.db import (
     get_user_by_username, create_user, check_username_or_email_exists,
     get_all_cinemas, get_cinema_by_id, create_cinema,
     get_all_movies, get_movie_by_id, create_movie,
-    get_bookings_with_details, get_seats_by_booking, can_cancel_booking,
-    cancel_booking, get_booking_user_id, get_screening_by_id, get_cinema_hall_by_id,
+    get_bookings_with_details, get_booking_stats_by_user, can_cancel_booking,
+    check_cancellation_window, cancel_booking, get_booking_user_id,
+    get_screening_by_id, get_screening_booking_data, get_cinema_hall_by_id, create_cinema_hall,
     get_seats_by_hall, get_cinema_by_id, get_cinema_halls_by_cinema,
-    get_screenings_by_movie, get_screenings_by_cinema, get_all_screenings,
-    get_db_connection
+    get_screening_listing, get_all_screenings,
+    get_db_connection, hold_seats, get_seat_holds, HOLD_CONFIG,
+    claim_booking_request, finish_booking_request,
+    get_seat_changes, get_seat_snapshot
 )
 from backend.models.user import User
 from backend.models.cinema import Cinema
@@ -20,6 +25,25 @@ from backend.models.movie import Movie
 from backend.models.booking import Booking
 from backend.models.screening import Screening
 from backend.models.cinema_hall import CinemaHall
+from backend.models.seat import Seat
+from backend.models.base import joined_row_factory
+from backend.catalog_cache import catalog_cache
+from backend.hall_layout import HallLayout, hall_layouts
+from backend.seat_availability import SeatAvailability, seat_availability
+from backend.singleflight import booking_page_flights, hall_layout_flights
+from backend.booking_queue import booking_queue
+from backend.seat_allocator import best_available
+from backend.availability_stream import availability_hub
+from backend.seat_map import get_seat_map_encoder
+
+
+# Mixed into booking numbers (see BookingService._new_booking_number)
+_booking_counter = itertools.count()
+
+# Row factories for the joined page queries (the column split is worked out
+# once per query shape)
+_listing_row = joined_row_factory(Screening, Movie, Cinema)
+_booking_page_row = joined_row_factory(Screening, Movie, Cinema, CinemaHall)
 
 
 class UserService:
@@ -31,13 +55,13 @@ class UserService:
         Authenticate a user
         Returns User object if successful, None otherwise
         """
-        user_row = get_user_by_username(username)
-        if not user_row:
+        user = get_user_by_username(username, row_factory=User.row_factory)
+        if not user:
             return None
         
         # Plain text password comparison
-        if user_row[2] == password:  # user_row[2] is password field
-            return User.from_db_row(user_row)
+        if user.password == password:
+            return user
         return None
     
     @staticmethod
@@ -63,8 +87,8 @@ class CinemaService:
         Get all cinemas
         Returns list of Cinema objects
         """
-        cinema_rows = get_all_cinemas()
-        return [Cinema.from_db_row(row) for row in cinema_rows]
+        return list(catalog_cache.get_or_load(('cinema', 'all', None),
+                                              lambda: get_all_cinemas(row_factory=Cinema.row_factory)))
     
     @staticmethod
     def get_cinema_by_id(cinema_id):
@@ -72,10 +96,8 @@ class CinemaService:
         Get cinema by ID
         Returns Cinema object or None
         """
-        cinema_row = get_cinema_by_id(cinema_id)
-        if cinema_row:
-            return Cinema.from_db_row(cinema_row)
-        return None
+        return catalog_cache.get_or_load(('cinema', 'id', cinema_id),
+                                         lambda: get_cinema_by_id(cinema_id, row_factory=Cinema.row_factory))
     
     @staticmethod
     def create_cinema(cinema_name, address, suburb, postcode, phone=None, email=None, facilities=None, is_active=True):
@@ -83,7 +105,10 @@ class CinemaService:
         Create a new cinema
         Returns True if successful, False otherwise
         """
-        return create_cinema(cinema_name, address, suburb, postcode, phone, email, facilities, is_active)
+        created = create_cinema(cinema_name, address, suburb, postcode, phone, email, facilities, is_active)
+        if created:
+            catalog_cache.invalidate('cinema')
+        return created
 
 
 class MovieService:
@@ -95,8 +120,8 @@ class MovieService:
         Get all movies
         Returns list of Movie objects
         """
-        movie_rows = get_all_movies()
-        return [Movie.from_db_row(row) for row in movie_rows]
+        return list(catalog_cache.get_or_load(('movie', 'all', None),
+                                              lambda: get_all_movies(row_factory=Movie.row_factory)))
     
     @staticmethod
     def get_movie_by_id(movie_id):
@@ -104,10 +129,8 @@ class MovieService:
         Get movie by ID
         Returns Movie object or None
         """
-        movie_row = get_movie_by_id(movie_id)
-        if movie_row:
-            return Movie.from_db_row(movie_row)
-        return None
+        return catalog_cache.get_or_load(('movie', 'id', movie_id),
+                                         lambda: get_movie_by_id(movie_id, row_factory=Movie.row_factory))
     
     @staticmethod
     def create_movie(title, description, genre, duration_minutes, release_date, director, cast, language, subtitles, is_active=True):
@@ -115,48 +138,54 @@ class MovieService:
         Create a new movie
         Returns True if successful, False otherwise
         """
-        return create_movie(title, description, genre, duration_minutes, release_date, director, cast, language, subtitles, is_active)
+        created = create_movie(title, description, genre, duration_minutes, release_date, director, cast, language, subtitles, is_active)
+        if created:
+            catalog_cache.invalidate('movie')
+        return created
 
 
 class BookingService:
     """Booking business logic service"""
     
     @staticmethod
-    def get_user_bookings_with_seats(user_id):
+    def get_user_bookings_with_seats(user_id, limit=None):
         """
-        Get all bookings for a user with detailed screening and seat information
+        Get bookings for a user with detailed screening and seat information
+        limit: only return the most recent `limit` bookings
         Returns list of booking dictionaries
         """
-        bookings_data = get_bookings_with_details(user_id)
+        bookings_data = get_bookings_with_details(user_id, limit)
         result = []
         
         for booking_row in bookings_data:
             booking = Booking.from_db_row(booking_row)
             
-            # Get seats for this booking
-            seats_data = get_seats_by_booking(booking.booking_id)
+            # Seats come back aggregated per booking as parallel arrays
+            seat_ids, seat_rows, seat_numbers, seat_types = booking_row[19:23]
             seats = []
-            for seat_row in seats_data:
+            for i, seat_id in enumerate(seat_ids or []):
                 seats.append({
-                    'seat_id': seat_row[0],
-                    'row_number': seat_row[1],
-                    'seat_number': seat_row[2],
-                    'seat_type': seat_row[3] if len(seat_row) > 3 else 'standard'
+                    'seat_id': seat_id,
+                    'row_number': seat_rows[i],
+                    'seat_number': seat_numbers[i],
+                    'seat_type': seat_types[i]
                 })
             
             # Format seat numbers for display - one ticket per line
             seat_display = '<br>'.join([f"Row {seat['row_number']}, Seat {seat['seat_number']}" for seat in seats])
             
-            # Check if booking can be cancelled
-            can_cancel, cancel_message = can_cancel_booking(booking.booking_id)
+            # Check if booking can be cancelled from the screening date/time already loaded
+            can_cancel, cancel_message = check_cancellation_window(
+                booking.booking_status, booking_row[11], booking_row[12]
+            )
             
             # Format times for display
             start_time_str = None
-            if len(booking_row) > 12 and booking_row[12]:
+            if booking_row[12]:
                 start_time_str = booking_row[12].strftime("%H:%M") if hasattr(booking_row[12], 'strftime') else str(booking_row[12])[:5]
             
             end_time_str = None
-            if len(booking_row) > 13 and booking_row[13]:
+            if booking_row[13]:
                 end_time_str = booking_row[13].strftime("%H:%M") if hasattr(booking_row[13], 'strftime') else str(booking_row[13])[:5]
             
             # Create booking dictionary with screening details
@@ -173,14 +202,14 @@ class BookingService:
                 'cancel_message': cancel_message,
                 # Screening details
                 'screening_id': booking.screening_id,  # Add screening_id
-                'screening_date': booking_row[11] if len(booking_row) > 11 else None,
-                'screening_time': booking_row[12] if len(booking_row) > 12 else None,
+                'screening_date': booking_row[11],
+                'screening_time': booking_row[12],
                 'start_time': start_time_str,  # Format as string
                 'end_time': end_time_str,  # Format as string
-                'movie_id': booking_row[14] if len(booking_row) > 14 else None,
-                'movie_title': booking_row[15] if len(booking_row) > 15 else 'Unknown Movie',
-                'cinema_name': booking_row[16] if len(booking_row) > 16 else 'Unknown Cinema',
-                'cinema_address': f"{booking_row[17] if len(booking_row) > 17 else ''}, {booking_row[18] if len(booking_row) > 18 else ''}",
+                'movie_id': booking_row[14],
+                'movie_title': booking_row[15] or 'Unknown Movie',
+                'cinema_name': booking_row[16] or 'Unknown Cinema',
+                'cinema_address': f"{booking_row[17] or ''}, {booking_row[18] or ''}",
                 'seats': seats,
                 'seats_display': seat_display if seat_display else 'No seats assigned'
             }
@@ -189,6 +218,24 @@ class BookingService:
         
         return result
     
+    @staticmethod
+    def get_user_booking_stats(user_id):
+        """
+        Get dashboard counters for a user
+        Returns dict with total_bookings, upcoming, cancelled and movies_watched
+        """
+        from datetime import datetime, timedelta
+        
+        # Upcoming means still cancellable: not cancelled and more than 2 hours away
+        stats_row = get_booking_stats_by_user(user_id, datetime.now() + timedelta(hours=2))
+        total_bookings, upcoming, cancelled, movies_watched = stats_row or (0, 0, 0, 0)
+        return {
+            'total_bookings': total_bookings,
+            'upcoming': upcoming,
+            'cancelled': cancelled,
+            'movies_watched': movies_watched
+        }
+    
     @staticmethod
     def cancel_user_booking(booking_id, user_id):
         """Cancel a booking after validation"""
@@ -203,74 +250,127 @@ class BookingService:
             return False, message
         
         # Cancel the booking
-        success = cancel_booking(booking_id)
-        if success:
+        released = cancel_booking(booking_id)
+        if released:
+            screening_id, seat_ids = released
+            seat_availability.mark_released(screening_id, seat_ids)
+            availability_hub.publish(screening_id, released=seat_ids)
             return True, 'Booking cancelled successfully'
         return False, 'Failed to cancel booking. It may have already been cancelled.'
     
     @staticmethod
-    def create_new_booking(user_id, screening_id, seat_ids):
-        """Create a new booking"""
-        import time
-        import random
-        
+    def hold_seats(screening_id, hold_key, seat_ids):
+        """
+        Hold a session's selected seats while it checks out
+        seat_ids: the whole selection; seats no longer selected are released
+        Returns dict with held and unavailable seat IDs and the seconds until
+        the holds expire, or None if the holds could not be updated
+        """
+        seat_ids = list(dict.fromkeys(seat_ids))
         if len(seat_ids) > 5:
-            return False, 'You can only book up to 5 seats', None
+            return None
         
-        conn = get_db_connection()
-        if not conn:
-            return False, 'Database connection failed', None
+        held = hold_seats(screening_id, hold_key, seat_ids)
+        if held is None:
+            return None
+        return {
+            'held': held,
+            'unavailable': [seat_id for seat_id in seat_ids if seat_id not in held],
+            # Every call renews all of the session's holds
+            'expires_in': int(HOLD_CONFIG['hold_minutes'] * 60) if held else None
+        }
+    
+    @staticmethod
+    def get_seat_holds(screening_id, hold_key):
+        """
+        Get a screening's current seat holds
+        Returns (set of seat IDs held by other sessions, list held by hold_key)
+        """
+        return get_seat_holds(screening_id, hold_key)
+    
+    @staticmethod
+    def create_new_booking(user_id, screening_id, seat_ids, hold_key=None, idempotency_key=None):
+        """
+        Create a new booking
+        Seats are claimed atomically (see book_seats); seats another booking
+        already holds are reported by row and number. With hold_key, the
+        session's seat holds are turned into the booking. Bookings for hot
+        screenings are committed in batches by the booking queue.
+        With idempotency_key, a retry of the same request (same user and
+        key) returns the first attempt's outcome instead of booking again.
+        Returns (success, message, booking_number)
+        """
+        seat_ids = list(dict.fromkeys(seat_ids))
+        booking_number = BookingService._new_booking_number()
+        if idempotency_key:
+            claimed, previous = claim_booking_request(user_id, idempotency_key, screening_id,
+                                                      seat_ids, booking_number)
+            if not claimed:
+                if previous is None:
+                    # Booking without the key could book twice if this is a retry
+                    return False, 'Failed to create booking. Please try again.', None
+                return BookingService._previous_outcome(previous, screening_id, seat_ids)
+        
+        success, message = BookingService._book(user_id, screening_id, seat_ids, booking_number, hold_key)
+        if idempotency_key:
+            # Failures of the database itself are not kept, so a retry gets another try
+            finish_booking_request(user_id, idempotency_key, success, message)
+        return bool(success), message, booking_number if success else None
+    
+    @staticmethod
+    def _previous_outcome(previous, screening_id, seat_ids):
+        """
+        Get the outcome of an earlier request with the same idempotency key
+        Returns (success, message, booking_number)
+        """
+        prev_screening_id, prev_seat_ids, success, message, booking_number, booked = previous
+        if prev_screening_id != screening_id or sorted(prev_seat_ids) != sorted(seat_ids):
+            return False, 'This booking form was already submitted. Please reload the page and try again.', None
+        if success is None:
+            if booked:
+                return True, f'Booking confirmed! Your booking number is {booking_number}', booking_number
+            return False, 'Your booking is still being processed. Please check My Bookings shortly.', None
+        return success, message, booking_number if success else None
+    
+    @staticmethod
+    def _book(user_id, screening_id, seat_ids, booking_number, hold_key):
+        """
+        Book the seats under booking_number
+        Returns (success, message); success is None if the database failed
+        """
+        if len(seat_ids) > 5:
+            return False, 'You can only book up to 5 seats'
+        
+        # The cached availability is not consulted: it can be stale (e.g. a
+        # release by another worker whose notification was missed), and the
+        # unique index on active seat bookings decides anyway. Its answer
+        # corrects the cache either way below.
+        booking_id, total_amount, errors, taken = booking_queue.book(screening_id, user_id, seat_ids,
+                                                                     booking_number, hold_key=hold_key)
+        if booking_id is None:
+            if taken:
+                # Another booking won the race; the cached availability was stale
+                seat_availability.mark_booked(screening_id, taken)
+            if errors is None:
+                return None, 'Failed to create booking. Please try again.'
+            message = '; '.join(errors)
+            return False, message + ('. Please choose different seats.' if taken else '.')
+        
+        seat_availability.mark_booked(screening_id, seat_ids)
+        availability_hub.publish(screening_id, booked=seat_ids)
+        return True, f'Booking confirmed! Your booking number is {booking_number}'
+    
+    @staticmethod
+    def _new_booking_number():
+        """
+        Generate a booking number
+        The per-process counter keeps numbers generated in the same
+        millisecond apart, e.g. for a batch of queued bookings
+        """
+        import time
+        import random
         
-        try:
-            cursor = conn.cursor()
-            
-            # Get screening price
-            cursor.execute("SELECT ticket_price FROM screenings WHERE screening_id = %s", (screening_id,))
-            ticket_price = cursor.fetchone()[0]
-            
-            # Calculate total amount based on seat types
-            total_amount = 0.0
-            for seat_id in seat_ids:
-                cursor.execute("""
-                    SELECT s.price_multiplier FROM seats s WHERE s.seat_id = %s
-                """, (seat_id,))
-                result = cursor.fetchone()
-                if result:
-                    multiplier = float(result[0]) if result[0] else 1.0
-                    total_amount += float(ticket_price) * multiplier
-            
-            # Generate booking number
-            booking_number = f"BK{int(time.time() * 1000) % 1000000}{random.randint(100, 999)}"
-            
-            # Create booking
-            cursor.execute("""
-                INSERT INTO bookings (user_id, screening_id, booking_number, num_tickets,
-                                    total_amount, booking_status, payment_status)
-                VALUES (%s, %s, %s, %s, %s, 'confirmed', 'paid')
-                RETURNING booking_id
-            """, (user_id, screening_id, booking_number, len(seat_ids), total_amount))
-            
-            booking_id = cursor.fetchone()[0]
-            
-            # Create seat bookings
-            for seat_id in seat_ids:
-                cursor.execute("""
-                    INSERT INTO seat_bookings (booking_id, seat_id)
-                    VALUES (%s, %s)
-                """, (booking_id, seat_id))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return True, f'Booking confirmed! Your booking number is {booking_number}', booking_number
-            
-        except Exception as e:
-            print(f"Error creating booking: {e}")
-            if conn:
-                conn.rollback()
-                conn.close()
-            return False, 'Failed to create booking. Please try again.', None
+        return f"BK{int(time.time() * 1000) % 1000000}{next(_booking_counter) % 1000:03d}{random.randint(10, 99)}"
 
 
 class ScreeningService:
@@ -280,111 +380,150 @@ class ScreeningService:
     def get_all_screenings():
         """Get all screenings"""
         from database.db import get_all_screenings as db_get_all_screenings
-        screenings_data = db_get_all_screenings()
-        return [Screening.from_db_row(screening) for screening in screenings_data]
+        return db_get_all_screenings(row_factory=Screening.row_factory)
     
     @staticmethod
     def get_screening_for_booking(screening_id):
-        """Get screening with all related info for booking page"""
-        screening_data = get_screening_by_id(screening_id)
-        if not screening_data:
-            return None
-        
-        screening = Screening.from_db_row(screening_data)
-        
-        # Get movie
-        movie_data = get_movie_by_id(screening.movie_id)
-        if not movie_data:
-            return None
-        movie = Movie.from_db_row(movie_data)
-        
-        # Get cinema
-        cinema_data = get_cinema_by_id(screening.cinema_id)
-        if not cinema_data:
-            return None
-        
-        cinema = Cinema.from_db_row(cinema_data)
-        
-        # Get hall
-        hall_data = get_cinema_hall_by_id(screening.hall_id)
-        if not hall_data:
+        """
+        Get screening with all related info for booking page
+        Concurrent requests for the same screening share one load
+        """
+        return booking_page_flights.do(
+            screening_id, lambda: ScreeningService._load_screening_for_booking(screening_id)
+        )
+    
+    @staticmethod
+    def _load_screening_for_booking(screening_id):
+        """Load the booking page data for a screening"""
+        # Booked seats are only read from the database when the screening's
+        # availability index is not cached yet
+        availability, token = seat_availability.lookup(screening_id)
+        
+        # Screening, movie, cinema and hall come back in one round trip
+        info_row, booked_seat_ids = get_screening_booking_data(
+            screening_id, with_booked=availability is None, row_factory=_booking_page_row
+        )
+        if not info_row:
             return None
         
-        hall = CinemaHall.from_db_row(hall_data)
+        screening, movie, cinema, hall = info_row
         
-        # Get seats for this hall
-        seats_data = get_seats_by_hall(screening.hall_id)
-        seats = []
-        for seat_row in seats_data:
-            seats.append({
-                'seat_id': seat_row[0],
-                'row_number': seat_row[2],
-                'seat_number': seat_row[3],
-                'seat_type': seat_row[4] if len(seat_row) > 4 else 'standard',
-                'price_multiplier': float(seat_row[5]) if len(seat_row) > 5 else 1.0,
-                'is_active': seat_row[6] if len(seat_row) > 6 else True
-            })
-        
-        # Get already booked seats for this screening
-        conn = get_db_connection()
-        booked_seats = set()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT DISTINCT sb.seat_id 
-                    FROM seat_bookings sb
-                    JOIN bookings b ON sb.booking_id = b.booking_id
-                    WHERE b.screening_id = %s AND b.booking_status != 'cancelled'
-                """, (screening_id,))
-                booked_seats = {row[0] for row in cursor.fetchall()}
-                cursor.close()
-                conn.close()
-            except Exception as e:
-                print(f"Error getting booked seats: {e}")
-                if conn:
-                    conn.close()
+        if availability is None:
+            layout = CinemaHallService.get_hall_layout(hall.hall_id)
+            availability = SeatAvailability(layout, booked_seat_ids)
+            if len(layout):
+                seat_availability.store(screening_id, availability, token)
         
         return {
             'screening': screening,
             'movie': movie,
             'cinema': cinema,
             'hall': hall,
-            'seats': seats,
-            'booked_seats': booked_seats
+            'seats': availability.layout.seats,
+            # Supports `seat_id in booked_seats` via the availability bitmap
+            'booked_seats': availability
         }
     
+    @staticmethod
+    def encode_seat_map(availability):
+        """
+        Encode a screening's seat map for the booking page
+        (see backend/seat_map.py)
+        Returns JSON string; only the booked bitmap is encoded per call
+        """
+        return get_seat_map_encoder(availability.layout).encode(availability)
+    
+    @staticmethod
+    def get_booked_seat_ids(screening_id):
+        """
+        Get a screening's booked seat IDs from its cached availability
+        Returns list of seat IDs, or None if the screening doesn't exist
+        """
+        booking_data = ScreeningService.get_screening_for_booking(screening_id)
+        if not booking_data:
+            return None
+        return booking_data['booked_seats'].booked_seats()
+    
+    @staticmethod
+    def get_seat_sync(screening_id, since=None):
+        """
+        Get what changed in a screening's seat map since version since
+        Returns {'version', 'changes': {'booked', 'released'}} with the seat
+        IDs changed since then, or {'version', 'snapshot': {'booked_runs'}}
+        with every booked seat as [first seat ID, count] runs when since is
+        None or too old; None if the screening doesn't exist
+        """
+        if since is not None:
+            result = get_seat_changes(screening_id, since)
+            if result is None:
+                return None
+            version, changes = result
+            if changes is not None:
+                return {
+                    'version': version,
+                    'changes': {
+                        'booked': [seat_id for seat_id, booked in changes if booked],
+                        'released': [seat_id for seat_id, booked in changes if not booked]
+                    }
+                }
+        
+        snapshot = get_seat_snapshot(screening_id)
+        if snapshot is None:
+            return None
+        version, booked_seat_ids = snapshot
+        # Seat IDs of a hall are mostly consecutive, so runs stay short
+        runs = []
+        for seat_id in booked_seat_ids:
+            if runs and runs[-1][0] + runs[-1][1] == seat_id:
+                runs[-1][1] += 1
+            else:
+                runs.append([seat_id, 1])
+        return {'version': version, 'snapshot': {'booked_runs': runs}}
+    
+    @staticmethod
+    def best_available_seats(screening_id, count, seat_type=None, hold_key=None):
+        """
+        Pick the best count adjacent free seats of a screening
+        (see backend/seat_allocator.py)
+        Works on the cached hall layout and availability; seats held by
+        other sessions count as taken, hold_key's own holds as free.
+        Returns list of seat IDs ([] if there are no count seats together),
+        or None if the screening doesn't exist
+        """
+        booking_data = ScreeningService.get_screening_for_booking(screening_id)
+        if not booking_data:
+            return None
+        availability = booking_data['booked_seats']
+        held_by_others, _ = get_seat_holds(screening_id, hold_key)
+        return best_available(availability.layout, availability.free_flags(held_by_others),
+                              count, seat_type=seat_type)
+    
+    @staticmethod
+    def _parse_screening_date(screening_date):
+        """Parse the date filter (invalid dates are ignored)"""
+        from datetime import date
+        
+        if not screening_date:
+            return None
+        try:
+            return date.fromisoformat(screening_date) if isinstance(screening_date, str) else screening_date
+        except ValueError:
+            return None
+    
     @staticmethod
     def get_screenings_for_movie_with_cinema(movie_id, cinema_id=None, screening_date=None):
         """Get screenings for a movie with cinema info"""
         from datetime import date
         
-        screenings_data = get_screenings_by_movie(movie_id)
-        all_screenings = [Screening.from_db_row(s) for s in screenings_data]
-        
-        # Filter screenings
-        filtered_screenings = all_screenings
-        
-        if cinema_id:
-            filtered_screenings = [s for s in filtered_screenings if s.cinema_id == cinema_id]
-        
-        if screening_date:
-            try:
-                filter_date = date.fromisoformat(screening_date) if isinstance(screening_date, str) else screening_date
-                filtered_screenings = [s for s in filtered_screenings if s.screening_date == filter_date]
-            except ValueError:
-                pass
-        
-        # Get cinema info for each screening
-        screenings_with_info = []
-        for screening in filtered_screenings:
-            cinema_data = get_cinema_by_id(screening.cinema_id)
-            if cinema_data:
-                cinema = Cinema.from_db_row(cinema_data)
-                screenings_with_info.append((screening, cinema))
-        
-        # Get available dates
-        available_dates = sorted(list(set(s.screening_date for s in all_screenings if s.screening_date >= date.today())))
+        # Filters, joins and available dates are all resolved in the database
+        rows, available_dates = get_screening_listing(
+            movie_id=movie_id,
+            cinema_id=cinema_id or None,
+            screening_date=ScreeningService._parse_screening_date(screening_date),
+            dates_from=date.today(),
+            row_factory=_listing_row
+        )
+        screenings_with_info = [(screening, cinema) for screening, _movie, cinema in rows]
         
         return screenings_with_info, available_dates
     
@@ -393,32 +532,15 @@ class ScreeningService:
         """Get screenings for a cinema with movie info"""
         from datetime import date
         
-        screenings_data = get_screenings_by_cinema(cinema_id)
-        all_screenings = [Screening.from_db_row(s) for s in screenings_data]
-        
-        # Filter screenings
-        filtered_screenings = all_screenings
-        
-        if movie_id:
-            filtered_screenings = [s for s in filtered_screenings if s.movie_id == movie_id]
-        
-        if screening_date:
-            try:
-                filter_date = date.fromisoformat(screening_date) if isinstance(screening_date, str) else screening_date
-                filtered_screenings = [s for s in filtered_screenings if s.screening_date == filter_date]
-            except ValueError:
-                pass
-        
-        # Get movie info for each screening
-        screenings_with_info = []
-        for screening in filtered_screenings:
-            movie_data = get_movie_by_id(screening.movie_id)
-            if movie_data:
-                movie = Movie.from_db_row(movie_data)
-                screenings_with_info.append((screening, movie))
-        
-        # Get available dates
-        available_dates = sorted(list(set(s.screening_date for s in all_screenings if s.screening_date >= date.today())))
+        # Filters, joins and available dates are all resolved in the database
+        rows, available_dates = get_screening_listing(
+            movie_id=movie_id or None,
+            cinema_id=cinema_id,
+            screening_date=ScreeningService._parse_screening_date(screening_date),
+            dates_from=date.today(),
+            row_factory=_listing_row
+        )
+        screenings_with_info = [(screening, movie) for screening, movie, _cinema in rows]
         
         return screenings_with_info, available_dates
 
@@ -429,33 +551,62 @@ class CinemaHallService:
     @staticmethod
     def get_halls_by_cinema(cinema_id):
         """Get all halls for a cinema"""
-        halls_data = get_cinema_halls_by_cinema(cinema_id)
-        return [CinemaHall.from_db_row(hall) for hall in halls_data]
+        return list(catalog_cache.get_or_load(
+            ('hall', 'cinema', cinema_id),
+            lambda: get_cinema_halls_by_cinema(cinema_id, row_factory=CinemaHall.row_factory)
+        ))
     
     @staticmethod
     def get_hall_by_id(hall_id):
         """Get hall by ID"""
-        hall_data = get_cinema_hall_by_id(hall_id)
-        if hall_data:
-            return CinemaHall.from_db_row(hall_data)
-        return None
+        return catalog_cache.get_or_load(('hall', 'id', hall_id),
+                                         lambda: get_cinema_hall_by_id(hall_id, row_factory=CinemaHall.row_factory))
+    
+    @staticmethod
+    def create_hall(cinema_id, hall_name, hall_type, total_rows, seats_per_row,
+                    screen_size=None, sound_system=None, seat_types=None):
+        """
+        Create a hall together with all of its seats in one transaction
+        Returns the new hall_id, or None on failure
+        """
+        hall_id = create_cinema_hall(
+            cinema_id, hall_name, hall_type, total_rows, seats_per_row,
+            total_rows * seats_per_row, screen_size, sound_system, seat_types
+        )
+        if hall_id:
+            hall_layouts.invalidate(hall_id)
+            catalog_cache.invalidate('hall', hall_id)
+        return hall_id
+    
+    @staticmethod
+    def get_hall_layout(hall_id):
+        """
+        Get the seat layout of a hall
+        Returns HallLayout (cached per hall_id and shared by all its screenings)
+        """
+        layout, token = hall_layouts.lookup(hall_id)
+        if layout is not None:
+            return layout
+        
+        def load_layout():
+            layout = HallLayout(hall_id, get_seats_by_hall(hall_id, row_factory=Seat.row_factory))
+            # An empty result may be a failed query; don't pin it in the cache
+            if len(layout):
+                hall_layouts.store(hall_id, layout, token)
+            return layout
+        
+        return hall_layout_flights.do(hall_id, load_layout)
     
     @staticmethod
     def get_all_halls():
         """Get all halls"""
-        conn = get_db_connection()
-        if not conn:
-            return []
+        def load_halls():
+            try:
+                with get_db_connection() as conn, conn.cursor(row_factory=CinemaHall.row_factory) as cursor:
+                    cursor.execute("SELECT hall_id, cinema_id, hall_name, hall_type, total_rows, seats_per_row, total_seats, screen_size, sound_system, created_at, updated_at FROM cinema_halls ORDER BY hall_id")
+                    return cursor.fetchall()
+            except Exception as e:
+                print(f"Error getting all halls: {e}")
+                return []
         
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT hall_id, cinema_id, hall_name, hall_type, total_rows, seats_per_row, total_seats, screen_size, sound_system, created_at, updated_at FROM cinema_halls ORDER BY hall_id")
-            halls_data = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            return [CinemaHall.from_db_row(hall) for hall in halls_data]
-        except Exception as e:
-            print(f"Error getting all halls: {e}")
-            if conn:
-                conn.close()
-            return []
+        return list(catalog_cache.get_or_load(('hall', 'all', None), load_halls))
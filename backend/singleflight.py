@@ -0,0 +1,117 @@
+"""
+Request coalescing for cache misses
+Author: Zhou Li
+Date: 2026-10-17
+"""
+
+import threading
+
+from database.db import CACHE_CONFIG
+
+
+class _Call:
+    """One in-flight load and the callers waiting for it"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Keyed singleflight: while a load for a key is running, other callers
+    for the same key wait for it and share its result instead of running
+    the same queries again
+    A waiter that times out runs the load itself, so a stuck leader slows
+    callers down but never fails them. Exceptions raised by the leader are
+    re-raised in its waiters.
+    """
+
+    def __init__(self, name, timeout=10.0):
+        self.name = name
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.max_waiters = 0
+        _groups[name] = self
+
+    def do(self, key, fn, timeout=None):
+        """
+        Run fn() for key, or wait for the run already in flight
+        timeout: seconds to wait for an in-flight run (default: self.timeout)
+        Returns fn's result
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+                leader = False
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                # Callers arriving from now on start a new load
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+
+        if not call.done.wait(self.timeout if timeout is None else timeout):
+            with self._lock:
+                self.timeouts += 1
+                self.executions += 1
+            return fn()
+
+        with self._lock:
+            self.coalesced += 1
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'in_flight': len(self._calls),
+                'max_waiters': self.max_waiters
+            }
+
+
+# name -> SingleFlight, for /metrics
+_groups = {}
+
+
+def get_singleflight_stats():
+    """Get counters of every singleflight group"""
+    return {name: group.stats() for name, group in _groups.items()}
+
+
+# Shared groups for the service layer's cache misses
+catalog_flights = SingleFlight('catalog', timeout=CACHE_CONFIG['singleflight_timeout'])
+booking_page_flights = SingleFlight('booking_page', timeout=CACHE_CONFIG['singleflight_timeout'])
+hall_layout_flights = SingleFlight('hall_layout', timeout=CACHE_CONFIG['singleflight_timeout'])
@@ -0,0 +1,172 @@
+"""
+Flash-sale booking benchmark
+Author: Zhou Li
+Date: 2026-10-17
+
+Many concurrent customers try to buy 1-4 random seats of one screening,
+first with every booking committed on its own (book_seats) and then through
+the group-commit booking queue (backend/booking_queue.py), e.g.
+
+    python bench_booking.py --threads 64 --requests 2000
+
+The screening defaults to the upcoming one with the most free seats. Every
+booking the benchmark makes is deleted again after each run.
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from database.db import get_db_connection, book_seats
+from backend.booking_queue import BookingQueue
+
+BOOKING_PREFIX = 'BENCH'
+
+
+def pick_screening():
+    """
+    Get the upcoming screening with the most free seats
+    Returns (screening_id, list of free seat ids)
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT sc.screening_id
+            FROM screenings sc
+            JOIN seats s ON s.hall_id = sc.hall_id AND s.is_active = TRUE
+            WHERE sc.is_active = TRUE AND sc.screening_date >= CURRENT_DATE
+            GROUP BY sc.screening_id
+            ORDER BY COUNT(*) - (SELECT COUNT(*) FROM seat_bookings sb
+                                 WHERE sb.screening_id = sc.screening_id AND sb.is_active) DESC
+            LIMIT 1
+        """)
+        row = cursor.fetchone()
+        return (row[0], free_seats(cursor, row[0])) if row else (None, [])
+
+
+def free_seats(cursor, screening_id):
+    """Get the ids of the screening's unbooked seats"""
+    cursor.execute("""
+        SELECT s.seat_id
+        FROM screenings sc
+        JOIN seats s ON s.hall_id = sc.hall_id AND s.is_active = TRUE
+        WHERE sc.screening_id = %s
+          AND NOT EXISTS (SELECT 1 FROM seat_bookings sb
+                          WHERE sb.screening_id = sc.screening_id AND sb.seat_id = s.seat_id
+                            AND sb.is_active)
+        ORDER BY s.seat_id
+    """, (screening_id,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def customer_ids(limit=500):
+    """Get user ids to book as"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT user_id FROM users WHERE user_type = 'customer' ORDER BY user_id LIMIT %s", (limit,))
+        return [row[0] for row in cursor.fetchall()]
+
+
+def cleanup():
+    """Delete the benchmark's bookings (seat bookings cascade)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM bookings WHERE booking_number LIKE %s", (BOOKING_PREFIX + '%',))
+        return cursor.rowcount
+
+
+def run(book, screening_id, seats, users, threads, requests, seed):
+    """
+    Fire requests bookings from threads workers through book()
+    Returns a dict of results
+    """
+    rng = random.Random(seed)
+    # Prepared up front so both modes get the same requests in the same order
+    work = [(rng.choice(users), rng.sample(seats, rng.randint(1, 4)), f"{BOOKING_PREFIX}{i:09d}")
+            for i in range(requests)]
+    next_index = iter(range(requests))
+    index_lock = threading.Lock()
+    latencies = []
+    confirmed = []
+
+    def worker():
+        while True:
+            with index_lock:
+                i = next(next_index, None)
+            if i is None:
+                return
+            user_id, seat_ids, booking_number = work[i]
+            started = time.perf_counter()
+            booking_id, _, _, _ = book(screening_id, user_id, seat_ids, booking_number)
+            latencies.append(time.perf_counter() - started)
+            if booking_id is not None:
+                confirmed.append(seat_ids)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    sold = [seat for seat_ids in confirmed for seat in seat_ids]
+    latencies.sort()
+    return {
+        'requests_per_sec': requests / elapsed,
+        'confirmed': len(confirmed),
+        'seats_sold': len(sold),
+        'double_booked': len(sold) - len(set(sold)),
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000
+    }
+
+
+def main():
+    """Run the benchmark in both modes and print a comparison"""
+    parser = argparse.ArgumentParser(description="Benchmark concurrent bookings of one screening")
+    parser.add_argument('--screening', type=int, help="screening to book (default: the one with most free seats)")
+    parser.add_argument('--threads', type=int, default=64, help="concurrent customers")
+    parser.add_argument('--requests', type=int, default=2000, help="booking attempts per run")
+    parser.add_argument('--max-batch', type=int, default=50, help="booking queue batch size")
+    parser.add_argument('--seed', type=int, default=42, help="random seed for the requests")
+    args = parser.parse_args()
+
+    cleanup()
+    if args.screening:
+        with get_db_connection() as conn:
+            screening_id, seats = args.screening, free_seats(conn.cursor(), args.screening)
+    else:
+        screening_id, seats = pick_screening()
+    users = customer_ids()
+    if not seats or not users:
+        print("No screening with free seats or no customers to book as")
+        return
+
+    print(f"Screening {screening_id}: {len(seats)} free seats, {args.threads} threads, "
+          f"{args.requests} booking attempts\n")
+    modes = [
+        ('direct', lambda screening_id, user_id, seat_ids, number:
+            book_seats(user_id, screening_id, seat_ids, number)),
+        ('queued', BookingQueue(enabled=True, hot_threshold=0, max_batch=args.max_batch).book),
+    ]
+    print(f"{'mode':<8}{'req/s':>10}{'confirmed':>11}{'seats':>8}{'double':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    try:
+        for name, book in modes:
+            result = run(book, screening_id, seats, users, args.threads, args.requests, args.seed)
+            print(f"{name:<8}{result['requests_per_sec']:>10.0f}{result['confirmed']:>11}"
+                  f"{result['seats_sold']:>8}{result['double_booked']:>8}"
+                  f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}")
+            cleanup()
+            if name == 'queued':
+                stats = book.__self__.stats()
+                print(f"\n{stats['batches']} batches, {stats['avg_batch']} bookings per batch on average, "
+                      f"largest {stats['largest_batch']}")
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
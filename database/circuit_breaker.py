@@ -0,0 +1,87 @@
+"""
+Database circuit breaker
+Author: Zhou Li
+Date: 2026-10-17
+"""
+
+import threading
+import time
+
+
+class DatabaseUnavailable(Exception):
+    """Raised instead of connecting while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Stops new connection attempts from piling up while the database is down
+    - closed: calls go through; failure_threshold consecutive connection
+      failures open the breaker
+    - open: calls fail immediately with DatabaseUnavailable for
+      reset_timeout seconds
+    - half-open: one trial call goes through; success closes the breaker,
+      failure opens it again
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.times_opened = 0
+
+    def before_call(self):
+        """Raise DatabaseUnavailable if the call must not reach the database"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+            self.rejected += 1
+        raise DatabaseUnavailable("Database unavailable (circuit breaker open)")
+
+    def record_success(self):
+        if self.state == self.CLOSED and not self._failures:
+            return
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def is_closed(self) -> bool:
+        """Check if calls are going through normally"""
+        return self.state == self.CLOSED
+
+    def is_healthy(self) -> bool:
+        """Check if the breaker is closed and the last connection attempt succeeded"""
+        return self.state == self.CLOSED and not self._failures
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self._failures,
+                'rejected': self.rejected,
+                'times_opened': self.times_opened
+            }
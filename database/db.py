@@ -4,9 +4,20 @@ Author: Zhou Li
 Date: 2025-10-11
 """
 
-import psycopg
+import atexit
 import configparser
+import json
 import os
+import socket
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+import psycopg
+from psycopg_pool import ConnectionPool
+
+from database.circuit_breaker import CircuitBreaker, DatabaseUnavailable
+from database.instrumentation import InstrumentedCursor, record_connection
 
 # Get the project root directory (where config.ini is located)
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -24,85 +35,260 @@ DB_CONFIG = {
     'password': config.get('database', 'password')
 }
 
+# Connection pool configuration (all values optional, times in seconds)
+POOL_CONFIG = {
+    'min_size': config.getint('pool', 'min_size', fallback=2),
+    'max_size': config.getint('pool', 'max_size', fallback=10),
+    'max_idle': config.getfloat('pool', 'max_idle', fallback=300.0),
+    'timeout': config.getfloat('pool', 'timeout', fallback=5.0),
+    'connect_timeout': config.getint('pool', 'connect_timeout', fallback=5)
+}
+
+# Circuit breaker around get_db_connection (reset_timeout in seconds)
+BREAKER_CONFIG = {
+    'failure_threshold': config.getint('circuit_breaker', 'failure_threshold', fallback=5),
+    'reset_timeout': config.getfloat('circuit_breaker', 'reset_timeout', fallback=10.0)
+}
+
+# Per-request query instrumentation (see routes/metrics.py)
+INSTRUMENTATION_CONFIG = {
+    'enabled': config.getboolean('instrumentation', 'enabled', fallback=True),
+    # Warn when one statement runs more than this many times in a request
+    'repeat_threshold': config.getint('instrumentation', 'repeat_threshold', fallback=5),
+    # Bearer token for scraping /metrics without an admin session (empty: admins only)
+    'metrics_token': config.get('instrumentation', 'metrics_token', fallback='')
+}
+
+# Catalog cache (movies, cinemas, halls) settings, ttl in seconds
+CACHE_CONFIG = {
+    'catalog_ttl': config.getfloat('cache', 'catalog_ttl', fallback=300.0),
+    'catalog_max_entries': config.getint('cache', 'catalog_max_entries', fallback=1000),
+    # How long (seconds) expired catalog entries may still be served while
+    # they are refreshed in the background or the database is unavailable
+    'catalog_stale_window': config.getfloat('cache', 'catalog_stale_window', fallback=3600.0),
+    # Seconds a screening's cached seat availability is used before it is
+    # reloaded (bounds how long a missed invalidation can go unnoticed)
+    'availability_ttl': config.getfloat('cache', 'availability_ttl', fallback=60.0),
+    # Longest wait (seconds) for another request's in-flight load of the same key
+    'singleflight_timeout': config.getfloat('cache', 'singleflight_timeout', fallback=10.0),
+    # Broadcast cache invalidations to other workers with LISTEN/NOTIFY
+    'notify': config.getboolean('cache', 'notify', fallback=True)
+}
+
+# Seat holds during checkout
+HOLD_CONFIG = {
+    'hold_minutes': config.getfloat('holds', 'hold_minutes', fallback=10.0),
+    # Seconds between sweeps deleting expired holds (per worker)
+    'sweep_interval': config.getfloat('holds', 'sweep_interval', fallback=60.0)
+}
+
+# Idempotency keys of booking requests (see database/migrations/0004_booking_requests.sql)
+IDEMPOTENCY_CONFIG = {
+    # Minutes a booking request's outcome is kept for retries
+    'ttl_minutes': config.getfloat('idempotency', 'ttl_minutes', fallback=1440.0),
+    # Seconds between sweeps deleting expired keys (per worker)
+    'sweep_interval': config.getfloat('idempotency', 'sweep_interval', fallback=300.0)
+}
+
+# Seat counter reconciliation (see database/migrations/0005_seat_counters.sql)
+COUNTER_CONFIG = {
+    # Seconds between runs of the job repairing drifted counters (0 disables it)
+    'reconcile_interval': config.getfloat('counters', 'reconcile_interval', fallback=300.0)
+}
+
+# Seat map delta sync (see database/migrations/0006_seat_changes.sql)
+SEAT_SYNC_CONFIG = {
+    # Minutes seat changes are logged for clients catching up
+    'retention_minutes': config.getfloat('seat_sync', 'retention_minutes', fallback=60.0),
+    # Most changed seats sent as a delta; clients further behind get a snapshot
+    'max_delta': config.getint('seat_sync', 'max_delta', fallback=200)
+}
+
+# Live availability streams (see backend/availability_stream.py)
+STREAM_CONFIG = {
+    # Seconds between keep-alive comments on an idle stream
+    'heartbeat_interval': config.getfloat('stream', 'heartbeat_interval', fallback=15.0),
+    # Open streams per worker (each holds a thread)
+    'max_subscribers': config.getint('stream', 'max_subscribers', fallback=500),
+    # Events buffered per stream before a slow client has to resync
+    'queue_size': config.getint('stream', 'queue_size', fallback=100)
+}
+
+# Group-commit booking queue for hot screenings (see backend/booking_queue.py)
+BOOKING_QUEUE_CONFIG = {
+    'enabled': config.getboolean('booking_queue', 'enabled', fallback=False),
+    # Bookings for one screening in flight in a worker before new ones are
+    # queued (0 queues every booking)
+    'hot_threshold': config.getint('booking_queue', 'hot_threshold', fallback=4),
+    # Most bookings committed in one transaction
+    'max_batch': config.getint('booking_queue', 'max_batch', fallback=50)
+}
+
+# NOTIFY channel for cache invalidation messages (see backend/cache_invalidation.py)
+INVALIDATION_CHANNEL = 'cache_invalidation'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Opened by repeated connection failures; see database/circuit_breaker.py
+db_breaker = CircuitBreaker(**BREAKER_CONFIG)
+
+
+def get_db_pool():
+    """Get the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    kwargs=dict(DB_CONFIG, connect_timeout=POOL_CONFIG['connect_timeout'],
+                                cursor_factory=InstrumentedCursor),
+                    min_size=POOL_CONFIG['min_size'],
+                    max_size=POOL_CONFIG['max_size'],
+                    max_idle=POOL_CONFIG['max_idle'],
+                    timeout=POOL_CONFIG['timeout'],
+                    check=ConnectionPool.check_connection,
+                    name='cinema_db',
+                    open=True
+                )
+    return _pool
+
+
+def close_db_pool():
+    """Close the connection pool (called automatically at interpreter exit)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+atexit.register(close_db_pool)
 
+
+@contextmanager
 def get_db_connection():
-    """Get database connection"""
-    try:
-        conn = psycopg.connect(**DB_CONFIG)
-        return conn
-    except Exception as e:
-        print(f"Database connection error: {e}")
-        return None
+    """
+    Borrow a database connection from the pool
+    Usage: with get_db_connection() as conn: ...
+    The transaction is committed when the block exits normally, rolled back
+    if it raises, and the connection is returned to the pool either way.
+    Raises DatabaseUnavailable without connecting while the circuit breaker
+    is open. Only failing to get a connection counts against the breaker;
+    errors raised by queries in the block (deadlocks, serialization
+    failures, timeouts) are the caller's and leave it unchanged.
+    """
+    db_breaker.before_call()
+    record_connection()
+    with ExitStack() as stack:
+        try:
+            conn = stack.enter_context(get_db_pool().connection())
+        except psycopg.OperationalError:
+            # Connect errors and pool checkout timeouts (PoolTimeout)
+            db_breaker.record_failure()
+            raise
+        except BaseException:
+            # Not a database failure; don't leave a half-open trial hanging
+            db_breaker.record_success()
+            raise
+        db_breaker.record_success()
+        yield conn
+
+
+def is_database_degraded():
+    """
+    Check if the database is failing
+    True while the circuit breaker is open, or after a failed connection
+    attempt that has not been followed by a successful one yet
+    """
+    return not db_breaker.is_healthy()
+
+
+def get_pool_stats():
+    """Get connection pool statistics (checkouts, waits and wait time)"""
+    if _pool is None:
+        return {}
+    stats = _pool.get_stats()
+    return {
+        'pool_min': stats.get('pool_min', 0),
+        'pool_max': stats.get('pool_max', 0),
+        'pool_size': stats.get('pool_size', 0),
+        'pool_available': stats.get('pool_available', 0),
+        'checkouts': stats.get('requests_num', 0),
+        'waits': stats.get('requests_queued', 0),
+        'waiting_now': stats.get('requests_waiting', 0),
+        'wait_time_ms': stats.get('requests_wait_ms', 0),
+        'checkout_errors': stats.get('requests_errors', 0),
+        'connections_opened': stats.get('connections_num', 0),
+        'connection_errors': stats.get('connections_errors', 0)
+    }
+
+
+def get_process_id():
+    """Get an ID for this worker process (host:pid), used to skip our own notifications"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
 
+def notify_cache_invalidation(cursor, entity, entity_id=None, **details):
+    """
+    Queue a cache invalidation message on the cursor's transaction
+    PostgreSQL delivers it to every listening worker when the transaction
+    commits, and drops it if the transaction rolls back.
+    entity: 'movie', 'cinema', 'hall' or 'screening'
+    entity_id: affected row, or None for every row of the entity
+    details: extra JSON fields, e.g. booked=[seat_ids] for a screening
+    """
+    if not CACHE_CONFIG['notify']:
+        return
+    payload = dict(details, entity=entity, id=entity_id, origin=get_process_id())
+    cursor.execute("SELECT pg_notify(%s, %s)", (INVALIDATION_CHANNEL, json.dumps(payload)))
+
+
+# Read functions below take an optional psycopg row_factory (e.g.
+# Movie.row_factory from backend.models); without one rows are tuples
 
 # User-related database operations
-def get_user_by_username(username):
+def get_user_by_username(username, row_factory=None):
     """Get user by username"""
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT user_id, username, password, email, first_name, last_name, phone, user_type FROM users WHERE username = %s",
-            (username,)
-        )
-        user = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return user
+    try:
+        with get_db_connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+            cursor.execute(
+                "SELECT user_id, username, password, email, first_name, last_name, phone, user_type FROM users WHERE username = %s",
+                (username,)
+            )
+            return cursor.fetchone()
     except Exception as e:
         print(f"Error getting user: {e}")
-        if conn:
-            conn.close()
         return None
 
 
 def check_username_or_email_exists(username, email):
     """Check if username or email already exists"""
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT user_id FROM users WHERE username = %s OR email = %s",
-            (username, email)
-        )
-        exists = cursor.fetchone() is not None
-        cursor.close()
-        conn.close()
-        return exists
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT user_id FROM users WHERE username = %s OR email = %s",
+                (username, email)
+            )
+            return cursor.fetchone() is not None
     except Exception as e:
         print(f"Error checking user existence: {e}")
-        if conn:
-            conn.close()
         return False
 
 
 def create_user(username, email, password, first_name, last_name, phone, user_type='customer'):
     """Create a new user"""
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """INSERT INTO users (username, email, password, first_name, last_name, phone, user_type)
-               VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-            (username, email, password, first_name, last_name, phone, user_type)
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return True
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """INSERT INTO users (username, email, password, first_name, last_name, phone, user_type)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                (username, email, password, first_name, last_name, phone, user_type)
+            )
+            conn.commit()
+            return True
     except Exception as e:
         print(f"Error creating user: {e}")
-        if conn:
-            conn.close()
         return False
 
 
@@ -111,7 +297,7 @@ def verify_password(username, password):
     user = get_user_by_username(username)
     if not user:
         return None
-    
+
     # Plain text password comparison
     if user[2] == password:  # user[2] is password field
         return user  # Return user data if password matches
@@ -119,638 +305,1228 @@ def verify_password(username, password):
 
 
 # Cinema-related database operations
-def get_all_cinemas():
+def get_all_cinemas(row_factory=None):
     """Get all cinemas"""
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT cinema_id, cinema_name, address, suburb, postcode, phone, email, facilities, created_at, updated_at, is_active FROM cinemas ORDER BY cinema_id"
-        )
-        cinemas = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return cinemas
+        with get_db_connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+            cursor.execute(
+                "SELECT cinema_id, cinema_name, address, suburb, postcode, phone, email, facilities, created_at, updated_at, is_active FROM cinemas ORDER BY cinema_id"
+            )
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error getting cinemas: {e}")
-        if conn:
-            conn.close()
         return []
 
 
-def get_cinema_by_id(cinema_id):
+def get_cinema_by_id(cinema_id, row_factory=None):
     """Get cinema by ID"""
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT cinema_id, cinema_name, address, suburb, postcode, phone, email, facilities, created_at, updated_at, is_active FROM cinemas WHERE cinema_id = %s",
-            (cinema_id,)
-        )
-        cinema = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return cinema
+    try:
+        with get_db_connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+            cursor.execute(
+                "SELECT cinema_id, cinema_name, address, suburb, postcode, phone, email, facilities, created_at, updated_at, is_active FROM cinemas WHERE cinema_id = %s",
+                (cinema_id,)
+            )
+            return cursor.fetchone()
     except Exception as e:
         print(f"Error getting cinema: {e}")
-        if conn:
-            conn.close()
         return None
 
 
 def create_cinema(cinema_name, address, suburb, postcode, phone, email, facilities, is_active=True):
     """Create a new cinema"""
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """INSERT INTO cinemas (cinema_name, address, suburb, postcode, phone, email, facilities, is_active)
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
-            (cinema_name, address, suburb, postcode, phone, email, facilities, is_active)
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return True
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """INSERT INTO cinemas (cinema_name, address, suburb, postcode, phone, email, facilities, is_active)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
+                (cinema_name, address, suburb, postcode, phone, email, facilities, is_active)
+            )
+            notify_cache_invalidation(cursor, 'cinema')
+            conn.commit()
+            return True
     except Exception as e:
         print(f"Error creating cinema: {e}")
-        if conn:
-            conn.close()
         return False
 
 
 # Movie-related database operations
-def get_all_movies():
+def get_all_movies(row_factory=None):
     """Get all movies"""
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT movie_id, title, description, genre, duration_minutes, release_date, 
-                      director, "cast", language, subtitles, poster_url, created_at, updated_at, is_active 
-               FROM movies ORDER BY release_date DESC"""
-        )
-        movies = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return movies
+    try:
+        with get_db_connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+            cursor.execute(
+                """SELECT movie_id, title, description, genre, duration_minutes, release_date,
+                          director, "cast", language, subtitles, poster_url, created_at, updated_at, is_active
+                   FROM movies ORDER BY release_date DESC"""
+            )
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error getting movies: {e}")
-        if conn:
-            conn.close()
         return []
 
 
-def get_movie_by_id(movie_id):
+def get_movie_by_id(movie_id, row_factory=None):
     """Get movie by ID"""
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT movie_id, title, description, genre, duration_minutes, release_date, 
-                      director, "cast", language, subtitles, poster_url, created_at, updated_at, is_active 
-               FROM movies WHERE movie_id = %s""",
-            (movie_id,)
-        )
-        movie = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return movie
+    try:
+        with get_db_connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+            cursor.execute(
+                """SELECT movie_id, title, description, genre, duration_minutes, release_date,
+                          director, "cast", language, subtitles, poster_url, created_at, updated_at, is_active
+                   FROM movies WHERE movie_id = %s""",
+                (movie_id,)
+            )
+            return cursor.fetchone()
     except Exception as e:
         print(f"Error getting movie: {e}")
-        if conn:
-            conn.close()
         return None
 
 
 def create_movie(title, description, genre, duration_minutes, release_date, director, cast, language, subtitles, is_active=True):
     """Create a new movie"""
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """INSERT INTO movies (title, description, genre, duration_minutes, release_date, 
-                                   director, cast, language, subtitles, is_active)
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-            (title, description, genre, duration_minutes, release_date, director, cast, language, subtitles, is_active)
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return True
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """INSERT INTO movies (title, description, genre, duration_minutes, release_date,
+                                       director, cast, language, subtitles, is_active)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                (title, description, genre, duration_minutes, release_date, director, cast, language, subtitles, is_active)
+            )
+            notify_cache_invalidation(cursor, 'movie')
+            conn.commit()
+            return True
     except Exception as e:
         print(f"Error creating movie: {e}")
-        if conn:
-            conn.close()
         return False
 
 
 # Cinema Hall-related database operations
-def get_cinema_halls_by_cinema(cinema_id):
+def get_cinema_halls_by_cinema(cinema_id, row_factory=None):
     """Get all cinema halls for a specific cinema"""
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT hall_id, cinema_id, hall_name, hall_type, total_rows, seats_per_row, 
-                      total_seats, screen_size, sound_system, created_at, updated_at 
-               FROM cinema_halls WHERE cinema_id = %s ORDER BY hall_name""",
-            (cinema_id,)
-        )
-        halls = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return halls
+    try:
+        with get_db_connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+            cursor.execute(
+                """SELECT hall_id, cinema_id, hall_name, hall_type, total_rows, seats_per_row,
+                          total_seats, screen_size, sound_system, created_at, updated_at
+                   FROM cinema_halls WHERE cinema_id = %s ORDER BY hall_name""",
+                (cinema_id,)
+            )
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error getting cinema halls: {e}")
-        if conn:
-            conn.close()
         return []
 
 
-def get_cinema_hall_by_id(hall_id):
+def get_cinema_hall_by_id(hall_id, row_factory=None):
     """Get cinema hall by ID"""
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT hall_id, cinema_id, hall_name, hall_type, total_rows, seats_per_row, 
-                      total_seats, screen_size, sound_system, created_at, updated_at 
-               FROM cinema_halls WHERE hall_id = %s""",
-            (hall_id,)
-        )
-        hall = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return hall
+    try:
+        with get_db_connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+            cursor.execute(
+                """SELECT hall_id, cinema_id, hall_name, hall_type, total_rows, seats_per_row,
+                          total_seats, screen_size, sound_system, created_at, updated_at
+                   FROM cinema_halls WHERE hall_id = %s""",
+                (hall_id,)
+            )
+            return cursor.fetchone()
     except Exception as e:
         print(f"Error getting cinema hall: {e}")
-        if conn:
-            conn.close()
         return None
 
 
 def create_cinema_hall(cinema_id, hall_name, hall_type=None, total_rows=None,
                         seats_per_row=None, total_seats=None, screen_size=None,
-                        sound_system=None):
-    """Create a new cinema hall"""
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """INSERT INTO cinema_halls (cinema_id, hall_name, hall_type, total_rows, seats_per_row, 
-                                       total_seats, screen_size, sound_system)
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
-            (cinema_id, hall_name, hall_type, total_rows, seats_per_row,
-             total_seats, screen_size, sound_system)
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return True
+                        sound_system=None, seat_types=None):
+    """
+    Create a new cinema hall
+    If total_rows and seats_per_row are given, the hall's seats are generated
+    in the same transaction (see create_seats_for_hall for seat_types)
+    Returns the new hall_id, or None on failure
+    """
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """INSERT INTO cinema_halls (cinema_id, hall_name, hall_type, total_rows, seats_per_row,
+                                           total_seats, screen_size, sound_system)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                   RETURNING hall_id""",
+                (cinema_id, hall_name, hall_type, total_rows, seats_per_row,
+                 total_seats, screen_size, sound_system)
+            )
+            hall_id = cursor.fetchone()[0]
+
+            if total_rows and seats_per_row:
+                copy_seats(cursor, build_seat_rows(hall_id, total_rows, seats_per_row, seat_types))
+
+            notify_cache_invalidation(cursor, 'hall', hall_id)
+            conn.commit()
+            return hall_id
     except Exception as e:
         print(f"Error creating cinema hall: {e}")
-        if conn:
-            conn.close()
-        return False
+        return None
 
 
 # Seat-related database operations
-def get_seats_by_hall(hall_id):
+def get_seats_by_hall(hall_id, row_factory=None):
     """Get all seats for a specific hall"""
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT seat_id, hall_id, row_number, seat_number, seat_type, 
-                      price_multiplier, is_active 
-               FROM seats WHERE hall_id = %s ORDER BY row_number, seat_number""",
-            (hall_id,)
-        )
-        seats = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return seats
+    try:
+        with get_db_connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+            cursor.execute(
+                """SELECT seat_id, hall_id, row_number, seat_number, seat_type,
+                          price_multiplier, is_active
+                   FROM seats WHERE hall_id = %s ORDER BY row_number, seat_number""",
+                (hall_id,)
+            )
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error getting seats: {e}")
-        if conn:
-            conn.close()
         return []
 
 
 def get_seat_by_id(seat_id):
     """Get seat by ID"""
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT seat_id, hall_id, row_number, seat_number, seat_type, 
-                      price_multiplier, is_active 
-               FROM seats WHERE seat_id = %s""",
-            (seat_id,)
-        )
-        seat = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return seat
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """SELECT seat_id, hall_id, row_number, seat_number, seat_type,
+                          price_multiplier, is_active
+                   FROM seats WHERE seat_id = %s""",
+                (seat_id,)
+            )
+            return cursor.fetchone()
     except Exception as e:
         print(f"Error getting seat: {e}")
-        if conn:
-            conn.close()
         return None
 
 
+SEAT_PRICE_MULTIPLIERS = {'standard': 1.00, 'premium': 1.50, 'vip': 2.00}
+
+
+def build_seat_rows(hall_id, total_rows, seats_per_row, seat_types=None):
+    """
+    Build seat rows for a hall in memory
+    seat_types: optional {row_number: seat_type}; rows not listed are 'standard'
+    Returns list of (hall_id, row_number, seat_number, seat_type, price_multiplier, is_active)
+    """
+    seat_types = seat_types or {}
+    seat_rows = []
+    for row in range(1, total_rows + 1):
+        seat_type = seat_types.get(row, 'standard')
+        price_multiplier = SEAT_PRICE_MULTIPLIERS.get(seat_type, 1.00)
+        for seat in range(1, seats_per_row + 1):
+            seat_rows.append((hall_id, row, seat, seat_type, price_multiplier, True))
+    return seat_rows
+
+
+def copy_seats(cursor, seat_rows):
+    """Load seat rows built by build_seat_rows with a single COPY"""
+    with cursor.copy(
+        "COPY seats (hall_id, row_number, seat_number, seat_type, price_multiplier, is_active) FROM STDIN"
+    ) as copy:
+        for seat_row in seat_rows:
+            copy.write_row(seat_row)
+
+
 def create_seats_for_hall(hall_id, total_rows, seats_per_row, seat_types=None):
     """Create all seats for a hall"""
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
-    try:
-        cursor = conn.cursor()
-        seat_type = seat_types or {}
-        
-        for row in range(1, total_rows + 1):
-            for seat in range(1, seats_per_row + 1):
-                # Determine seat type based on row
-                seat_type_value = seat_type.get(row, 'standard')
-                price_multiplier = 1.00
-                
-                if seat_type_value == 'premium':
-                    price_multiplier = 1.50
-                elif seat_type_value == 'vip':
-                    price_multiplier = 2.00
-                
-                cursor.execute(
-                    """INSERT INTO seats (hall_id, row_number, seat_number, seat_type, 
-                                         price_multiplier, is_active)
-                       VALUES (%s, %s, %s, %s, %s, %s)""",
-                    (hall_id, row, seat, seat_type_value, price_multiplier, True)
-                )
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return True
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            copy_seats(cursor, build_seat_rows(hall_id, total_rows, seats_per_row, seat_types))
+            notify_cache_invalidation(cursor, 'hall', hall_id)
+            conn.commit()
+            return True
     except Exception as e:
         print(f"Error creating seats for hall: {e}")
-        if conn:
-            conn.close()
         return False
 
 
 # Screening-related database operations
-def get_all_screenings():
+def get_all_screenings(row_factory=None):
     """Get all screenings"""
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT screening_id, movie_id, cinema_id, hall_id, screening_date,
-                      start_time, end_time, ticket_price, screening_type,
-                      language, subtitles, is_active, created_at, updated_at
-               FROM screenings WHERE is_active = TRUE 
-               ORDER BY screening_date, start_time"""
-        )
-        screenings = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return screenings
+    try:
+        with get_db_connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+            cursor.execute(
+                """SELECT screening_id, movie_id, cinema_id, hall_id, screening_date,
+                          start_time, end_time, ticket_price, screening_type,
+                          language, subtitles, is_active, created_at, updated_at
+                   FROM screenings WHERE is_active = TRUE
+                   ORDER BY screening_date, start_time"""
+            )
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error getting screenings: {e}")
-        if conn:
-            conn.close()
         return []
 
 
-def get_screenings_by_movie(movie_id):
+def get_screenings_by_movie(movie_id, row_factory=None):
     """Get screenings for a specific movie"""
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT screening_id, movie_id, cinema_id, hall_id, screening_date,
-                      start_time, end_time, ticket_price, screening_type,
-                      language, subtitles, is_active, created_at, updated_at
-               FROM screenings WHERE movie_id = %s AND is_active = TRUE
-               ORDER BY screening_date, start_time""",
-            (movie_id,)
-        )
-        screenings = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return screenings
+    try:
+        with get_db_connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+            cursor.execute(
+                """SELECT screening_id, movie_id, cinema_id, hall_id, screening_date,
+                          start_time, end_time, ticket_price, screening_type,
+                          language, subtitles, is_active, created_at, updated_at
+                   FROM screenings WHERE movie_id = %s AND is_active = TRUE
+                   ORDER BY screening_date, start_time""",
+                (movie_id,)
+            )
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error getting screenings for movie: {e}")
-        if conn:
-            conn.close()
         return []
 
 
-def get_screenings_by_cinema(cinema_id):
+def get_screenings_by_cinema(cinema_id, row_factory=None):
     """Get screenings for a specific cinema"""
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT screening_id, movie_id, cinema_id, hall_id, screening_date,
-                      start_time, end_time, ticket_price, screening_type,
-                      language, subtitles, is_active, created_at, updated_at
-               FROM screenings WHERE cinema_id = %s AND is_active = TRUE
-               ORDER BY screening_date, start_time""",
-            (cinema_id,)
-        )
-        screenings = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return screenings
+    try:
+        with get_db_connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+            cursor.execute(
+                """SELECT screening_id, movie_id, cinema_id, hall_id, screening_date,
+                          start_time, end_time, ticket_price, screening_type,
+                          language, subtitles, is_active, created_at, updated_at
+                   FROM screenings WHERE cinema_id = %s AND is_active = TRUE
+                   ORDER BY screening_date, start_time""",
+                (cinema_id,)
+            )
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error getting screenings for cinema: {e}")
-        if conn:
-            conn.close()
         return []
 
 
-def get_screening_by_id(screening_id):
-    """Get screening by ID"""
-    conn = get_db_connection()
-    if not conn:
+def get_screening_listing(movie_id=None, cinema_id=None, screening_date=None, dates_from=None,
+                          row_factory=None):
+    """
+    Get active screenings for the movie/cinema screenings pages in one round trip
+    Filters that are None are not applied. Two statements are sent together
+    in pipeline mode:
+    - the matching screenings joined with their movie and cinema, ordered by
+      date and time (screening columns 0-13 and seats_left 14, movie
+      15-28, cinema 29-39); seats_left comes from the screening's and
+      hall's seat counters (see migration 0005_seat_counters.sql)
+    - the distinct dates (from dates_from on, if given) that have a
+      screening for the movie/cinema, ignoring the screening_date filter
+    row_factory: optional row factory for the screening rows
+    Returns (rows, available_dates)
+    """
+    conditions = ["sc.is_active = TRUE"]
+    params = []
+    if movie_id is not None:
+        conditions.append("sc.movie_id = %s")
+        params.append(movie_id)
+    if cinema_id is not None:
+        conditions.append("sc.cinema_id = %s")
+        params.append(cinema_id)
+    date_conditions = list(conditions)
+    date_params = list(params)
+    if dates_from is not None:
+        date_conditions.append("sc.screening_date >= %s")
+        date_params.append(dates_from)
+    if screening_date is not None:
+        conditions.append("sc.screening_date = %s")
+        params.append(screening_date)
+
+    try:
+        with get_db_connection() as conn, conn.pipeline():
+            screenings_cursor = conn.cursor(row_factory=row_factory)
+            dates_cursor = conn.cursor()
+            screenings_cursor.execute(
+                f"""SELECT sc.screening_id, sc.movie_id, sc.cinema_id, sc.hall_id, sc.screening_date,
+                           sc.start_time, sc.end_time, sc.ticket_price, sc.screening_type,
+                           sc.language, sc.subtitles, sc.is_active, sc.created_at, sc.updated_at,
+                           GREATEST(h.seat_capacity - sc.seats_sold, 0) AS seats_left,
+                           m.movie_id, m.title, m.description, m.genre, m.duration_minutes, m.release_date,
+                           m.director, m."cast", m.language, m.subtitles, m.poster_url, m.created_at,
+                           m.updated_at, m.is_active,
+                           c.cinema_id, c.cinema_name, c.address, c.suburb, c.postcode, c.phone, c.email,
+                           c.facilities, c.created_at, c.updated_at, c.is_active
+                    FROM screenings sc
+                    JOIN movies m ON sc.movie_id = m.movie_id
+                    JOIN cinemas c ON sc.cinema_id = c.cinema_id
+                    JOIN cinema_halls h ON sc.hall_id = h.hall_id
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY sc.screening_date, sc.start_time""",
+                params
+            )
+            # Index-only scan on idx_screenings_movie_active/cinema_active
+            dates_cursor.execute(
+                f"""SELECT DISTINCT sc.screening_date
+                    FROM screenings sc
+                    WHERE {' AND '.join(date_conditions)}
+                    ORDER BY sc.screening_date""",
+                date_params
+            )
+            # Fetching forces a single sync for both statements
+            rows = screenings_cursor.fetchall()
+            available_dates = [row[0] for row in dates_cursor.fetchall()]
+            return rows, available_dates
+    except Exception as e:
+        print(f"Error getting screening listing: {e}")
+        return [], []
+
+
+# Arbitrary key for pg_try_advisory_xact_lock so only one worker reconciles
+# (or prunes seat changes) at a time
+COUNTER_LOCK_ID = 900122
+
+
+def reconcile_seat_counters():
+    """
+    Repair the seats_sold counters of upcoming screenings and the
+    seat_capacity counters of halls that drifted from seat_bookings/seats
+    Drifted rows are found without locks, then locked and recounted, so a
+    booking committing in between is neither lost nor counted twice.
+    Returns (screenings repaired, halls repaired), or None if another
+    worker is already reconciling or the database failed
+    """
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", (COUNTER_LOCK_ID,))
+            if not cursor.fetchone()[0]:
+                return None
+
+            # Index-only scans on uq_seat_bookings_active_seat
+            cursor.execute(
+                """SELECT sc.screening_id FROM screenings sc
+                   WHERE sc.screening_date >= CURRENT_DATE
+                     AND sc.seats_sold <> (SELECT COUNT(*) FROM seat_bookings sb
+                                           WHERE sb.screening_id = sc.screening_id AND sb.is_active)"""
+            )
+            screening_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(
+                """SELECT h.hall_id FROM cinema_halls h
+                   WHERE h.seat_capacity <> (SELECT COUNT(*) FROM seats s
+                                             WHERE s.hall_id = h.hall_id AND s.is_active)"""
+            )
+            hall_ids = [row[0] for row in cursor.fetchall()]
+
+            # Locking first makes each recount (a new statement, so a new
+            # snapshot) see every booking that updated the counter before it
+            screenings_repaired = halls_repaired = 0
+            if screening_ids:
+                cursor.execute(
+                    """SELECT screening_id FROM screenings WHERE screening_id = ANY(%s)
+                       ORDER BY screening_id FOR NO KEY UPDATE""",
+                    (screening_ids,)
+                )
+                cursor.execute(
+                    """UPDATE screenings sc SET seats_sold = actual.sold
+                       FROM (SELECT sc2.screening_id,
+                                    (SELECT COUNT(*) FROM seat_bookings sb
+                                     WHERE sb.screening_id = sc2.screening_id AND sb.is_active) AS sold
+                             FROM screenings sc2 WHERE sc2.screening_id = ANY(%s)) actual
+                       WHERE sc.screening_id = actual.screening_id AND sc.seats_sold <> actual.sold""",
+                    (screening_ids,)
+                )
+                screenings_repaired = cursor.rowcount
+            if hall_ids:
+                cursor.execute(
+                    """SELECT hall_id FROM cinema_halls WHERE hall_id = ANY(%s)
+                       ORDER BY hall_id FOR NO KEY UPDATE""",
+                    (hall_ids,)
+                )
+                cursor.execute(
+                    """UPDATE cinema_halls h SET seat_capacity = actual.capacity
+                       FROM (SELECT h2.hall_id,
+                                    (SELECT COUNT(*) FROM seats s
+                                     WHERE s.hall_id = h2.hall_id AND s.is_active) AS capacity
+                             FROM cinema_halls h2 WHERE h2.hall_id = ANY(%s)) actual
+                       WHERE h.hall_id = actual.hall_id AND h.seat_capacity <> actual.capacity""",
+                    (hall_ids,)
+                )
+                halls_repaired = cursor.rowcount
+            conn.commit()
+            return screenings_repaired, halls_repaired
+    except Exception as e:
+        print(f"Error reconciling seat counters: {e}")
+        return None
+
+
+def get_seat_changes(screening_id, since):
+    """
+    Get the seats of a screening whose state changed after version since
+    The current version, the oldest logged version and the changes are read
+    in one statement, so they are consistent with each other.
+    Returns (version, [(seat_id, booked), ...]); the list is None if the
+    changes since that version are no longer (or too many to be) logged and
+    the client needs a snapshot. Returns None if the screening doesn't exist
+    """
+    limit = SEAT_SYNC_CONFIG['max_delta']
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            # Index range scans on the seat_changes primary key
+            cursor.execute(
+                """SELECT sc.seats_version,
+                          (SELECT MIN(c.version) FROM seat_changes c WHERE c.screening_id = sc.screening_id),
+                          ch.seat_id, ch.booked
+                   FROM screenings sc
+                   LEFT JOIN LATERAL (
+                       SELECT DISTINCT ON (c.seat_id) c.seat_id, c.booked
+                       FROM seat_changes c
+                       WHERE c.screening_id = sc.screening_id AND c.version > %s
+                       ORDER BY c.seat_id, c.version DESC
+                       LIMIT %s
+                   ) ch ON TRUE
+                   WHERE sc.screening_id = %s""",
+                (since, limit + 1, screening_id)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return None
+            version, oldest = rows[0][0], rows[0][1]
+            if since == version:
+                return version, []
+            if since > version or oldest is None or since < oldest - 1 or len(rows) > limit:
+                return version, None
+            return version, [(row[2], row[3]) for row in rows if row[2] is not None]
+    except Exception as e:
+        print(f"Error getting seat changes: {e}")
         return None
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT screening_id, movie_id, cinema_id, hall_id, screening_date,
-                      start_time, end_time, ticket_price, screening_type,
-                      language, subtitles, is_active, created_at, updated_at
-               FROM screenings WHERE screening_id = %s""",
-            (screening_id,)
-        )
-        screening = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return screening
+
+
+def get_seat_snapshot(screening_id):
+    """
+    Get a screening's booked seats with the version they are current for
+    Returns (version, sorted booked seat IDs), or None if the screening
+    doesn't exist
+    """
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            # Index-only scan on uq_seat_bookings_active_seat
+            cursor.execute(
+                """SELECT sc.seats_version,
+                          ARRAY(SELECT sb.seat_id FROM seat_bookings sb
+                                WHERE sb.screening_id = sc.screening_id AND sb.is_active
+                                ORDER BY sb.seat_id)
+                   FROM screenings sc WHERE sc.screening_id = %s""",
+                (screening_id,)
+            )
+            return cursor.fetchone()
+    except Exception as e:
+        print(f"Error getting seat snapshot: {e}")
+        return None
+
+
+def prune_seat_changes():
+    """
+    Delete seat changes older than SEAT_SYNC_CONFIG['retention_minutes']
+    A screening's log is cut at its newest expired version, so what is left
+    is always every version from the oldest logged one on (created_at is
+    the transaction start, which doesn't follow the version order exactly)
+    Workers take turns under the seat counter reconciliation lock.
+    Returns number of rows deleted, or None if another worker holds the
+    lock or the database failed
+    """
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", (COUNTER_LOCK_ID,))
+            if not cursor.fetchone()[0]:
+                return None
+
+            # Index range scan on idx_seat_changes_created, then the primary key
+            cursor.execute(
+                """DELETE FROM seat_changes c
+                   USING (SELECT screening_id, MAX(version) AS version FROM seat_changes
+                          WHERE created_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+                          GROUP BY screening_id) expired
+                   WHERE c.screening_id = expired.screening_id AND c.version <= expired.version""",
+                (SEAT_SYNC_CONFIG['retention_minutes'] * 60,)
+            )
+            conn.commit()
+            return cursor.rowcount
+    except Exception as e:
+        print(f"Error pruning seat changes: {e}")
+        return None
+
+
+def get_screening_by_id(screening_id, row_factory=None):
+    """Get screening by ID"""
+    try:
+        with get_db_connection() as conn, conn.cursor(row_factory=row_factory) as cursor:
+            cursor.execute(
+                """SELECT screening_id, movie_id, cinema_id, hall_id, screening_date,
+                          start_time, end_time, ticket_price, screening_type,
+                          language, subtitles, is_active, created_at, updated_at
+                   FROM screenings WHERE screening_id = %s""",
+                (screening_id,)
+            )
+            return cursor.fetchone()
     except Exception as e:
         print(f"Error getting screening: {e}")
-        if conn:
-            conn.close()
         return None
 
 
+def get_screening_booking_data(screening_id, with_booked=True, row_factory=None):
+    """
+    Get the per-screening data the seat selection page needs in one round trip
+    (the hall's seats are static and come from get_seats_by_hall)
+    The statements are sent together in pipeline mode:
+    - the screening joined with its movie, cinema and hall
+      (screening columns 0-13, movie 14-27, cinema 28-38, hall 39-49,
+       in the same order as the single-table queries above)
+    - if with_booked, the IDs of seats held by non-cancelled bookings
+    row_factory: optional row factory for the info row
+    Returns (info_row, booked_seat_ids); info_row is None if the screening
+    does not exist and booked_seat_ids is None unless requested
+    """
+    try:
+        with get_db_connection() as conn, conn.pipeline():
+            info_cursor = conn.cursor(row_factory=row_factory)
+            booked_cursor = conn.cursor()
+            info_cursor.execute(
+                """SELECT sc.screening_id, sc.movie_id, sc.cinema_id, sc.hall_id, sc.screening_date,
+                          sc.start_time, sc.end_time, sc.ticket_price, sc.screening_type,
+                          sc.language, sc.subtitles, sc.is_active, sc.created_at, sc.updated_at,
+                          m.movie_id, m.title, m.description, m.genre, m.duration_minutes, m.release_date,
+                          m.director, m."cast", m.language, m.subtitles, m.poster_url, m.created_at,
+                          m.updated_at, m.is_active,
+                          c.cinema_id, c.cinema_name, c.address, c.suburb, c.postcode, c.phone, c.email,
+                          c.facilities, c.created_at, c.updated_at, c.is_active,
+                          h.hall_id, h.cinema_id, h.hall_name, h.hall_type, h.total_rows, h.seats_per_row,
+                          h.total_seats, h.screen_size, h.sound_system, h.created_at, h.updated_at
+                   FROM screenings sc
+                   JOIN movies m ON sc.movie_id = m.movie_id
+                   JOIN cinemas c ON sc.cinema_id = c.cinema_id
+                   JOIN cinema_halls h ON sc.hall_id = h.hall_id
+                   WHERE sc.screening_id = %s""",
+                (screening_id,)
+            )
+            if with_booked:
+                booked_cursor.execute(
+                    """SELECT DISTINCT sb.seat_id
+                       FROM seat_bookings sb
+                       JOIN bookings b ON sb.booking_id = b.booking_id
+                       WHERE b.screening_id = %s AND b.booking_status != 'cancelled'""",
+                    (screening_id,)
+                )
+            # Fetching forces a single sync for all queued statements
+            info_row = info_cursor.fetchone()
+            booked_seat_ids = [row[0] for row in booked_cursor.fetchall()] if with_booked else None
+            return info_row, booked_seat_ids
+    except Exception as e:
+        print(f"Error getting screening booking data: {e}")
+        return None, None
+
+
+# Seat hold operations (see database/migrations/0003_seat_holds.sql)
+_last_hold_sweep = 0.0
+
+
+def hold_seats(screening_id, hold_key, seat_ids):
+    """
+    Set a session's seat holds for a screening
+    seat_ids: the session's whole selection; its holds on other seats of
+              the screening are released (an empty list releases them all)
+    Seats are held for HOLD_CONFIG['hold_minutes'], renewed on every call,
+    unless they are inactive, booked or held by another session. Expired
+    holds of other sessions are taken over in place. At most once every
+    sweep_interval seconds per worker, expired holds are also deleted.
+    Returns the IDs of the seats now held by hold_key, or None on error
+    """
+    global _last_hold_sweep
+    seat_ids = sorted(set(seat_ids))
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM seat_holds WHERE hold_key = %s AND screening_id = %s AND seat_id <> ALL(%s)",
+                (hold_key, screening_id, seat_ids)
+            )
+            rows = []
+            if seat_ids:
+                cursor.execute(
+                    """INSERT INTO seat_holds (screening_id, seat_id, hold_key, price, expires_at)
+                       SELECT sc.screening_id, st.seat_id, %s,
+                              sc.ticket_price * COALESCE(st.price_multiplier, 1.00),
+                              CURRENT_TIMESTAMP + make_interval(secs => %s)
+                       FROM screenings sc
+                       JOIN seats st ON st.hall_id = sc.hall_id AND st.seat_id = ANY(%s) AND st.is_active
+                       WHERE sc.screening_id = %s AND sc.is_active
+                         AND NOT EXISTS (SELECT 1 FROM seat_bookings sb
+                                         WHERE sb.screening_id = sc.screening_id
+                                           AND sb.seat_id = st.seat_id AND sb.is_active)
+                       ORDER BY st.seat_id
+                       ON CONFLICT (screening_id, seat_id) DO UPDATE
+                       SET hold_key = EXCLUDED.hold_key, price = EXCLUDED.price,
+                           expires_at = EXCLUDED.expires_at, created_at = CURRENT_TIMESTAMP
+                       WHERE seat_holds.hold_key = EXCLUDED.hold_key
+                          OR seat_holds.expires_at <= CURRENT_TIMESTAMP
+                       RETURNING seat_id""",
+                    (hold_key, HOLD_CONFIG['hold_minutes'] * 60, seat_ids, screening_id)
+                )
+                rows = cursor.fetchall()
+            conn.commit()
+
+            now = time.monotonic()
+            if now - _last_hold_sweep >= HOLD_CONFIG['sweep_interval']:
+                _last_hold_sweep = now
+                # Index range scan on idx_seat_holds_expires
+                cursor.execute("DELETE FROM seat_holds WHERE expires_at <= CURRENT_TIMESTAMP")
+
+            return [row[0] for row in rows]
+    except Exception as e:
+        print(f"Error holding seats: {e}")
+        return None
+
+
+def get_seat_holds(screening_id, hold_key=None):
+    """
+    Get the unexpired seat holds of a screening
+    Returns (seat IDs held by other sessions, seat IDs held by hold_key)
+    """
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """SELECT seat_id, hold_key = %s FROM seat_holds
+                   WHERE screening_id = %s AND expires_at > CURRENT_TIMESTAMP""",
+                (hold_key, screening_id)
+            )
+            rows = cursor.fetchall()
+            return {row[0] for row in rows if not row[1]}, [row[0] for row in rows if row[1]]
+    except Exception as e:
+        print(f"Error getting seat holds: {e}")
+        return set(), []
+
+
+# Booking request idempotency (see database/migrations/0004_booking_requests.sql)
+_last_request_sweep = 0.0
+
+
+def claim_booking_request(user_id, idempotency_key, screening_id, seat_ids, booking_number):
+    """
+    Claim an idempotency key for a booking request
+    The key is claimed (or an expired claim taken over) with the booking
+    number the request is about to use. If the key is already claimed, the
+    earlier request is returned; booked is only looked up while its outcome
+    is still unknown, through the booking number.
+    Returns (claimed, previous): (True, None) if the key was claimed,
+    (False, (screening_id, seat_ids, success, message, booking_number,
+    booked)) of the earlier request, or (False, None) if the database
+    failed (or the earlier request released the key meanwhile) and the
+    request must not go ahead now
+    """
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """INSERT INTO booking_requests (user_id, idempotency_key, screening_id, seat_ids,
+                                                 booking_number, expires_at)
+                   VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP + make_interval(secs => %s))
+                   ON CONFLICT (user_id, idempotency_key) DO UPDATE
+                   SET screening_id = EXCLUDED.screening_id, seat_ids = EXCLUDED.seat_ids,
+                       booking_number = EXCLUDED.booking_number, success = NULL, message = NULL,
+                       expires_at = EXCLUDED.expires_at, created_at = CURRENT_TIMESTAMP
+                   WHERE booking_requests.expires_at <= CURRENT_TIMESTAMP""",
+                (user_id, idempotency_key, screening_id, seat_ids, booking_number,
+                 IDEMPOTENCY_CONFIG['ttl_minutes'] * 60)
+            )
+            if cursor.rowcount:
+                conn.commit()
+                return True, None
+            cursor.execute(
+                """SELECT r.screening_id, r.seat_ids, r.success, r.message, r.booking_number,
+                          r.success IS NULL AND EXISTS (SELECT 1 FROM bookings b
+                                                        WHERE b.booking_number = r.booking_number)
+                   FROM booking_requests r
+                   WHERE r.user_id = %s AND r.idempotency_key = %s""",
+                (user_id, idempotency_key)
+            )
+            return False, cursor.fetchone()
+    except Exception as e:
+        print(f"Error claiming booking request: {e}")
+        return False, None
+
+
+def finish_booking_request(user_id, idempotency_key, success, message):
+    """
+    Record the outcome of a claimed booking request
+    success None releases the key instead (the request can be retried as
+    new). At most once every sweep_interval seconds per worker, expired
+    keys are also deleted.
+    """
+    global _last_request_sweep
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            if success is None:
+                cursor.execute(
+                    "DELETE FROM booking_requests WHERE user_id = %s AND idempotency_key = %s",
+                    (user_id, idempotency_key)
+                )
+            else:
+                cursor.execute(
+                    """UPDATE booking_requests SET success = %s, message = %s
+                       WHERE user_id = %s AND idempotency_key = %s""",
+                    (success, message, user_id, idempotency_key)
+                )
+            conn.commit()
+
+            now = time.monotonic()
+            if now - _last_request_sweep >= IDEMPOTENCY_CONFIG['sweep_interval']:
+                _last_request_sweep = now
+                # Index range scan on idx_booking_requests_expires
+                cursor.execute("DELETE FROM booking_requests WHERE expires_at <= CURRENT_TIMESTAMP")
+    except Exception as e:
+        print(f"Error finishing booking request: {e}")
+
+
 # Booking-related database operations
 def get_bookings_by_user(user_id):
     """Get all bookings for a user"""
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT booking_id, user_id, screening_id, booking_number,
-                      num_tickets, total_amount, booking_status, payment_status,
-                      booking_date, created_at, updated_at
-               FROM bookings WHERE user_id = %s 
-               ORDER BY booking_date DESC""",
-            (user_id,)
-        )
-        bookings = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return bookings
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """SELECT booking_id, user_id, screening_id, booking_number,
+                          num_tickets, total_amount, booking_status, payment_status,
+                          booking_date, created_at, updated_at
+                   FROM bookings WHERE user_id = %s
+                   ORDER BY booking_date DESC""",
+                (user_id,)
+            )
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error getting bookings for user: {e}")
-        if conn:
-            conn.close()
         return []
 
 
 def get_booking_by_id(booking_id):
     """Get booking by ID"""
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT booking_id, user_id, screening_id, booking_number,
-                      num_tickets, total_amount, booking_status, payment_status,
-                      booking_date, created_at, updated_at
-               FROM bookings WHERE booking_id = %s""",
-            (booking_id,)
-        )
-        booking = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return booking
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """SELECT booking_id, user_id, screening_id, booking_number,
+                          num_tickets, total_amount, booking_status, payment_status,
+                          booking_date, created_at, updated_at
+                   FROM bookings WHERE booking_id = %s""",
+                (booking_id,)
+            )
+            return cursor.fetchone()
     except Exception as e:
         print(f"Error getting booking: {e}")
-        if conn:
-            conn.close()
         return None
 
 
 def get_seats_by_booking(booking_id):
     """Get all seats for a booking with enhanced info"""
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT seats.seat_id, seats.row_number, seats.seat_number, seats.seat_type
-               FROM seat_bookings
-               JOIN seats ON seat_bookings.seat_id = seats.seat_id
-               WHERE seat_bookings.booking_id = %s
-               ORDER BY seats.row_number, seats.seat_number""",
-            (booking_id,)
-        )
-        seats = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return seats
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """SELECT seats.seat_id, seats.row_number, seats.seat_number, seats.seat_type
+                   FROM seat_bookings
+                   JOIN seats ON seat_bookings.seat_id = seats.seat_id
+                   WHERE seat_bookings.booking_id = %s
+                   ORDER BY seats.row_number, seats.seat_number""",
+                (booking_id,)
+            )
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error getting seats for booking: {e}")
-        if conn:
-            conn.close()
         return []
 
 
-def get_bookings_with_details(user_id):
-    """Get all bookings for a user with screening and seat details"""
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT b.booking_id, b.user_id, b.screening_id, b.booking_number,
-                      b.num_tickets, b.total_amount, b.booking_status, b.payment_status,
-                      b.booking_date, b.created_at, b.updated_at,
-                      s.screening_date, s.start_time, s.end_time,
-                      m.movie_id, m.title as movie_title,
-                      c.cinema_name, c.address, c.suburb
-               FROM bookings b
-               JOIN screenings s ON b.screening_id = s.screening_id
-               JOIN movies m ON s.movie_id = m.movie_id
-               JOIN cinemas c ON s.cinema_id = c.cinema_id
-               WHERE b.user_id = %s
-               ORDER BY b.booking_date DESC""",
-            (user_id,)
-        )
-        bookings = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return bookings
+def get_bookings_with_details(user_id, limit=None):
+    """
+    Get bookings for a user with screening and seat details (newest first,
+    optionally only the latest `limit` bookings)
+    Seats are aggregated per booking into four parallel arrays (seat_ids,
+    seat_rows, seat_numbers, seat_types) ordered by row and seat number,
+    so the whole history is loaded in a single query.
+    """
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """SELECT b.booking_id, b.user_id, b.screening_id, b.booking_number,
+                          b.num_tickets, b.total_amount, b.booking_status, b.payment_status,
+                          b.booking_date, b.created_at, b.updated_at,
+                          s.screening_date, s.start_time, s.end_time,
+                          m.movie_id, m.title as movie_title,
+                          c.cinema_name, c.address, c.suburb,
+                          bs.seat_ids, bs.seat_rows, bs.seat_numbers, bs.seat_types
+                   FROM bookings b
+                   JOIN screenings s ON b.screening_id = s.screening_id
+                   JOIN movies m ON s.movie_id = m.movie_id
+                   JOIN cinemas c ON s.cinema_id = c.cinema_id
+                   LEFT JOIN LATERAL (
+                       SELECT array_agg(st.seat_id ORDER BY st.row_number, st.seat_number) AS seat_ids,
+                              array_agg(st.row_number ORDER BY st.row_number, st.seat_number) AS seat_rows,
+                              array_agg(st.seat_number ORDER BY st.row_number, st.seat_number) AS seat_numbers,
+                              array_agg(st.seat_type ORDER BY st.row_number, st.seat_number) AS seat_types
+                       FROM seat_bookings sb
+                       JOIN seats st ON sb.seat_id = st.seat_id
+                       WHERE sb.booking_id = b.booking_id
+                   ) bs ON TRUE
+                   WHERE b.user_id = %s
+                   ORDER BY b.booking_date DESC
+                   LIMIT %s""",
+                (user_id, limit)
+            )
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error getting bookings with details: {e}")
-        if conn:
-            conn.close()
         return []
 
 
+def get_booking_stats_by_user(user_id, upcoming_after):
+    """
+    Get booking counters for a user in one aggregate query
+    upcoming_after: bookings whose screening starts at or after this
+                    datetime (and are not cancelled) count as upcoming
+    Returns (total_bookings, upcoming, cancelled, movies_watched)
+    """
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """SELECT COUNT(*),
+                          COUNT(*) FILTER (WHERE b.booking_status != 'cancelled'
+                                             AND s.screening_date + s.start_time >= %s),
+                          COUNT(*) FILTER (WHERE b.booking_status = 'cancelled'),
+                          COUNT(DISTINCT s.movie_id) FILTER (WHERE b.booking_status = 'confirmed')
+                   FROM bookings b
+                   JOIN screenings s ON b.screening_id = s.screening_id
+                   WHERE b.user_id = %s""",
+                (upcoming_after, user_id)
+            )
+            return cursor.fetchone()
+    except Exception as e:
+        print(f"Error getting booking stats: {e}")
+        return None
+
+
+def check_cancellation_window(booking_status, screening_date, start_time):
+    """
+    Check if a booking in the given state can be cancelled
+    (at least 2 hours before screening)
+    Returns (can_cancel, message)
+    """
+    from datetime import datetime, timedelta
+
+    # Check if already cancelled
+    if booking_status == 'cancelled':
+        return False, "Booking already cancelled"
+
+    # Check if can be cancelled (2 hours before screening)
+    screening_datetime = datetime.combine(screening_date, start_time)
+    current_datetime = datetime.now()
+    time_diff = screening_datetime - current_datetime
+
+    # Must be at least 2 hours before screening
+    if time_diff < timedelta(hours=2):
+        return False, f"Cannot cancel within 2 hours of screening. Screening starts in {time_diff.total_seconds() / 60:.0f} minutes."
+
+    return True, "Booking can be cancelled"
+
+
 def can_cancel_booking(booking_id):
     """Check if a booking can be cancelled (at least 2 hours before screening)"""
-    from datetime import datetime, timedelta
-    
-    conn = get_db_connection()
-    if not conn:
-        return False, "Database connection failed"
-    
-    try:
-        cursor = conn.cursor()
-        # Get screening date and time for this booking
-        cursor.execute("""
-            SELECT b.booking_status, s.screening_date, s.start_time
-            FROM bookings b
-            JOIN screenings s ON b.screening_id = s.screening_id
-            WHERE b.booking_id = %s
-        """, (booking_id,))
-        
-        result = cursor.fetchone()
-        if not result:
-            cursor.close()
-            conn.close()
-            return False, "Booking not found"
-        
-        booking_status, screening_date, start_time = result
-        
-        # Check if already cancelled
-        if booking_status == 'cancelled':
-            cursor.close()
-            conn.close()
-            return False, "Booking already cancelled"
-        
-        # Check if can be cancelled (2 hours before screening)
-        screening_datetime = datetime.combine(screening_date, start_time)
-        current_datetime = datetime.now()
-        time_diff = screening_datetime - current_datetime
-        
-        # Must be at least 2 hours before screening
-        if time_diff < timedelta(hours=2):
-            cursor.close()
-            conn.close()
-            return False, f"Cannot cancel within 2 hours of screening. Screening starts in {time_diff.total_seconds() / 60:.0f} minutes."
-        
-        cursor.close()
-        conn.close()
-        return True, "Booking can be cancelled"
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            # Get screening date and time for this booking
+            cursor.execute("""
+                SELECT b.booking_status, s.screening_date, s.start_time
+                FROM bookings b
+                JOIN screenings s ON b.screening_id = s.screening_id
+                WHERE b.booking_id = %s
+            """, (booking_id,))
+
+            result = cursor.fetchone()
     except Exception as e:
         print(f"Error checking cancellation eligibility: {e}")
-        if conn:
-            conn.close()
         return False, f"Error: {str(e)}"
 
+    if not result:
+        return False, "Booking not found"
+
+    return check_cancellation_window(*result)
+
+
+def seat_label(row_number, seat_number):
+    """Format a seat for messages"""
+    return f"Row {row_number}, Seat {seat_number}"
+
+
+def book_seats(user_id, screening_id, seat_ids, booking_number, hold_key=None):
+    """
+    Book seats for a screening in one transaction, with a fixed number of
+    statements however many seats are booked
+    - with hold_key, the session's unexpired holds on the screening are
+      deleted and their prices used; if they cover every seat, the seats
+      are not checked again
+    - otherwise one query checks the screening and seats (active, not held
+      by another session) and prices every seat
+    - the booking row is inserted
+    - one INSERT ... ON CONFLICT DO NOTHING claims all seats against the
+      uq_seat_bookings_active_seat index; a seat held by another active
+      booking is not inserted. Seats are claimed in seat_id order so two
+      overlapping bookings can't deadlock
+    If any seat can't be had, the transaction is rolled back (restoring
+    the holds).
+    Returns (booking_id, total_amount, errors, taken_seat_ids); on failure
+    booking_id is None and errors lists why, e.g. "Row 5, Seat 7 is already
+    taken" (errors is None if the database failed), and taken_seat_ids
+    lists the seats that were held by other bookings
+    """
+    seat_ids = sorted(set(seat_ids))
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            # seat_id -> (label, price)
+            seats = {}
+            if hold_key:
+                cursor.execute(
+                    """DELETE FROM seat_holds h
+                       USING seats st
+                       WHERE h.hold_key = %s AND h.screening_id = %s
+                         AND h.expires_at > CURRENT_TIMESTAMP AND st.seat_id = h.seat_id
+                       RETURNING h.seat_id, st.row_number, st.seat_number, h.price""",
+                    (hold_key, screening_id)
+                )
+                seats = {row[0]: (seat_label(row[1], row[2]), row[3]) for row in cursor.fetchall()}
+
+            if not all(seat_id in seats for seat_id in seat_ids):
+                cursor.execute(
+                    """SELECT sc.is_active, st.seat_id, st.row_number, st.seat_number, st.is_active,
+                              sc.ticket_price * COALESCE(st.price_multiplier, 1.00),
+                              EXISTS (SELECT 1 FROM seat_holds h
+                                      WHERE h.screening_id = sc.screening_id AND h.seat_id = st.seat_id
+                                        AND h.expires_at > CURRENT_TIMESTAMP)
+                       FROM screenings sc
+                       LEFT JOIN seats st ON st.hall_id = sc.hall_id AND st.seat_id = ANY(%s)
+                       WHERE sc.screening_id = %s""",
+                    (seat_ids, screening_id)
+                )
+                rows = cursor.fetchall()
+                if not rows or not rows[0][0]:
+                    conn.rollback()
+                    return None, None, ['Screening not found' if not rows else
+                                        'This screening is no longer available for booking'], []
+
+                found = {row[1]: row for row in rows if row[1] is not None}
+                errors = [f"Seat {seat_id} is not in this screening's hall"
+                          for seat_id in seat_ids if seat_id not in found]
+                errors += [f"{seat_label(row[2], row[3])} is not available"
+                           for row in found.values() if not row[4]]
+                # The session's own holds were deleted above
+                errors += [f"{seat_label(row[2], row[3])} is being held by another customer"
+                           for row in found.values() if row[4] and row[6]]
+                if errors:
+                    conn.rollback()
+                    return None, None, errors, []
+                seats = {seat_id: (seat_label(row[2], row[3]), row[5]) for seat_id, row in found.items()}
+            total_amount = sum(seats[seat_id][1] for seat_id in seat_ids)
+
+            cursor.execute(
+                """INSERT INTO bookings (user_id, screening_id, booking_number, num_tickets,
+                                         total_amount, booking_status, payment_status)
+                   VALUES (%s, %s, %s, %s, %s, 'confirmed', 'paid')
+                   RETURNING booking_id""",
+                (user_id, screening_id, booking_number, len(seat_ids), total_amount)
+            )
+            booking_id = cursor.fetchone()[0]
+
+            # screening_id/is_active are filled in by the seat_booking_screening trigger
+            cursor.execute(
+                """INSERT INTO seat_bookings (booking_id, seat_id)
+                   SELECT %s, seat_id FROM unnest(%s::integer[]) AS seat_id ORDER BY seat_id
+                   ON CONFLICT (screening_id, seat_id) WHERE is_active DO NOTHING
+                   RETURNING seat_id""",
+                (booking_id, seat_ids)
+            )
+            claimed = {row[0] for row in cursor.fetchall()}
+            if len(claimed) != len(seat_ids):
+                conn.rollback()
+                taken = [seat_id for seat_id in seat_ids if seat_id not in claimed]
+                errors = [f"{seats[seat_id][0]} is already taken" for seat_id in taken]
+                return None, None, errors, taken
+
+            notify_cache_invalidation(cursor, 'screening', screening_id, booked=seat_ids)
+            conn.commit()
+            return booking_id, float(total_amount), [], []
+    except Exception as e:
+        print(f"Error booking seats: {e}")
+        return None, None, None, []
+
+
+def book_seats_batch(screening_id, requests):
+    """
+    Book several customers' seats for one screening in one transaction
+    (group commit for the booking queue, see backend/booking_queue.py)
+    requests: (user_id, seat_ids, booking_number, hold_key) tuples in
+              arrival order
+    One query reads every requested seat's price, whether it is booked and
+    which session holds it (and at what price). Seats are then allocated in
+    memory in arrival order, so a request overlapping an earlier one in the
+    batch fails without touching the database. Like book_seats, a request
+    whose session holds every one of its seats pays the held prices. The
+    accepted bookings and their seats are inserted with one statement each
+    under a savepoint; if a booking made outside the batch took some of
+    their seats, the inserts are rolled back to the savepoint and redone
+    without the bookings that lost a seat, so seats that never changed
+    hands are not logged as booked and released. Everything else is
+    committed at once.
+    Returns one (booking_id, total_amount, errors, taken_seat_ids) per
+    request, like book_seats
+    """
+    requests = [(user_id, sorted(set(seat_ids)), booking_number, hold_key)
+                for user_id, seat_ids, booking_number, hold_key in requests]
+    all_seat_ids = sorted({seat_id for request in requests for seat_id in request[1]})
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """SELECT sc.is_active, st.seat_id, st.row_number, st.seat_number, st.is_active,
+                          sc.ticket_price * COALESCE(st.price_multiplier, 1.00),
+                          EXISTS (SELECT 1 FROM seat_bookings sb
+                                  WHERE sb.screening_id = sc.screening_id AND sb.seat_id = st.seat_id
+                                    AND sb.is_active),
+                          h.hold_key, h.price
+                   FROM screenings sc
+                   LEFT JOIN seats st ON st.hall_id = sc.hall_id AND st.seat_id = ANY(%s)
+                   LEFT JOIN seat_holds h ON h.screening_id = sc.screening_id AND h.seat_id = st.seat_id
+                                         AND h.expires_at > CURRENT_TIMESTAMP
+                   WHERE sc.screening_id = %s""",
+                (all_seat_ids, screening_id)
+            )
+            rows = cursor.fetchall()
+            if not rows or not rows[0][0]:
+                error = 'Screening not found' if not rows else 'This screening is no longer available for booking'
+                return [(None, None, [error], []) for _ in requests]
+            seats = {row[1]: row for row in rows if row[1] is not None}
+
+            # Allocate in arrival order against the seats read above
+            results = [None] * len(requests)
+            allocated = set()
+            accepted = []
+            # Requests that lost seats to an earlier request in the batch
+            overlapped = {}
+            for i, (user_id, seat_ids, booking_number, hold_key) in enumerate(requests):
+                errors, taken = [], []
+                for seat_id in seat_ids:
+                    row = seats.get(seat_id)
+                    if row is None:
+                        errors.append(f"Seat {seat_id} is not in this screening's hall")
+                    elif not row[4]:
+                        errors.append(f"{seat_label(row[2], row[3])} is not available")
+                    elif row[6] or seat_id in allocated:
+                        errors.append(f"{seat_label(row[2], row[3])} is already taken")
+                        if row[6]:
+                            taken.append(seat_id)
+                        else:
+                            overlapped.setdefault(i, []).append(seat_id)
+                    elif row[7] is not None and row[7] != hold_key:
+                        errors.append(f"{seat_label(row[2], row[3])} is being held by another customer")
+                if errors:
+                    results[i] = (None, None, errors, taken)
+                else:
+                    allocated.update(seat_ids)
+                    accepted.append(i)
+
+            totals = {}
+            for i in accepted:
+                user_id, seat_ids, booking_number, hold_key = requests[i]
+                # Held prices apply if the session holds all the seats (see book_seats)
+                held = hold_key is not None and all(seats[seat_id][7] == hold_key for seat_id in seat_ids)
+                totals[i] = sum(seats[seat_id][8 if held else 5] for seat_id in seat_ids)
+
+            booking_ids = {}
+            while accepted:
+                cursor.execute("SAVEPOINT book_batch")
+                cursor.execute(
+                    """INSERT INTO bookings (user_id, screening_id, booking_number, num_tickets,
+                                             total_amount, booking_status, payment_status)
+                       SELECT user_id, %s, booking_number, num_tickets, total_amount, 'confirmed', 'paid'
+                       FROM unnest(%s::integer[], %s::varchar[], %s::integer[], %s::numeric[])
+                            AS r(user_id, booking_number, num_tickets, total_amount)
+                       RETURNING booking_number, booking_id""",
+                    (screening_id, [requests[i][0] for i in accepted], [requests[i][2] for i in accepted],
+                     [len(requests[i][1]) for i in accepted], [totals[i] for i in accepted])
+                )
+                booking_ids = dict(cursor.fetchall())
+
+                # screening_id/is_active are filled in by the seat_booking_screening trigger
+                pairs = sorted((seat_id, booking_ids[requests[i][2]]) for i in accepted for seat_id in requests[i][1])
+                cursor.execute(
+                    """INSERT INTO seat_bookings (booking_id, seat_id)
+                       SELECT booking_id, seat_id
+                       FROM unnest(%s::integer[], %s::integer[]) AS r(booking_id, seat_id)
+                       ORDER BY seat_id
+                       ON CONFLICT (screening_id, seat_id) WHERE is_active DO NOTHING
+                       RETURNING booking_id, seat_id""",
+                    ([pair[1] for pair in pairs], [pair[0] for pair in pairs])
+                )
+                inserted = set(cursor.fetchall())
+
+                lost = []
+                for i in accepted:
+                    user_id, seat_ids, booking_number, hold_key = requests[i]
+                    taken = [seat_id for seat_id in seat_ids
+                             if (booking_ids[booking_number], seat_id) not in inserted]
+                    if taken:
+                        lost.append(i)
+                        results[i] = (None, None, [f"{seat_label(seats[seat_id][2], seats[seat_id][3])} is already taken"
+                                                   for seat_id in taken], taken)
+                if not lost:
+                    cursor.execute("RELEASE SAVEPOINT book_batch")
+                    break
+                # Undo the inserts (and the counter/version updates of their
+                # triggers) and try again with the bookings that got every seat
+                cursor.execute("ROLLBACK TO SAVEPOINT book_batch")
+                accepted = [i for i in accepted if i not in lost]
+
+            if accepted:
+                booked, hold_keys = [], []
+                for i in accepted:
+                    user_id, seat_ids, booking_number, hold_key = requests[i]
+                    booked.extend(seat_ids)
+                    if hold_key:
+                        hold_keys.append(hold_key)
+                    results[i] = (booking_ids[booking_number], float(totals[i]), [], [])
+
+                if hold_keys:
+                    cursor.execute("DELETE FROM seat_holds WHERE screening_id = %s AND hold_key = ANY(%s)",
+                                   (screening_id, hold_keys))
+                notify_cache_invalidation(cursor, 'screening', screening_id, booked=booked)
+
+                # Seats lost within the batch count as taken once their booking is in
+                booked_set = set(booked)
+                for i, seat_ids in overlapped.items():
+                    results[i][3].extend(seat_id for seat_id in seat_ids if seat_id in booked_set)
+            conn.commit()
+            return results
+    except Exception as e:
+        print(f"Error booking seats (batch of {len(requests)}): {e}")
+        return [(None, None, None, []) for _ in requests]
+
 
 def cancel_booking(booking_id):
-    """Cancel a booking"""
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
-    try:
-        cursor = conn.cursor()
-        # Update booking status to cancelled
-        cursor.execute("""
-            UPDATE bookings 
-            SET booking_status = 'cancelled', updated_at = CURRENT_TIMESTAMP
-            WHERE booking_id = %s AND booking_status != 'cancelled'
-        """, (booking_id,))
-        
-        success = cursor.rowcount > 0
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return success
+    """
+    Cancel a booking
+    Returns (screening_id, seat_ids) of the released seats, or None if the
+    booking was not found or already cancelled
+    """
+    try:
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            # Update booking status to cancelled
+            cursor.execute("""
+                UPDATE bookings
+                SET booking_status = 'cancelled', updated_at = CURRENT_TIMESTAMP
+                WHERE booking_id = %s AND booking_status != 'cancelled'
+                RETURNING screening_id
+            """, (booking_id,))
+
+            result = cursor.fetchone()
+            if not result:
+                return None
+
+            cursor.execute("SELECT seat_id FROM seat_bookings WHERE booking_id = %s", (booking_id,))
+            seat_ids = [row[0] for row in cursor.fetchall()]
+            notify_cache_invalidation(cursor, 'screening', result[0], released=seat_ids)
+            conn.commit()
+            return result[0], seat_ids
     except Exception as e:
         print(f"Error cancelling booking: {e}")
-        if conn:
-            conn.rollback()
-            conn.close()
-        return False
+        return None
 
 
 def get_booking_user_id(booking_id):
     """Get the user_id of a booking"""
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT user_id FROM bookings WHERE booking_id = %s", (booking_id,))
-        result = cursor.fetchone()
-        user_id = result[0] if result else None
-        cursor.close()
-        conn.close()
-        return user_id
+        with get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT user_id FROM bookings WHERE booking_id = %s", (booking_id,))
+            result = cursor.fetchone()
+            return result[0] if result else None
     except Exception as e:
         print(f"Error getting booking user_id: {e}")
-        if conn:
-            conn.close()
         return None
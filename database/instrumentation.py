@@ -0,0 +1,184 @@
+"""
+Per-request database instrumentation
+Author: Zhou Li
+Date: 2026-10-17
+
+Every pooled connection uses InstrumentedCursor, so every cursor.execute in
+database/db.py, backend/services.py and the routes is timed and attributed
+to the request that is currently running (see routes/metrics.py).
+Statements run outside a request (scripts, background threads) are not
+recorded.
+"""
+
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+import psycopg
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+# QueryStats of the request running in this context, or None
+_current_stats = ContextVar('db_query_stats', default=None)
+
+
+def fingerprint(query):
+    """
+    Normalize a statement so repeats of it group together
+    (placeholders are already %s; inline literals become ?)
+    """
+    if not isinstance(query, str):
+        query = query.as_string(None) if hasattr(query, 'as_string') else str(query)
+    query = _STRING_LITERAL.sub('?', query)
+    query = _NUMBER_LITERAL.sub('?', query)
+    return _WHITESPACE.sub(' ', query).strip()
+
+
+class QueryStats:
+    """Database work done while handling one request"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.connections = 0
+        # fingerprint -> [count, seconds]
+        self.statements = {}
+
+    def record_query(self, query, seconds):
+        self.query_count += 1
+        self.db_time += seconds
+        totals = self.statements.setdefault(fingerprint(query), [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+
+    def record_connection(self):
+        self.connections += 1
+
+    def repeated(self, threshold):
+        """Get (fingerprint, count) of statements run more than threshold times"""
+        return sorted(((statement, totals[0]) for statement, totals in self.statements.items()
+                       if totals[0] > threshold), key=lambda item: -item[1])
+
+
+def start_request():
+    """Start recording for the current request; returns a token for finish_request()"""
+    return _current_stats.set(QueryStats())
+
+
+def finish_request(token):
+    """Stop recording and return the request's QueryStats"""
+    stats = _current_stats.get()
+    _current_stats.reset(token)
+    return stats
+
+
+def current_stats():
+    """Get the QueryStats being recorded, or None outside a request"""
+    return _current_stats.get()
+
+
+def record_connection():
+    """Count a pool checkout against the current request"""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record_connection()
+
+
+class InstrumentedCursor(psycopg.Cursor):
+    """
+    Cursor that times execute()/executemany() for the current request
+    In pipeline mode execute() only queues the statement, so the time spent
+    waiting for results is not included.
+    """
+
+    def execute(self, query, params=None, **kwargs):
+        stats = _current_stats.get()
+        # The pool's connection check runs an empty statement on checkout
+        if stats is None or not query:
+            return super().execute(query, params, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            stats.record_query(query, time.perf_counter() - start)
+
+    def executemany(self, query, params_seq, **kwargs):
+        stats = _current_stats.get()
+        if stats is None:
+            return super().executemany(query, params_seq, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, params_seq, **kwargs)
+        finally:
+            stats.record_query(query, time.perf_counter() - start)
+
+
+class QueryMetrics:
+    """
+    Aggregated QueryStats of every finished request
+    Per endpoint: request count, queries, DB time, connections and how many
+    requests tripped the repeated-statement warning. Per statement
+    fingerprint (at most max_statements of them): executions and DB time.
+    """
+
+    def __init__(self, max_statements=500):
+        self.max_statements = max_statements
+        self._endpoints = {}
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, stats, repeated=False):
+        with self._lock:
+            totals = self._endpoints.setdefault(endpoint, {
+                'requests': 0, 'queries': 0, 'db_time_ms': 0.0, 'connections': 0,
+                'max_queries': 0, 'repeated_statement_warnings': 0
+            })
+            totals['requests'] += 1
+            totals['queries'] += stats.query_count
+            totals['db_time_ms'] += stats.db_time * 1000
+            totals['connections'] += stats.connections
+            totals['max_queries'] = max(totals['max_queries'], stats.query_count)
+            if repeated:
+                totals['repeated_statement_warnings'] += 1
+
+            for statement, (count, seconds) in stats.statements.items():
+                statement_totals = self._statements.get(statement)
+                if statement_totals is None:
+                    if len(self._statements) >= self.max_statements:
+                        continue
+                    statement_totals = self._statements[statement] = [0, 0.0]
+                statement_totals[0] += count
+                statement_totals[1] += seconds
+
+    def snapshot(self, top=20):
+        """Get per-endpoint totals and the top statements by DB time"""
+        with self._lock:
+            endpoints = {}
+            for endpoint, totals in self._endpoints.items():
+                requests = totals['requests']
+                endpoints[endpoint] = dict(
+                    totals,
+                    db_time_ms=round(totals['db_time_ms'], 2),
+                    avg_queries=round(totals['queries'] / requests, 2),
+                    avg_db_time_ms=round(totals['db_time_ms'] / requests, 2),
+                    avg_connections=round(totals['connections'] / requests, 2)
+                )
+            statements = sorted(self._statements.items(), key=lambda item: -item[1][1])[:top]
+            return {
+                'endpoints': endpoints,
+                'statements': [{'statement': statement, 'calls': count,
+                                'db_time_ms': round(seconds * 1000, 2)}
+                               for statement, (count, seconds) in statements]
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._statements.clear()
+
+
+# Process-wide aggregate exposed at /metrics
+query_metrics = QueryMetrics()
@@ -0,0 +1,284 @@
+"""
+Versioned schema migrations
+Author: Zhou Li
+Date: 2026-10-17
+
+Migrations are SQL files in database/migrations named NNNN_description.sql.
+They are applied in version order, each in its own transaction, and
+recorded in the schema_migrations table. Run from the project root:
+
+    python -m database.migrate            # apply pending migrations
+    python -m database.migrate status     # list applied/pending migrations
+    python -m database.migrate verify     # EXPLAIN the DAO queries, flag seq scans
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import psycopg
+
+from database import db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent runners apply each migration once
+MIGRATION_LOCK_ID = 720031
+
+
+def get_migrations():
+    """
+    Get migration files in version order
+    Returns list of (version, name, path, checksum)
+    """
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        path = os.path.join(MIGRATIONS_DIR, filename)
+        with open(path, 'rb') as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        migrations.append((int(match.group(1)), match.group(2), path, checksum))
+    versions = [migration[0] for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Duplicate migration version in database/migrations")
+    return sorted(migrations)
+
+
+def ensure_migrations_table(cursor):
+    """Create the applied-migrations table if needed"""
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS schema_migrations (
+               version INTEGER PRIMARY KEY,
+               name VARCHAR(200) NOT NULL,
+               checksum CHAR(64) NOT NULL,
+               applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+           )"""
+    )
+
+
+def get_applied_migrations(cursor):
+    """Get {version: (name, checksum, applied_at)} of applied migrations"""
+    ensure_migrations_table(cursor)
+    cursor.execute("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+
+def migration_status():
+    """
+    Get the state of every migration
+    Returns list of (version, name, state, applied_at); state is 'applied',
+    'pending' or 'changed' (the file was edited after it was applied)
+    """
+    with db.get_db_connection() as conn, conn.cursor() as cursor:
+        applied = get_applied_migrations(cursor)
+
+    status = []
+    for version, name, path, checksum in get_migrations():
+        if version not in applied:
+            status.append((version, name, 'pending', None))
+        else:
+            state = 'applied' if applied[version][1] == checksum else 'changed'
+            status.append((version, name, state, applied[version][2]))
+    return status
+
+
+def apply_migrations(target=None):
+    """
+    Apply pending migrations up to and including version `target`
+    (all of them if None)
+    Returns list of applied versions; stops at the first failure
+    """
+    applied_versions = []
+    for version, name, path, checksum in get_migrations():
+        if target is not None and version > target:
+            break
+        with open(path) as f:
+            sql = f.read()
+        try:
+            with db.get_db_connection() as conn, conn.cursor() as cursor:
+                ensure_migrations_table(cursor)
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+                cursor.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+                if cursor.fetchone():
+                    continue
+                print(f"Applying {version:04d}_{name}...")
+                # No parameters, so the file may contain several statements
+                cursor.execute(sql)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                    (version, name, checksum)
+                )
+                conn.commit()
+            applied_versions.append(version)
+        except Exception as e:
+            print(f"Error applying migration {version:04d}_{name}: {e}")
+            break
+    return applied_versions
+
+
+class ExplainCursor(psycopg.Cursor):
+    """Cursor that records the plan of every SELECT before running it"""
+
+    plans = []
+
+    def execute(self, query, params=None, **kwargs):
+        if isinstance(query, str) and query.lstrip().upper().startswith('SELECT'):
+            super().execute("EXPLAIN (FORMAT JSON) " + query, params, **kwargs)
+            self.plans.append((query, self.fetchone()[0][0]['Plan']))
+        return super().execute(query, params, **kwargs)
+
+
+@contextmanager
+def explain_connection():
+    """Stand-in for db.get_db_connection that uses ExplainCursor and never commits"""
+    with psycopg.connect(**db.DB_CONFIG, cursor_factory=ExplainCursor) as conn:
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+
+
+def find_seq_scans(plan, table_rows, min_rows):
+    """Get (table, estimated table rows) of seq scans on tables with at least min_rows rows"""
+    scans = []
+    if plan.get('Node Type') == 'Seq Scan':
+        table = plan.get('Relation Name')
+        if table_rows.get(table, 0) >= min_rows:
+            scans.append((table, table_rows[table]))
+    for child in plan.get('Plans', []):
+        scans.extend(find_seq_scans(child, table_rows, min_rows))
+    return scans
+
+
+def get_sample_keys(cursor):
+    """Pick representative keys for the verification queries (the busiest ones)"""
+    cursor.execute(
+        """SELECT s.screening_id, s.movie_id, s.cinema_id, s.hall_id
+           FROM screenings s JOIN bookings b ON b.screening_id = s.screening_id
+           GROUP BY s.screening_id ORDER BY COUNT(*) DESC LIMIT 1"""
+    )
+    screening = cursor.fetchone()
+    if not screening:
+        cursor.execute("SELECT screening_id, movie_id, cinema_id, hall_id FROM screenings LIMIT 1")
+        screening = cursor.fetchone() or (0, 0, 0, 0)
+    cursor.execute(
+        """SELECT u.user_id, u.username, u.email, MAX(b.booking_id)
+           FROM users u LEFT JOIN bookings b ON b.user_id = u.user_id
+           GROUP BY u.user_id ORDER BY COUNT(b.booking_id) DESC LIMIT 1"""
+    )
+    user = cursor.fetchone() or (0, '', '', 0)
+    cursor.execute("SELECT MIN(seat_id) FROM seats WHERE hall_id = %s", (screening[3],))
+    seat_id = cursor.fetchone()[0] or 0
+    return {
+        'screening_id': screening[0], 'movie_id': screening[1], 'cinema_id': screening[2],
+        'hall_id': screening[3], 'seat_id': seat_id, 'user_id': user[0], 'username': user[1],
+        'email': user[2], 'booking_id': user[3] or 0
+    }
+
+
+def get_verify_calls(keys):
+    """Get (label, DAO function, args) for every keyed DAO lookup"""
+    return [
+        ('get_user_by_username', db.get_user_by_username, (keys['username'],)),
+        ('check_username_or_email_exists', db.check_username_or_email_exists, (keys['username'], keys['email'])),
+        ('get_cinema_by_id', db.get_cinema_by_id, (keys['cinema_id'],)),
+        ('get_movie_by_id', db.get_movie_by_id, (keys['movie_id'],)),
+        ('get_cinema_halls_by_cinema', db.get_cinema_halls_by_cinema, (keys['cinema_id'],)),
+        ('get_cinema_hall_by_id', db.get_cinema_hall_by_id, (keys['hall_id'],)),
+        ('get_seats_by_hall', db.get_seats_by_hall, (keys['hall_id'],)),
+        ('get_seat_by_id', db.get_seat_by_id, (keys['seat_id'],)),
+        ('get_screenings_by_movie', db.get_screenings_by_movie, (keys['movie_id'],)),
+        ('get_screenings_by_cinema', db.get_screenings_by_cinema, (keys['cinema_id'],)),
+        ('get_screening_listing (movie)', db.get_screening_listing,
+         (keys['movie_id'], None, None, date.today())),
+        ('get_screening_listing (cinema)', db.get_screening_listing,
+         (None, keys['cinema_id'], None, date.today())),
+        ('get_screening_by_id', db.get_screening_by_id, (keys['screening_id'],)),
+        ('get_screening_booking_data', db.get_screening_booking_data, (keys['screening_id'],)),
+        ('get_seat_holds', db.get_seat_holds, (keys['screening_id'], 'verify')),
+        ('claim_booking_request', db.claim_booking_request,
+         (keys['user_id'], 'verify', keys['screening_id'], [keys['seat_id']], 'verify')),
+        ('get_seat_changes', db.get_seat_changes, (keys['screening_id'], 0)),
+        ('get_seat_snapshot', db.get_seat_snapshot, (keys['screening_id'],)),
+        ('get_bookings_by_user', db.get_bookings_by_user, (keys['user_id'],)),
+        ('get_booking_by_id', db.get_booking_by_id, (keys['booking_id'],)),
+        ('get_seats_by_booking', db.get_seats_by_booking, (keys['booking_id'],)),
+        ('get_bookings_with_details', db.get_bookings_with_details, (keys['user_id'], 5)),
+        ('get_booking_stats_by_user', db.get_booking_stats_by_user, (keys['user_id'], datetime.now())),
+        ('can_cancel_booking', db.can_cancel_booking, (keys['booking_id'],)),
+        ('get_booking_user_id', db.get_booking_user_id, (keys['booking_id'],))
+    ]
+
+
+def verify_query_plans(min_rows=10000):
+    """
+    EXPLAIN every keyed DAO query against the current data
+    Tables with at least min_rows (estimated) rows count as large
+    Returns list of (label, [(table, rows), ...]) for queries that seq scan a large table
+    """
+    with db.get_db_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("ANALYZE")
+        cursor.execute(
+            """SELECT relname, reltuples::bigint FROM pg_class
+               WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"""
+        )
+        table_rows = dict(cursor.fetchall())
+        keys = get_sample_keys(cursor)
+
+    problems = []
+    get_db_connection = db.get_db_connection
+    db.get_db_connection = explain_connection
+    try:
+        for label, function, args in get_verify_calls(keys):
+            ExplainCursor.plans = []
+            function(*args)
+            scans = []
+            for query, plan in ExplainCursor.plans:
+                scans.extend(find_seq_scans(plan, table_rows, min_rows))
+            if not ExplainCursor.plans:
+                print(f"  ?    {label}: no query captured")
+            elif scans:
+                print(f"  SEQ  {label}: " + ", ".join(f"{table} (~{rows:,} rows)" for table, rows in scans))
+                problems.append((label, scans))
+            else:
+                print(f"  ok   {label}")
+    finally:
+        db.get_db_connection = get_db_connection
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply and check database migrations")
+    parser.add_argument('command', nargs='?', default='up', choices=['up', 'status', 'verify'])
+    parser.add_argument('--target', type=int, default=None, help="highest version to apply (up)")
+    parser.add_argument('--min-rows', type=int, default=10000,
+                        help="tables with at least this many rows are large (verify)")
+    args = parser.parse_args()
+
+    if args.command == 'up':
+        applied = apply_migrations(args.target)
+        pending = [row for row in migration_status() if row[2] == 'pending']
+        print(f"✓ Applied {len(applied)} migration(s), {len(pending)} pending")
+        return 1 if pending and args.target is None else 0
+
+    if args.command == 'status':
+        for version, name, state, applied_at in migration_status():
+            print(f"{version:04d}_{name:<40}{state:<9}{applied_at or ''}")
+        return 0
+
+    print(f"Checking DAO query plans (large table = {args.min_rows:,}+ rows)...")
+    problems = verify_query_plans(args.min_rows)
+    print(f"{'✗' if problems else '✓'} {len(problems)} quer{'y' if len(problems) == 1 else 'ies'} "
+          f"with sequential scans on large tables")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+-- Indexes for the hot query paths in database/db.py
+-- Author: Zhou Li
+-- Date: 2026-10-17
+--
+-- Already covered by constraints in schema.sql:
+--   users (username), users (email)             -> UNIQUE (login, registration check)
+--   seats (hall_id, row_number, seat_number)    -> UNIQUE (seat map of a hall)
+--   seat_bookings (booking_id, seat_id)         -> UNIQUE (seats of a booking)
+
+-- Screening listings: WHERE movie_id/cinema_id = ? AND is_active ORDER BY date, time
+CREATE INDEX IF NOT EXISTS idx_screenings_movie_active
+    ON screenings (movie_id, screening_date, start_time) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_screenings_cinema_active
+    ON screenings (cinema_id, screening_date, start_time) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_screenings_active_date
+    ON screenings (screening_date, start_time) WHERE is_active;
+-- Hall deletes cascade to screenings
+CREATE INDEX IF NOT EXISTS idx_screenings_hall
+    ON screenings (hall_id);
+
+-- Booking history and dashboard: WHERE user_id = ? ORDER BY booking_date DESC
+CREATE INDEX IF NOT EXISTS idx_bookings_user_date
+    ON bookings (user_id, booking_date DESC);
+-- Booked seats of a screening: WHERE screening_id = ? AND booking_status != 'cancelled'
+CREATE INDEX IF NOT EXISTS idx_bookings_screening_status
+    ON bookings (screening_id, booking_status);
+
+-- Seat deletes cascade to seat_bookings
+CREATE INDEX IF NOT EXISTS idx_seat_bookings_seat
+    ON seat_bookings (seat_id);
+
+-- Halls of a cinema: WHERE cinema_id = ? ORDER BY hall_name
+CREATE INDEX IF NOT EXISTS idx_cinema_halls_cinema
+    ON cinema_halls (cinema_id, hall_name);
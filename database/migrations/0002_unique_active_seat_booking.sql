@@ -0,0 +1,62 @@
+-- At most one active booking per (screening, seat)
+-- Author: Zhou Li
+-- Date: 2026-10-17
+--
+-- seat_bookings gets a copy of its booking's screening_id and an is_active
+-- flag (FALSE once the booking is cancelled) so the guarantee can be a
+-- partial unique index. Both columns are maintained by triggers, so
+-- existing INSERT INTO seat_bookings (booking_id, seat_id) statements
+-- keep working.
+
+ALTER TABLE seat_bookings
+    ADD COLUMN IF NOT EXISTS screening_id INTEGER REFERENCES screenings(screening_id) ON DELETE CASCADE,
+    ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT TRUE;
+
+UPDATE seat_bookings sb
+SET screening_id = b.screening_id,
+    is_active = (b.booking_status != 'cancelled')
+FROM bookings b
+WHERE sb.booking_id = b.booking_id;
+
+ALTER TABLE seat_bookings ALTER COLUMN screening_id SET NOT NULL;
+
+-- Fill screening_id/is_active from the booking when a seat is booked
+CREATE OR REPLACE FUNCTION fill_seat_booking_screening()
+RETURNS TRIGGER AS $$
+BEGIN
+    SELECT b.screening_id, b.booking_status != 'cancelled'
+    INTO NEW.screening_id, NEW.is_active
+    FROM bookings b
+    WHERE b.booking_id = NEW.booking_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS seat_booking_screening ON seat_bookings;
+CREATE TRIGGER seat_booking_screening
+BEFORE INSERT ON seat_bookings
+FOR EACH ROW
+EXECUTE FUNCTION fill_seat_booking_screening();
+
+-- Release (or re-take) a booking's seats when its status changes
+CREATE OR REPLACE FUNCTION sync_seat_booking_status()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE seat_bookings
+    SET is_active = (NEW.booking_status != 'cancelled')
+    WHERE booking_id = NEW.booking_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS booking_seat_status ON bookings;
+CREATE TRIGGER booking_seat_status
+AFTER UPDATE OF booking_status ON bookings
+FOR EACH ROW
+WHEN (OLD.booking_status IS DISTINCT FROM NEW.booking_status)
+EXECUTE FUNCTION sync_seat_booking_status();
+
+-- Fails (and the migration rolls back) if a seat is already double booked;
+-- cancel the duplicate bookings and run the migration again
+CREATE UNIQUE INDEX IF NOT EXISTS uq_seat_bookings_active_seat
+    ON seat_bookings (screening_id, seat_id) WHERE is_active;
@@ -0,0 +1,29 @@
+-- Temporary seat holds during checkout
+-- Author: Zhou Li
+-- Date: 2026-10-17
+--
+-- A hold reserves a seat for one browser session (hold_key) until
+-- expires_at, with the seat's price fixed when it was taken. Expired rows
+-- are ignored by every query and can be taken over by the next hold on
+-- the seat; the periodic sweep in database/db.py deletes them through
+-- idx_seat_holds_expires.
+
+CREATE TABLE IF NOT EXISTS seat_holds (
+    screening_id INTEGER NOT NULL REFERENCES screenings(screening_id) ON DELETE CASCADE,
+    seat_id INTEGER NOT NULL REFERENCES seats(seat_id) ON DELETE CASCADE,
+    hold_key VARCHAR(64) NOT NULL,
+    price NUMERIC(10,2) NOT NULL,
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (screening_id, seat_id)
+);
+
+-- Expiry sweep: DELETE ... WHERE expires_at <= now
+CREATE INDEX IF NOT EXISTS idx_seat_holds_expires
+    ON seat_holds (expires_at);
+-- A session's holds, when they are changed or turned into a booking
+CREATE INDEX IF NOT EXISTS idx_seat_holds_key
+    ON seat_holds (hold_key, screening_id);
+-- Seat deletes cascade to holds
+CREATE INDEX IF NOT EXISTS idx_seat_holds_seat
+    ON seat_holds (seat_id);
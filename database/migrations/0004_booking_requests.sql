@@ -0,0 +1,28 @@
+-- Idempotency keys for booking requests
+-- Author: Zhou Li
+-- Date: 2026-10-17
+--
+-- One row per (user, idempotency key) sent with a booking request. The row
+-- is claimed before the booking is attempted, with the booking number the
+-- attempt will use, and gets the outcome (success, message) once it is
+-- known. A retry with the same key returns the stored outcome instead of
+-- booking again. Rows are ignored once expired and deleted by the periodic
+-- sweep in database/db.py through idx_booking_requests_expires.
+
+CREATE TABLE IF NOT EXISTS booking_requests (
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    idempotency_key VARCHAR(64) NOT NULL,
+    screening_id INTEGER NOT NULL,
+    seat_ids INTEGER[] NOT NULL,
+    booking_number VARCHAR(20) NOT NULL,
+    -- NULL while the booking is being attempted
+    success BOOLEAN,
+    message TEXT,
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, idempotency_key)
+);
+
+-- Expiry sweep: DELETE ... WHERE expires_at <= now
+CREATE INDEX IF NOT EXISTS idx_booking_requests_expires
+    ON booking_requests (expires_at);
@@ -0,0 +1,131 @@
+-- Sold-seat and capacity counters for the screening listings
+-- Author: Zhou Li
+-- Date: 2026-10-17
+--
+-- screenings.seats_sold counts the screening's active seat bookings and
+-- cinema_halls.seat_capacity the hall's active seats, so the listing pages
+-- can show seats left from the rows they already read. Both are kept up to
+-- date by statement-level triggers (one counter update per statement and
+-- screening/hall, however many seats it books, releases or changes).
+-- Drift is repaired by the reconciliation job (reconcile_seat_counters in
+-- database/db.py).
+--
+-- The counters make every booking update its screening row, so the
+-- schema's check_screening_status trigger is narrowed to the columns that
+-- can make a screening past: as an AFTER INSERT OR UPDATE trigger it ran a
+-- full scan of screenings on every booking, while holding the row lock of
+-- the screening being booked.
+
+DROP TRIGGER IF EXISTS check_screening_status ON screenings;
+CREATE TRIGGER check_screening_status
+AFTER INSERT OR UPDATE OF screening_date, start_time ON screenings
+FOR EACH ROW
+EXECUTE FUNCTION deactivate_past_screenings();
+
+ALTER TABLE screenings
+    ADD COLUMN IF NOT EXISTS seats_sold INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE cinema_halls
+    ADD COLUMN IF NOT EXISTS seat_capacity INTEGER NOT NULL DEFAULT 0;
+
+UPDATE screenings sc
+SET seats_sold = (SELECT COUNT(*) FROM seat_bookings sb
+                  WHERE sb.screening_id = sc.screening_id AND sb.is_active);
+UPDATE cinema_halls h
+SET seat_capacity = (SELECT COUNT(*) FROM seats s
+                     WHERE s.hall_id = h.hall_id AND s.is_active);
+
+-- Add the net change in active seat bookings per screening
+CREATE OR REPLACE FUNCTION count_seats_sold()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE screenings sc SET seats_sold = sc.seats_sold + d.delta
+        FROM (SELECT screening_id, COUNT(*) AS delta FROM new_rows
+              WHERE is_active GROUP BY screening_id) d
+        WHERE sc.screening_id = d.screening_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE screenings sc SET seats_sold = sc.seats_sold - d.delta
+        FROM (SELECT screening_id, COUNT(*) AS delta FROM old_rows
+              WHERE is_active GROUP BY screening_id) d
+        WHERE sc.screening_id = d.screening_id;
+    ELSE
+        UPDATE screenings sc SET seats_sold = sc.seats_sold + d.delta
+        FROM (SELECT screening_id, SUM(delta) AS delta
+              FROM (SELECT screening_id, 1 AS delta FROM new_rows WHERE is_active
+                    UNION ALL
+                    SELECT screening_id, -1 FROM old_rows WHERE is_active) changes
+              GROUP BY screening_id) d
+        WHERE sc.screening_id = d.screening_id AND d.delta <> 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS seat_bookings_count_insert ON seat_bookings;
+CREATE TRIGGER seat_bookings_count_insert
+AFTER INSERT ON seat_bookings
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION count_seats_sold();
+
+DROP TRIGGER IF EXISTS seat_bookings_count_update ON seat_bookings;
+CREATE TRIGGER seat_bookings_count_update
+AFTER UPDATE ON seat_bookings
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION count_seats_sold();
+
+DROP TRIGGER IF EXISTS seat_bookings_count_delete ON seat_bookings;
+CREATE TRIGGER seat_bookings_count_delete
+AFTER DELETE ON seat_bookings
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION count_seats_sold();
+
+-- Add the net change in active seats per hall
+CREATE OR REPLACE FUNCTION count_hall_capacity()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE cinema_halls h SET seat_capacity = h.seat_capacity + d.delta
+        FROM (SELECT hall_id, COUNT(*) AS delta FROM new_rows
+              WHERE is_active GROUP BY hall_id) d
+        WHERE h.hall_id = d.hall_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE cinema_halls h SET seat_capacity = h.seat_capacity - d.delta
+        FROM (SELECT hall_id, COUNT(*) AS delta FROM old_rows
+              WHERE is_active GROUP BY hall_id) d
+        WHERE h.hall_id = d.hall_id;
+    ELSE
+        UPDATE cinema_halls h SET seat_capacity = h.seat_capacity + d.delta
+        FROM (SELECT hall_id, SUM(delta) AS delta
+              FROM (SELECT hall_id, 1 AS delta FROM new_rows WHERE is_active
+                    UNION ALL
+                    SELECT hall_id, -1 FROM old_rows WHERE is_active) changes
+              GROUP BY hall_id) d
+        WHERE h.hall_id = d.hall_id AND d.delta <> 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS seats_count_insert ON seats;
+CREATE TRIGGER seats_count_insert
+AFTER INSERT ON seats
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION count_hall_capacity();
+
+DROP TRIGGER IF EXISTS seats_count_update ON seats;
+CREATE TRIGGER seats_count_update
+AFTER UPDATE ON seats
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION count_hall_capacity();
+
+DROP TRIGGER IF EXISTS seats_count_delete ON seats;
+CREATE TRIGGER seats_count_delete
+AFTER DELETE ON seats
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION count_hall_capacity();
@@ -0,0 +1,73 @@
+-- Per-screening seat map versions and change log for delta sync
+-- Author: Zhou Li
+-- Date: 2026-10-17
+--
+-- screenings.seats_version goes up by one for every statement that books or
+-- releases seats of the screening, and seat_changes records which seats it
+-- changed under that version. A client that last saw version N gets the
+-- seats changed since from seat_changes (see get_seat_changes in
+-- database/db.py). The log is pruned by age; a client older than the
+-- oldest logged version gets a full snapshot instead.
+--
+-- The bump and the log rows are written by count_seats_sold() from
+-- migration 0005, which already updates the screening row once per
+-- statement. seat_changes has no foreign keys to keep booking inserts
+-- cheap; rows of deleted screenings are pruned with the rest.
+
+ALTER TABLE screenings
+    ADD COLUMN IF NOT EXISTS seats_version BIGINT NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS seat_changes (
+    screening_id INTEGER NOT NULL,
+    version BIGINT NOT NULL,
+    seat_id INTEGER NOT NULL,
+    booked BOOLEAN NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (screening_id, version, seat_id)
+);
+
+-- Pruning: DELETE ... WHERE created_at < cutoff
+CREATE INDEX IF NOT EXISTS idx_seat_changes_created
+    ON seat_changes (created_at);
+
+-- Apply net per-seat changes (+1 booked, -1 released): count, bump each
+-- changed screening's version once and log the seats under the new version
+CREATE OR REPLACE FUNCTION apply_seat_deltas(screening_ids INTEGER[], seat_ids INTEGER[], deltas INTEGER[])
+RETURNS VOID AS $$
+    WITH changed AS (
+        SELECT screening_id, seat_id, SUM(delta) AS delta
+        FROM unnest(screening_ids, seat_ids, deltas) AS d(screening_id, seat_id, delta)
+        GROUP BY screening_id, seat_id
+        HAVING SUM(delta) <> 0
+    ), bumped AS (
+        UPDATE screenings sc
+        SET seats_sold = sc.seats_sold + d.delta, seats_version = sc.seats_version + 1
+        FROM (SELECT screening_id, SUM(delta) AS delta FROM changed GROUP BY screening_id) d
+        WHERE sc.screening_id = d.screening_id
+        RETURNING sc.screening_id, sc.seats_version
+    )
+    INSERT INTO seat_changes (screening_id, version, seat_id, booked)
+    SELECT c.screening_id, b.seats_version, c.seat_id, c.delta > 0
+    FROM changed c JOIN bumped b ON b.screening_id = c.screening_id;
+$$ LANGUAGE sql;
+
+-- Replaces migration 0005's version: same counting, plus versions and the log
+CREATE OR REPLACE FUNCTION count_seats_sold()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- One aggregate pass per statement, so the arrays line up
+    IF TG_OP = 'INSERT' THEN
+        PERFORM apply_seat_deltas(array_agg(screening_id), array_agg(seat_id), array_agg(1))
+        FROM new_rows WHERE is_active;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM apply_seat_deltas(array_agg(screening_id), array_agg(seat_id), array_agg(-1))
+        FROM old_rows WHERE is_active;
+    ELSE
+        PERFORM apply_seat_deltas(array_agg(screening_id), array_agg(seat_id), array_agg(delta))
+        FROM (SELECT screening_id, seat_id, 1 AS delta FROM new_rows WHERE is_active
+              UNION ALL
+              SELECT screening_id, seat_id, -1 FROM old_rows WHERE is_active) changes;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
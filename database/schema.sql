@@ -3,6 +3,10 @@
 -- Date: 2025-10-11
 
 -- Drop all existing tables (in reverse dependency order)
+DROP TABLE IF EXISTS schema_migrations CASCADE;
+DROP TABLE IF EXISTS seat_changes CASCADE;
+DROP TABLE IF EXISTS booking_requests CASCADE;
+DROP TABLE IF EXISTS seat_holds CASCADE;
 DROP TABLE IF EXISTS seat_bookings CASCADE;
 DROP TABLE IF EXISTS bookings CASCADE;
 DROP TABLE IF EXISTS screenings CASCADE;
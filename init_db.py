@@ -2,249 +2,452 @@
 Database initialization script with sample data
 Author: Zhou Li
 Date: 2025-10-10 to 2025-10-29
+
+Builds rows in memory and streams them into PostgreSQL with COPY.
+With no options it seeds the sample data (movies, halls and seats for the
+cinemas in schema.sql and 7 days of screenings). Larger synthetic datasets
+for load testing are generated with --scale, e.g.
+
+    python init_db.py --scale 10 --days 90 --occupancy 0.3 --workers 4 --seed 42
+
+--scale N adds 20*N cinemas, 5*N movies and 500*N customers; --occupancy
+is the average fraction of seats sold per screening. The same --seed and
+--workers reproduce the same dataset.
 """
 
-import psycopg
-from datetime import datetime, date, time, timedelta
+import argparse
+import configparser
+import multiprocessing
+import os
 import random
+import time as timer
+from datetime import datetime, date, time, timedelta
+
+import psycopg
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Sample movies with actual movie posters from previous setup
+SAMPLE_MOVIES = [
+    ("Avatar: The Way of Water", "Set more than a decade after the first film, Avatar: The Way of Water begins to tell the story of the Sully family.", "Action", 192, date(2022, 12, 16), "James Cameron", "Sam Worthington, Zoe Saldana, Sigourney Weaver", "English", "English", True, "https://image.tmdb.org/t/p/w500/t6HIqrRAclMCA60NsSmeqe9RmNV.jpg"),
+    ("The Dark Knight", "Batman raises the stakes in his war on crime with the help of Lt. Jim Gordon and District Attorney Harvey Dent.", "Action", 152, date(2008, 7, 18), "Christopher Nolan", "Christian Bale, Heath Ledger, Aaron Eckhart", "English", "English", True, "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg"),
+    ("Inception", "A thief who steals corporate secrets through dream-sharing technology.", "Science Fiction", 148, date(2010, 7, 16), "Christopher Nolan", "Leonardo DiCaprio, Marion Cotillard, Elliot Page", "English", "English", True, "https://image.tmdb.org/t/p/w500/9gk7adHYeDvHkCSEqAvQNLV5Uge.jpg"),
+    ("The Matrix", "A computer hacker learns about the true nature of reality.", "Science Fiction", 136, date(1999, 3, 31), "Lana Wachowski", "Keanu Reeves, Laurence Fishburne, Carrie-Anne Moss", "English", "English", True, "https://image.tmdb.org/t/p/w500/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg"),
+    ("Interstellar", "The adventures of a group of explorers who make use of a newly discovered wormhole to surpass the limitations on human space travel.", "Science Fiction", 169, date(2014, 11, 7), "Christopher Nolan", "Matthew McConaughey, Anne Hathaway, Jessica Chastain", "English", "English", True, "https://image.tmdb.org/t/p/w500/gEU2QniE6E77NI6lCU6MxlNBvIx.jpg"),
+    ("The Shawshank Redemption", "Framed in the 1940s for the double murder of his wife and her lover, upstanding banker Andy Dufresne begins a new life.", "Drama", 142, date(1994, 9, 23), "Frank Darabont", "Tim Robbins, Morgan Freeman, Bob Gunton", "English", "English", True, "https://image.tmdb.org/t/p/w500/q6y0Go1tsGEsmtFryDOJo3dEmqu.jpg"),
+    ("Pulp Fiction", "A burger-loving hit man, his philosophical partner, a drug-addled gangster's moll and a washed-up boxer converge in this exploration.", "Crime", 154, date(1994, 10, 14), "Quentin Tarantino", "John Travolta, Uma Thurman, Samuel L. Jackson", "English", "English", True, "https://image.tmdb.org/t/p/w500/d5iIlFn5s0ImszYzBPb8JPIfbXD.jpg"),
+    ("Fight Club", "A ticking-time-bomb insomniac and a slippery soap salesman channel primal male aggression into a shocking new form of therapy.", "Drama", 139, date(1999, 10, 15), "David Fincher", "Brad Pitt, Edward Norton, Helena Bonham Carter", "English", "English", True, "https://image.tmdb.org/t/p/w500/pB8BM7pdSp6B6Ih7QZ4DrQ3PmJK.jpg"),
+    ("Forrest Gump", "The presidencies of Kennedy and Johnson, the Vietnam War, the Watergate scandal and other historical events unfold.", "Drama", 142, date(1994, 7, 6), "Robert Zemeckis", "Tom Hanks, Robin Wright, Gary Sinise", "English", "English", True, "https://image.tmdb.org/t/p/w500/arw2vcBveWOVZr6pxd9XTd1TdQa.jpg"),
+    ("The Lord of the Rings: The Fellowship", "A meek Hobbit from the Shire and eight companions set out on a journey to destroy the powerful One Ring.", "Adventure", 178, date(2001, 12, 19), "Peter Jackson", "Elijah Wood, Ian McKellen, Orlando Bloom", "English", "English", True, "https://image.tmdb.org/t/p/w500/6oom5QYQ2yQTMJIbnvbkBL9cHo6.jpg"),
+    ("Spider-Man: No Way Home", "Peter Parker's life gets turned upside down.", "Action", 148, date(2021, 12, 17), "Jon Watts", "Tom Holland, Zendaya, Benedict Cumberbatch", "English", "English", True, "https://image.tmdb.org/t/p/w500/1g0dhYtq4irTY1GPXvft6k4YLjm.jpg"),
+    ("Top Gun: Maverick", "After thirty years, Maverick is still pushing the envelope.", "Action", 130, date(2022, 5, 27), "Joseph Kosinski", "Tom Cruise, Jennifer Connelly, Miles Teller", "English", "English", True, "https://image.tmdb.org/t/p/w500/62HCnUTziyWcpDaBO2i1DX17ljH.jpg"),
+    ("Black Panther: Wakanda Forever", "Queen Ramonda, Shuri, M'Baku and the nation of Wakanda fight to protect their nation in the wake of King T'Challa's death.", "Action", 161, date(2022, 11, 11), "Ryan Coogler", "Letitia Wright, Lupita Nyong'o, Danai Gurira", "English", "English", True, "https://image.tmdb.org/t/p/w500/sv1xJUazXeYqALzczSZ3O6nkH75.jpg"),
+]
+
+GENRES = ["Action", "Science Fiction", "Drama", "Crime", "Adventure", "Comedy", "Animation", "Horror"]
+SUBURBS = [("Sydney", "2000"), ("Parramatta", "2150"), ("Chatswood", "2067"), ("Bondi Junction", "2022"),
+           ("Newtown", "2042"), ("Burwood", "2134"), ("Hornsby", "2077"), ("Liverpool", "2170")]
+HALL_TYPES = ["Standard", "IMAX", "VIP", "3D", "Dolby"]
+SCREEN_SIZES = ["Small", "Medium", "Large", "IMAX"]
+SOUND_SYSTEMS = ["Stereo", "Surround 5.1", "Dolby Atmos", "IMAX"]
+SCREENING_TYPES = ["2D", "3D", "IMAX", "Dolby Vision"]
+PRICE_MULTIPLIERS = {"standard": 1.0, "premium": 1.5, "vip": 2.0}
+
+# Column lists for every COPY, in the order rows are built below
+COLUMNS = {
+    'cinemas': ('cinema_id', 'cinema_name', 'address', 'suburb', 'postcode', 'phone', 'email',
+                'facilities', 'is_active'),
+    'movies': ('movie_id', 'title', 'description', 'genre', 'duration_minutes', 'release_date',
+               'director', '"cast"', 'language', 'subtitles', 'is_active', 'poster_url'),
+    'users': ('user_id', 'username', 'email', 'password', 'first_name', 'last_name', 'phone', 'user_type'),
+    'cinema_halls': ('hall_id', 'cinema_id', 'hall_name', 'hall_type', 'total_rows', 'seats_per_row',
+                     'total_seats', 'screen_size', 'sound_system'),
+    'seats': ('seat_id', 'hall_id', 'row_number', 'seat_number', 'seat_type', 'price_multiplier', 'is_active'),
+    'screenings': ('screening_id', 'movie_id', 'cinema_id', 'hall_id', 'screening_date', 'start_time',
+                   'end_time', 'ticket_price', 'screening_type', 'language', 'subtitles', 'is_active'),
+    'bookings': ('booking_id', 'user_id', 'screening_id', 'booking_number', 'num_tickets', 'total_amount',
+                 'booking_status', 'payment_status', 'booking_date'),
+    'seat_bookings': ('booking_id', 'seat_id')
+}
+
+# Tables whose IDs are assigned by the generator (sequences are reset afterwards)
+ID_COLUMNS = {
+    'cinemas': 'cinema_id',
+    'movies': 'movie_id',
+    'users': 'user_id',
+    'cinema_halls': 'hall_id',
+    'seats': 'seat_id',
+    'screenings': 'screening_id',
+    'bookings': 'booking_id'
+}
+
+# Worker tables are flushed once this many rows are buffered
+FLUSH_ROWS = 200000
+
+
+def get_db_config():
+    """Get connection settings from config.ini (same file as the web app)"""
+    config = configparser.ConfigParser()
+    config.read(os.path.join(PROJECT_ROOT, 'config.ini'))
+    return {
+        'host': config.get('database', 'host', fallback='localhost'),
+        'port': config.getint('database', 'port', fallback=5432),
+        'dbname': config.get('database', 'dbname', fallback='cinema_db'),
+        'user': config.get('database', 'user', fallback='lizhou'),
+        'password': config.get('database', 'password', fallback='')
+    }
 
 
 def get_db_connection():
     """Get database connection"""
     try:
-        conn = psycopg.connect(
-            host="localhost",
-            port=5432,
-            dbname="cinema_db",
-            user="lizhou",
-            password=""
-        )
+        conn = psycopg.connect(**get_db_config())
         return conn
     except Exception as e:
         print(f"Error connecting to database: {e}")
         return None
 
 
-def init_cinemas(conn):
-    """Initialize cinemas with sample data (skip if already exists)"""
+class CopyStats:
+    """Rows loaded and time spent in COPY, per table"""
+
+    def __init__(self):
+        self.tables = {}
+
+    def add(self, table, rows, seconds):
+        total = self.tables.setdefault(table, [0, 0.0])
+        total[0] += rows
+        total[1] += seconds
+
+    def merge(self, other):
+        for table, (rows, seconds) in other.tables.items():
+            self.add(table, rows, seconds)
+
+    def report(self, wall_seconds, workers):
+        print(f"\n{'table':<15}{'rows':>12}{'copy s':>10}{'rows/s':>12}")
+        total_rows = 0
+        for table in COLUMNS:
+            if table not in self.tables:
+                continue
+            rows, seconds = self.tables[table]
+            total_rows += rows
+            print(f"{table:<15}{rows:>12,}{seconds:>10.2f}{rows / seconds if seconds else 0:>12,.0f}")
+        print(f"{'total':<15}{total_rows:>12,}{wall_seconds:>10.2f}{total_rows / wall_seconds if wall_seconds else 0:>12,.0f}")
+        print(f"(copy s is summed over {workers} worker(s); the total line uses wall-clock time)")
+
+
+class IdAllocator:
+    """
+    Hands out IDs above the table's current maximum
+    Worker i of n takes base+1+i, base+1+i+n, ... so workers never collide
+    without having to know how many rows the others will generate.
+    """
+
+    def __init__(self, base, offset=0, stride=1):
+        self.next_id = base + 1 + offset
+        self.stride = stride
+
+    def __call__(self):
+        value = self.next_id
+        self.next_id += self.stride
+        return value
+
+
+def copy_rows(cursor, table, rows, stats):
+    """Stream rows into a table with a single COPY"""
+    if not rows:
+        return
+    start = timer.perf_counter()
+    with cursor.copy(f"COPY {table} ({', '.join(COLUMNS[table])}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+    stats.add(table, len(rows), timer.perf_counter() - start)
+
+
+def get_max_ids(cursor):
+    """Get the current maximum ID of every generated table"""
+    max_ids = {}
+    for table, column in ID_COLUMNS.items():
+        cursor.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")
+        max_ids[table] = cursor.fetchone()[0]
+    return max_ids
+
+
+def reset_sequences(conn):
+    """Move each SERIAL sequence past the IDs the generator assigned"""
+    cursor = conn.cursor()
+    for table, column in ID_COLUMNS.items():
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+            f"GREATEST((SELECT MAX({column}) FROM {table}), 1))"
+        )
+    conn.commit()
+
+
+def init_cinemas(conn, rng, scale, max_ids, stats):
+    """
+    Initialize cinemas (the sample cinemas come from schema.sql)
+    Adds 20 synthetic cinemas per unit of scale
+    Returns IDs of active cinemas that have no halls yet
+    """
     print("Initializing cinemas...")
     cursor = conn.cursor()
-    
-    try:
-        # Check if data already exists
-        cursor.execute("SELECT COUNT(*) FROM cinemas")
-        count = cursor.fetchone()[0]
-        
-        if count > 0:
-            print(f"✓ Cinemas already initialized ({count} cinemas exist)")
-            return
-        
-        # Sample cinemas are already in schema.sql, so this is just for verification
-        cursor.execute("SELECT COUNT(*) FROM cinemas")
-        count = cursor.fetchone()[0]
-        print(f"✓ Found {count} cinemas")
-    except Exception as e:
-        print(f"Error checking cinemas: {e}")
-        conn.rollback()
+    next_id = IdAllocator(max_ids['cinemas'])
+
+    rows = []
+    for i in range(round(scale * 20)):
+        cinema_id = next_id()
+        suburb, postcode = rng.choice(SUBURBS)
+        rows.append((cinema_id, f"Cinema {cinema_id} {suburb}", f"{rng.randint(1, 999)} George St",
+                     suburb, postcode, f"02 9{rng.randint(1000000, 9999999)}",
+                     f"cinema{cinema_id}@example.com", rng.choice(["IMAX, 3D", "VIP Lounges", "Dolby Atmos"]), True))
+    copy_rows(cursor, 'cinemas', rows, stats)
+    conn.commit()
+
+    cursor.execute(
+        """SELECT c.cinema_id FROM cinemas c
+           WHERE c.is_active = TRUE
+             AND NOT EXISTS (SELECT 1 FROM cinema_halls h WHERE h.cinema_id = c.cinema_id)
+           ORDER BY c.cinema_id"""
+    )
+    cinema_ids = [row[0] for row in cursor.fetchall()]
+    print(f"✓ Inserted {len(rows)} cinemas, {len(cinema_ids)} cinemas need halls")
+    return cinema_ids
 
 
-def init_movies(conn):
-    """Initialize movies with sample data"""
+def init_movies(conn, rng, scale, max_ids, stats):
+    """
+    Initialize movies with sample data (skipped if movies already exist)
+    Adds 5 synthetic movies per unit of scale
+    Returns {movie_id: duration_minutes} for active movies
+    """
     print("Initializing movies...")
     cursor = conn.cursor()
-    
-    # Sample movies with actual movie posters from previous setup
-    movies = [
-        ("Avatar: The Way of Water", "Set more than a decade after the first film, Avatar: The Way of Water begins to tell the story of the Sully family.", "Action", 192, date(2022, 12, 16), "James Cameron", "Sam Worthington, Zoe Saldana, Sigourney Weaver", "English", "English", True, "https://image.tmdb.org/t/p/w500/t6HIqrRAclMCA60NsSmeqe9RmNV.jpg"),
-        ("The Dark Knight", "Batman raises the stakes in his war on crime with the help of Lt. Jim Gordon and District Attorney Harvey Dent.", "Action", 152, date(2008, 7, 18), "Christopher Nolan", "Christian Bale, Heath Ledger, Aaron Eckhart", "English", "English", True, "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg"),
-        ("Inception", "A thief who steals corporate secrets through dream-sharing technology.", "Science Fiction", 148, date(2010, 7, 16), "Christopher Nolan", "Leonardo DiCaprio, Marion Cotillard, Elliot Page", "English", "English", True, "https://image.tmdb.org/t/p/w500/9gk7adHYeDvHkCSEqAvQNLV5Uge.jpg"),
-        ("The Matrix", "A computer hacker learns about the true nature of reality.", "Science Fiction", 136, date(1999, 3, 31), "Lana Wachowski", "Keanu Reeves, Laurence Fishburne, Carrie-Anne Moss", "English", "English", True, "https://image.tmdb.org/t/p/w500/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg"),
-        ("Interstellar", "The adventures of a group of explorers who make use of a newly discovered wormhole to surpass the limitations on human space travel.", "Science Fiction", 169, date(2014, 11, 7), "Christopher Nolan", "Matthew McConaughey, Anne Hathaway, Jessica Chastain", "English", "English", True, "https://image.tmdb.org/t/p/w500/gEU2QniE6E77NI6lCU6MxlNBvIx.jpg"),
-        ("The Shawshank Redemption", "Framed in the 1940s for the double murder of his wife and her lover, upstanding banker Andy Dufresne begins a new life.", "Drama", 142, date(1994, 9, 23), "Frank Darabont", "Tim Robbins, Morgan Freeman, Bob Gunton", "English", "English", True, "https://image.tmdb.org/t/p/w500/q6y0Go1tsGEsmtFryDOJo3dEmqu.jpg"),
-        ("Pulp Fiction", "A burger-loving hit man, his philosophical partner, a drug-addled gangster's moll and a washed-up boxer converge in this exploration.", "Crime", 154, date(1994, 10, 14), "Quentin Tarantino", "John Travolta, Uma Thurman, Samuel L. Jackson", "English", "English", True, "https://image.tmdb.org/t/p/w500/d5iIlFn5s0ImszYzBPb8JPIfbXD.jpg"),
-        ("Fight Club", "A ticking-time-bomb insomniac and a slippery soap salesman channel primal male aggression into a shocking new form of therapy.", "Drama", 139, date(1999, 10, 15), "David Fincher", "Brad Pitt, Edward Norton, Helena Bonham Carter", "English", "English", True, "https://image.tmdb.org/t/p/w500/pB8BM7pdSp6B6Ih7QZ4DrQ3PmJK.jpg"),
-        ("Forrest Gump", "The presidencies of Kennedy and Johnson, the Vietnam War, the Watergate scandal and other historical events unfold.", "Drama", 142, date(1994, 7, 6), "Robert Zemeckis", "Tom Hanks, Robin Wright, Gary Sinise", "English", "English", True, "https://image.tmdb.org/t/p/w500/arw2vcBveWOVZr6pxd9XTd1TdQa.jpg"),
-        ("The Lord of the Rings: The Fellowship", "A meek Hobbit from the Shire and eight companions set out on a journey to destroy the powerful One Ring.", "Adventure", 178, date(2001, 12, 19), "Peter Jackson", "Elijah Wood, Ian McKellen, Orlando Bloom", "English", "English", True, "https://image.tmdb.org/t/p/w500/6oom5QYQ2yQTMJIbnvbkBL9cHo6.jpg"),
-        ("Spider-Man: No Way Home", "Peter Parker's life gets turned upside down.", "Action", 148, date(2021, 12, 17), "Jon Watts", "Tom Holland, Zendaya, Benedict Cumberbatch", "English", "English", True, "https://image.tmdb.org/t/p/w500/1g0dhYtq4irTY1GPXvft6k4YLjm.jpg"),
-        ("Top Gun: Maverick", "After thirty years, Maverick is still pushing the envelope.", "Action", 130, date(2022, 5, 27), "Joseph Kosinski", "Tom Cruise, Jennifer Connelly, Miles Teller", "English", "English", True, "https://image.tmdb.org/t/p/w500/62HCnUTziyWcpDaBO2i1DX17ljH.jpg"),
-        ("Black Panther: Wakanda Forever", "Queen Ramonda, Shuri, M'Baku and the nation of Wakanda fight to protect their nation in the wake of King T'Challa's death.", "Action", 161, date(2022, 11, 11), "Ryan Coogler", "Letitia Wright, Lupita Nyong'o, Danai Gurira", "English", "English", True, "https://image.tmdb.org/t/p/w500/sv1xJUazXeYqALzczSZ3O6nkH75.jpg"),
-    ]
-    
-    try:
-        cursor.execute("SELECT COUNT(*) FROM movies")
-        count = cursor.fetchone()[0]
-        
-        if count > 0:
-            print(f"✓ Movies already initialized ({count} movies exist)")
-            return
-        
-        for movie in movies:
-            cursor.execute(
-                """INSERT INTO movies (title, description, genre, duration_minutes, release_date, director, "cast", language, subtitles, is_active, poster_url, created_at, updated_at)
-                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                   ON CONFLICT DO NOTHING""",
-                (movie[0], movie[1], movie[2], movie[3], movie[4], movie[5], movie[6], movie[7], movie[8], movie[9], movie[10], datetime.now(), datetime.now())
-            )
-        conn.commit()
-        print(f"✓ Inserted {len(movies)} movies")
-    except Exception as e:
-        print(f"Error inserting movies: {e}")
-        conn.rollback()
+    next_id = IdAllocator(max_ids['movies'])
 
+    cursor.execute("SELECT COUNT(*) FROM movies")
+    rows = []
+    if cursor.fetchone()[0] == 0:
+        rows = [(next_id(),) + movie for movie in SAMPLE_MOVIES]
+    for i in range(round(scale * 5)):
+        movie_id = next_id()
+        rows.append((movie_id, f"Synthetic Feature {movie_id}", "Generated for load testing.",
+                     rng.choice(GENRES), rng.randint(85, 190), date.today() - timedelta(days=rng.randint(0, 365)),
+                     "Various", "Various", "English", "English", True, None))
+    copy_rows(cursor, 'movies', rows, stats)
+    conn.commit()
 
-def init_cinema_halls(conn):
-    """Initialize cinema halls"""
-    print("Initializing cinema halls...")
-    cursor = conn.cursor()
-    
-    hall_types = ["Standard", "IMAX", "VIP", "3D", "Dolby"]
-    screen_sizes = ["Small", "Medium", "Large", "IMAX"]
-    sound_systems = ["Stereo", "Surround 5.1", "Dolby Atmos", "IMAX"]
-    
-    try:
-        cursor.execute("SELECT cinema_id FROM cinemas")
-        cinema_ids = [row[0] for row in cursor.fetchall()]
-        
-        for cinema_id in cinema_ids:
-            # Add 2-4 halls per cinema
-            num_halls = random.randint(2, 4)
-            for i in range(num_halls):
-                hall_name = f"Hall {chr(65 + i)}"
-                hall_type = random.choice(hall_types)
-                total_rows = random.choice([10, 12, 14, 16, 18])
-                seats_per_row = random.choice([15, 18, 20, 22])
-                total_seats = total_rows * seats_per_row
-                
-                cursor.execute(
-                    """INSERT INTO cinema_halls (cinema_id, hall_name, hall_type, total_rows, seats_per_row, total_seats, screen_size, sound_system, created_at, updated_at)
-                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                    (cinema_id, hall_name, hall_type, total_rows, seats_per_row, total_seats,
-                     random.choice(screen_sizes), random.choice(sound_systems), datetime.now(), datetime.now())
-                )
-        conn.commit()
-        print("✓ Inserted cinema halls")
-    except Exception as e:
-        print(f"Error inserting cinema halls: {e}")
-        conn.rollback()
+    cursor.execute("SELECT movie_id, duration_minutes FROM movies WHERE is_active = TRUE ORDER BY movie_id")
+    movies = {movie_id: duration or 120 for movie_id, duration in cursor.fetchall()}
+    print(f"✓ Inserted {len(rows)} movies ({len(movies)} active)")
+    return movies
 
 
-def init_seats(conn):
-    """Initialize seats for all halls"""
-    print("Initializing seats...")
+def init_users(conn, rng, scale, max_ids, stats):
+    """
+    Initialize customers (500 per unit of scale)
+    Returns IDs of customers that bookings can be generated for
+    """
+    print("Initializing users...")
     cursor = conn.cursor()
-    
-    seat_types = ["standard", "premium", "vip"]
-    price_multipliers = {"standard": 1.0, "premium": 1.5, "vip": 2.0}
-    
-    try:
-        cursor.execute("SELECT hall_id, total_rows, seats_per_row FROM cinema_halls")
-        halls = cursor.fetchall()
-        
-        for hall_id, total_rows, seats_per_row in halls:
-            for row in range(1, total_rows + 1):
-                for seat_num in range(1, seats_per_row + 1):
-                    # Determine seat type based on row (front rows are VIP/Premium)
-                    if row <= 3:
-                        seat_type = random.choice(["premium", "vip"])
-                    elif row <= total_rows * 0.4:
-                        seat_type = random.choice(["premium", "standard"])
-                    else:
-                        seat_type = "standard"
-                    
-                    price_multiplier = price_multipliers[seat_type]
-                    
-                    cursor.execute(
-                        """INSERT INTO seats (hall_id, row_number, seat_number, seat_type, price_multiplier, is_active)
-                           VALUES (%s, %s, %s, %s, %s, %s)""",
-                        (hall_id, row, seat_num, seat_type, price_multiplier, True)
-                    )
-        conn.commit()
-        print("✓ Inserted seats")
-    except Exception as e:
-        print(f"Error inserting seats: {e}")
-        conn.rollback()
+    next_id = IdAllocator(max_ids['users'])
+
+    rows = []
+    for i in range(round(scale * 500)):
+        user_id = next_id()
+        rows.append((user_id, f"user{user_id}", f"user{user_id}@example.com", "customer123",
+                     "Test", f"User{user_id}", f"04{rng.randint(10000000, 99999999)}", "customer"))
+    copy_rows(cursor, 'users', rows, stats)
+    conn.commit()
+
+    cursor.execute("SELECT user_id FROM users WHERE user_type = 'customer' ORDER BY user_id")
+    user_ids = [row[0] for row in cursor.fetchall()]
+    print(f"✓ Inserted {len(rows)} users")
+    return user_ids
+
+
+def generate_cinema(rng, cinema_id, ids, movies, user_ids, start_date, days, occupancy, rows):
+    """Generate halls, seats, screenings and bookings for one cinema into rows"""
+    movie_ids = list(movies)
+    now = datetime.now()
+
+    # Add 2-4 halls per cinema
+    for i in range(rng.randint(2, 4)):
+        hall_id = ids['cinema_halls']()
+        total_rows = rng.choice([10, 12, 14, 16, 18])
+        seats_per_row = rng.choice([15, 18, 20, 22])
+        rows['cinema_halls'].append((hall_id, cinema_id, f"Hall {chr(65 + i)}", rng.choice(HALL_TYPES),
+                                     total_rows, seats_per_row, total_rows * seats_per_row,
+                                     rng.choice(SCREEN_SIZES), rng.choice(SOUND_SYSTEMS)))
+
+        seats = []
+        for row in range(1, total_rows + 1):
+            for seat_num in range(1, seats_per_row + 1):
+                # Determine seat type based on row (front rows are VIP/Premium)
+                if row <= 3:
+                    seat_type = rng.choice(["premium", "vip"])
+                elif row <= total_rows * 0.4:
+                    seat_type = rng.choice(["premium", "standard"])
+                else:
+                    seat_type = "standard"
+                seat_id = ids['seats']()
+                seats.append((seat_id, PRICE_MULTIPLIERS[seat_type]))
+                rows['seats'].append((seat_id, hall_id, row, seat_num, seat_type,
+                                      PRICE_MULTIPLIERS[seat_type], True))
+
+        for day in range(days):
+            screening_date = start_date + timedelta(days=day)
+
+            # Random chance for each hall to have a screening
+            if rng.random() <= 0.6 or not movie_ids:
+                continue
+            movie_id = rng.choice(movie_ids)
+            duration_minutes = movies[movie_id]
+
+            # Generate 2-4 time slots per day
+            for time_slot in rng.sample([10, 13, 16, 19, 22], rng.randint(2, 4)):
+                start = datetime.combine(screening_date, time(time_slot, rng.choice([0, 15, 30, 45])))
+                end = start + timedelta(minutes=duration_minutes)
+                ticket_price = round(rng.uniform(25.0, 45.0), 2)
+                screening_id = ids['screenings']()
+                rows['screenings'].append((screening_id, movie_id, cinema_id, hall_id, screening_date,
+                                           start.time(), end.time(), ticket_price,
+                                           rng.choice(SCREENING_TYPES), "English", "English", True))
+
+                if occupancy <= 0 or not user_ids:
+                    continue
+
+                # Sell a random share of the seats in groups of 1-5
+                sold = min(len(seats), round(len(seats) * occupancy * rng.uniform(0.5, 1.5)))
+                picks = rng.sample(seats, sold)
+                while picks:
+                    group_size = min(len(picks), rng.randint(1, 5))
+                    group, picks = picks[:group_size], picks[group_size:]
+                    booking_id = ids['bookings']()
+                    booking_date = min(now, start - timedelta(minutes=rng.randint(60, 60 * 24 * 14)))
+                    status = 'cancelled' if rng.random() < 0.05 else 'confirmed'
+                    rows['bookings'].append((booking_id, rng.choice(user_ids), screening_id,
+                                             f"BK{booking_id}", len(group),
+                                             round(sum(ticket_price * multiplier for _, multiplier in group), 2),
+                                             status, 'paid', booking_date))
+                    for seat_id, _ in group:
+                        rows['seat_bookings'].append((booking_id, seat_id))
 
 
-def init_screenings(conn):
-    """Initialize screenings"""
-    print("Initializing screenings...")
+def flush_rows(conn, rows, stats):
+    """COPY buffered rows in dependency order and commit them"""
     cursor = conn.cursor()
-    
-    screening_types = ["2D", "3D", "IMAX", "Dolby Vision"]
-    
+    for table in ('cinema_halls', 'seats', 'screenings', 'bookings', 'seat_bookings'):
+        copy_rows(cursor, table, rows[table], stats)
+        rows[table].clear()
+    conn.commit()
+
+
+def seed_partition(task):
+    """
+    Worker entry point: generate and load every cinema in task['cinema_ids']
+    Uses its own connection; returns CopyStats
+    """
+    stats = CopyStats()
+    conn = psycopg.connect(**task['db_config'])
+    ids = {table: IdAllocator(task['max_ids'][table], task['worker'], task['workers'])
+           for table in ('cinema_halls', 'seats', 'screenings', 'bookings')}
+    rows = {table: [] for table in ('cinema_halls', 'seats', 'screenings', 'bookings', 'seat_bookings')}
     try:
-        cursor.execute("SELECT movie_id FROM movies WHERE is_active = TRUE")
-        movie_ids = [row[0] for row in cursor.fetchall()]
-        
-        cursor.execute("SELECT cinema_id FROM cinemas WHERE is_active = TRUE")
-        cinema_ids = [row[0] for row in cursor.fetchall()]
-        
-        cursor.execute("SELECT hall_id, cinema_id FROM cinema_halls")
-        halls = cursor.fetchall()
-        
-        # Generate screenings for the next 7 days
-        for day in range(7):
-            screening_date = date.today() + timedelta(days=day)
-            
-            for hall_id, cinema_id in halls:
-                # Random chance for each hall to have a screening
-                if random.random() > 0.6:
-                    # Pick a random movie
-                    movie_id = random.choice(movie_ids)
-                    
-                    # Get movie duration
-                    cursor.execute("SELECT duration_minutes FROM movies WHERE movie_id = %s", (movie_id,))
-                    duration_result = cursor.fetchone()
-                    if not duration_result:
-                        continue
-                    duration_minutes = duration_result[0]
-                    
-                    # Generate 3-5 time slots per day
-                    for time_slot in random.sample([10, 13, 16, 19, 22], random.randint(2, 4)):
-                        start_time = time(time_slot, random.choice([0, 15, 30, 45]))
-                        end_minutes = duration_minutes % 60
-                        end_hour = (time_slot * 60 + duration_minutes) // 60
-                        end_time = time(end_hour % 24, end_minutes)
-                        
-                        ticket_price = round(random.uniform(25.0, 45.0), 2)
-                        screening_type = random.choice(screening_types)
-                        
-                        cursor.execute(
-                            """INSERT INTO screenings (movie_id, cinema_id, hall_id, screening_date, start_time, end_time, ticket_price, screening_type, language, subtitles, is_active, created_at, updated_at)
-                               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                            (movie_id, cinema_id, hall_id, screening_date, start_time, end_time, ticket_price,
-                             screening_type, "English", "English", True, datetime.now(), datetime.now())
-                        )
-        conn.commit()
-        print("✓ Inserted screenings")
-    except Exception as e:
-        print(f"Error inserting screenings: {e}")
-        conn.rollback()
+        for cinema_id in task['cinema_ids']:
+            # Seed per cinema so the data does not depend on scheduling
+            rng = random.Random(f"{task['seed']}:{cinema_id}")
+            generate_cinema(rng, cinema_id, ids, task['movies'], task['user_ids'],
+                            task['start_date'], task['days'], task['occupancy'], rows)
+            if sum(len(table_rows) for table_rows in rows.values()) >= FLUSH_ROWS:
+                flush_rows(conn, rows, stats)
+        flush_rows(conn, rows, stats)
+    finally:
+        conn.close()
+    return stats
 
 
 def main():
     """Main initialization function"""
+    parser = argparse.ArgumentParser(description="Seed the cinema database")
+    parser.add_argument('--scale', type=float, default=0,
+                        help="synthetic data scale factor (0 = sample data only)")
+    parser.add_argument('--days', type=int, default=7, help="days of screenings to generate from today")
+    parser.add_argument('--occupancy', type=float, default=0.0,
+                        help="average fraction of seats booked per screening")
+    parser.add_argument('--seed', type=int, default=None, help="random seed for a reproducible dataset")
+    parser.add_argument('--workers', type=int, default=1, help="parallel worker processes/connections")
+    args = parser.parse_args()
+
     print("=" * 50)
     print("Database Initialization Script")
     print("Author: Zhou Li")
     print("=" * 50)
-    
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    print(f"Seed: {seed}")
+    rng = random.Random(seed)
+
     conn = get_db_connection()
     if not conn:
         print("Failed to connect to database")
         return
-    
+
+    stats = CopyStats()
+    started = timer.perf_counter()
     try:
-        init_cinemas(conn)
-        init_movies(conn)
-        init_cinema_halls(conn)
-        init_seats(conn)
-        init_screenings(conn)
-        
+        max_ids = get_max_ids(conn.cursor())
+        cinema_ids = init_cinemas(conn, rng, args.scale, max_ids, stats)
+        movies = init_movies(conn, rng, args.scale, max_ids, stats)
+        user_ids = init_users(conn, rng, args.scale, max_ids, stats)
+
+        # The per-row deactivation trigger rescans screenings on every
+        # insert; disable it for the load and apply it once afterwards
+        cursor = conn.cursor()
+        cursor.execute("ALTER TABLE screenings DISABLE TRIGGER check_screening_status")
+        conn.commit()
+
+        print(f"Generating halls, seats, screenings and bookings with {args.workers} worker(s)...")
+        workers = max(1, args.workers)
+        tasks = [{
+            'db_config': get_db_config(),
+            'cinema_ids': cinema_ids[worker::workers],
+            'worker': worker,
+            'workers': workers,
+            'max_ids': max_ids,
+            'movies': movies,
+            'user_ids': user_ids,
+            'start_date': date.today(),
+            'days': args.days,
+            'occupancy': args.occupancy,
+            'seed': seed
+        } for worker in range(workers)]
+        try:
+            if workers == 1:
+                results = [seed_partition(tasks[0])]
+            else:
+                with multiprocessing.Pool(workers) as pool:
+                    results = pool.map(seed_partition, tasks)
+            for result in results:
+                stats.merge(result)
+        finally:
+            cursor.execute("ALTER TABLE screenings ENABLE TRIGGER check_screening_status")
+            cursor.execute(
+                """UPDATE screenings SET is_active = FALSE
+                   WHERE (screening_date || ' ' || start_time)::timestamp < CURRENT_TIMESTAMP
+                     AND is_active = TRUE"""
+            )
+            conn.commit()
+
+        reset_sequences(conn)
+        cursor.execute("ANALYZE")
+        conn.commit()
+
+        stats.report(timer.perf_counter() - started, workers)
         print("\n" + "=" * 50)
         print("✓ Database initialization completed successfully!")
         print("=" * 50)
-        
+
     except Exception as e:
         print(f"\n✗ Error during initialization: {e}")
     finally:
@@ -253,4 +456,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
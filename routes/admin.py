@@ -6,8 +6,11 @@ Date: 2025-10-19
 
 from flask import render_template, redirect, url_for, session, flash, request
 from backend.services import CinemaService, CinemaHallService, MovieService, ScreeningService
-from database.db import get_db_connection
+from database.db import get_db_connection, notify_cache_invalidation
 from backend.models.screening import Screening
+from backend.catalog_cache import catalog_cache
+from backend.hall_layout import hall_layouts
+from backend.seat_availability import seat_availability
 
 
 def register_admin_routes(app):
@@ -29,12 +32,9 @@ def register_admin_routes(app):
             return redirect(url_for('index'))
         
         # Get counts for dashboard
-        conn = get_db_connection()
         stats = {}
-        if conn:
-            try:
-                cursor = conn.cursor()
-                
+        try:
+            with get_db_connection() as conn, conn.cursor() as cursor:
                 # Get cinema count
                 cursor.execute("SELECT COUNT(*) FROM cinemas WHERE is_active = TRUE")
                 stats['cinemas'] = cursor.fetchone()[0]
@@ -50,13 +50,8 @@ def register_admin_routes(app):
                 # Get screenings count
                 cursor.execute("SELECT COUNT(*) FROM screenings WHERE is_active = TRUE")
                 stats['screenings'] = cursor.fetchone()[0]
-                
-                cursor.close()
-                conn.close()
-            except Exception as e:
-                print(f"Error getting admin stats: {e}")
-                if conn:
-                    conn.close()
+        except Exception as e:
+            print(f"Error getting admin stats: {e}")
         
         return render_template('admin/admin_panel.html', stats=stats)
     
@@ -88,24 +83,20 @@ def register_admin_routes(app):
             email = request.form.get('email')
             facilities = request.form.get('facilities', '')
             
-            conn = get_db_connection()
-            if conn:
-                try:
-                    cursor = conn.cursor()
+            try:
+                with get_db_connection() as conn, conn.cursor() as cursor:
                     cursor.execute(
                         """INSERT INTO cinemas (cinema_name, address, suburb, postcode, phone, email, facilities, is_active)
                            VALUES (%s, %s, %s, %s, %s, %s, %s, TRUE)""",
                         (cinema_name, address, suburb, postcode, phone, email, facilities)
                     )
+                    notify_cache_invalidation(cursor, 'cinema')
                     conn.commit()
-                    cursor.close()
-                    conn.close()
-                    flash('Cinema added successfully', 'success')
-                except Exception as e:
-                    print(f"Error adding cinema: {e}")
-                    if conn:
-                        conn.close()
-                    flash('Failed to add cinema', 'error')
+                catalog_cache.invalidate('cinema')
+                flash('Cinema added successfully', 'success')
+            except Exception as e:
+                print(f"Error adding cinema: {e}")
+                flash('Failed to add cinema', 'error')
             
             return redirect(url_for('admin_cinemas'))
         
@@ -150,27 +141,15 @@ def register_admin_routes(app):
             seats_per_row = int(request.form.get('seats_per_row'))
             screen_size = request.form.get('screen_size')
             sound_system = request.form.get('sound_system')
-            total_seats = total_rows * seats_per_row
             
-            conn = get_db_connection()
-            if conn:
-                try:
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        """INSERT INTO cinema_halls (cinema_id, hall_name, hall_type, total_rows, seats_per_row, 
-                           total_seats, screen_size, sound_system) 
-                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
-                        (cinema_id, hall_name, hall_type, total_rows, seats_per_row, total_seats, screen_size, sound_system)
-                    )
-                    conn.commit()
-                    cursor.close()
-                    conn.close()
-                    flash('Hall added successfully', 'success')
-                except Exception as e:
-                    print(f"Error adding hall: {e}")
-                    if conn:
-                        conn.close()
-                    flash('Failed to add hall', 'error')
+            # Hall and seats are created together in one transaction
+            hall_id = CinemaHallService.create_hall(
+                cinema_id, hall_name, hall_type, total_rows, seats_per_row, screen_size, sound_system
+            )
+            if hall_id:
+                flash('Hall added successfully', 'success')
+            else:
+                flash('Failed to add hall', 'error')
             
             return redirect(url_for('admin_cinema_halls', cinema_id=cinema_id))
         
@@ -218,25 +197,21 @@ def register_admin_routes(app):
             subtitles = request.form.get('subtitles', '')
             poster_url = request.form.get('poster_url', '')
             
-            conn = get_db_connection()
-            if conn:
-                try:
-                    cursor = conn.cursor()
+            try:
+                with get_db_connection() as conn, conn.cursor() as cursor:
                     cursor.execute(
                         """INSERT INTO movies (title, description, genre, duration_minutes, release_date, 
                            director, "cast", language, subtitles, poster_url, is_active) 
                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, TRUE)""",
                         (title, description, genre, duration_minutes, release_date, director, cast, language, subtitles, poster_url)
                     )
+                    notify_cache_invalidation(cursor, 'movie')
                     conn.commit()
-                    cursor.close()
-                    conn.close()
-                    flash('Movie added successfully', 'success')
-                except Exception as e:
-                    print(f"Error adding movie: {e}")
-                    if conn:
-                        conn.close()
-                    flash('Failed to add movie', 'error')
+                catalog_cache.invalidate('movie')
+                flash('Movie added successfully', 'success')
+            except Exception as e:
+                print(f"Error adding movie: {e}")
+                flash('Failed to add movie', 'error')
             
             return redirect(url_for('admin_movies'))
         
@@ -260,11 +235,9 @@ def register_admin_routes(app):
         movies = MovieService.get_all_movies()
         
         # Get screenings based on filters
-        conn = get_db_connection()
         screenings = []
-        if conn:
-            try:
-                cursor = conn.cursor()
+        try:
+            with get_db_connection() as conn, conn.cursor(row_factory=Screening.row_factory) as cursor:
                 query = """SELECT screening_id, movie_id, cinema_id, hall_id, screening_date, 
                           start_time, end_time, ticket_price, screening_type, language, subtitles, 
                           is_active, created_at, updated_at 
@@ -286,14 +259,9 @@ def register_admin_routes(app):
                 query += " ORDER BY screening_date, start_time"
                 
                 cursor.execute(query, tuple(params))
-                screenings_data = cursor.fetchall()
-                screenings = [Screening.from_db_row(row) for row in screenings_data]
-                cursor.close()
-                conn.close()
-            except Exception as e:
-                print(f"Error getting screenings: {e}")
-                if conn:
-                    conn.close()
+                screenings = cursor.fetchall()
+        except Exception as e:
+            print(f"Error getting screenings: {e}")
         
         return render_template('admin/screenings.html', screenings=screenings, cinemas=cinemas, movies=movies)
     
@@ -305,11 +273,8 @@ def register_admin_routes(app):
             flash('Access denied', 'error')
             return redirect(url_for('index'))
         
-        conn = get_db_connection()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                
+        try:
+            with get_db_connection() as conn, conn.cursor() as cursor:
                 # Get current cinema status
                 cursor.execute(
                     "SELECT is_active FROM cinemas WHERE cinema_id = %s",
@@ -354,14 +319,15 @@ def register_admin_routes(app):
                 else:  # Currently inactive, so we're activating
                     flash('Cinema activated successfully', 'success')
                 
+                notify_cache_invalidation(cursor, 'cinema', cinema_id)
+                notify_cache_invalidation(cursor, 'screening')
                 conn.commit()
-                cursor.close()
-                conn.close()
-            except Exception as e:
-                print(f"Error toggling cinema status: {e}")
-                if conn:
-                    conn.close()
-                flash('Failed to update cinema status', 'error')
+            catalog_cache.invalidate('cinema', cinema_id)
+            # Deactivation cancels bookings across the cinema's screenings
+            seat_availability.invalidate()
+        except Exception as e:
+            print(f"Error toggling cinema status: {e}")
+            flash('Failed to update cinema status', 'error')
         
         return redirect(url_for('admin_cinemas'))
     
@@ -373,11 +339,8 @@ def register_admin_routes(app):
             flash('Access denied', 'error')
             return redirect(url_for('index'))
         
-        conn = get_db_connection()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                
+        try:
+            with get_db_connection() as conn, conn.cursor() as cursor:
                 # Get current movie status
                 cursor.execute(
                     "SELECT is_active FROM movies WHERE movie_id = %s",
@@ -400,8 +363,6 @@ def register_admin_routes(app):
                     
                     if active_screenings_count > 0:
                         flash(f'Cannot deactivate movie. There are {active_screenings_count} active screenings for this movie.', 'error')
-                        cursor.close()
-                        conn.close()
                         return redirect(url_for('admin_movies'))
                     
                     # Deactivate movie
@@ -417,14 +378,12 @@ def register_admin_routes(app):
                     )
                     flash('Movie activated successfully', 'success')
                 
+                notify_cache_invalidation(cursor, 'movie', movie_id)
                 conn.commit()
-                cursor.close()
-                conn.close()
-            except Exception as e:
-                print(f"Error toggling movie status: {e}")
-                if conn:
-                    conn.close()
-                flash('Failed to update movie status', 'error')
+            catalog_cache.invalidate('movie', movie_id)
+        except Exception as e:
+            print(f"Error toggling movie status: {e}")
+            flash('Failed to update movie status', 'error')
         
         return redirect(url_for('admin_movies'))
     
@@ -436,11 +395,8 @@ def register_admin_routes(app):
             flash('Access denied', 'error')
             return redirect(url_for('index'))
         
-        conn = get_db_connection()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                
+        try:
+            with get_db_connection() as conn, conn.cursor() as cursor:
                 # Get current screening status
                 cursor.execute(
                     "SELECT is_active FROM screenings WHERE screening_id = %s",
@@ -475,14 +431,12 @@ def register_admin_routes(app):
                     )
                     flash('Screening activated successfully', 'success')
                 
+                notify_cache_invalidation(cursor, 'screening', screening_id)
                 conn.commit()
-                cursor.close()
-                conn.close()
-            except Exception as e:
-                print(f"Error toggling screening status: {e}")
-                if conn:
-                    conn.close()
-                flash('Failed to update screening status', 'error')
+            seat_availability.invalidate(screening_id)
+        except Exception as e:
+            print(f"Error toggling screening status: {e}")
+            flash('Failed to update screening status', 'error')
         
         return redirect(url_for('admin_screenings'))
     
@@ -494,20 +448,19 @@ def register_admin_routes(app):
             flash('Access denied', 'error')
             return redirect(url_for('index'))
         
-        conn = get_db_connection()
-        if conn:
-            try:
-                cursor = conn.cursor()
+        try:
+            with get_db_connection() as conn, conn.cursor() as cursor:
                 cursor.execute("DELETE FROM cinema_halls WHERE hall_id = %s", (hall_id,))
+                notify_cache_invalidation(cursor, 'hall', hall_id)
+                notify_cache_invalidation(cursor, 'screening')
                 conn.commit()
-                cursor.close()
-                conn.close()
-                flash('Hall deleted successfully', 'success')
-            except Exception as e:
-                print(f"Error deleting hall: {e}")
-                if conn:
-                    conn.close()
-                flash('Failed to delete hall', 'error')
+            hall_layouts.invalidate(hall_id)
+            catalog_cache.invalidate('hall', hall_id)
+            seat_availability.invalidate()
+            flash('Hall deleted successfully', 'success')
+        except Exception as e:
+            print(f"Error deleting hall: {e}")
+            flash('Failed to delete hall', 'error')
         
         return redirect(url_for('admin_halls'))
     
@@ -533,11 +486,8 @@ def register_admin_routes(app):
             subtitles = request.form.get('subtitles', '')
             
             # Calculate end time from movie duration
-            conn = get_db_connection()
-            if conn:
-                try:
-                    cursor = conn.cursor()
-                    
+            try:
+                with get_db_connection() as conn, conn.cursor() as cursor:
                     # Get movie duration
                     cursor.execute("SELECT duration_minutes FROM movies WHERE movie_id = %s", (movie_id,))
                     duration_row = cursor.fetchone()
@@ -556,20 +506,20 @@ def register_admin_routes(app):
                     cursor.execute(
                         """INSERT INTO screenings (movie_id, cinema_id, hall_id, screening_date, 
                            start_time, end_time, ticket_price, screening_type, language, subtitles, is_active) 
-                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, TRUE)""",
+                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, TRUE)
+                           RETURNING screening_id""",
                         (movie_id, cinema_id, hall_id, screening_date, start_time, end_time, 
                          ticket_price, screening_type, language, subtitles)
                     )
+                    screening_id = cursor.fetchone()[0]
                     
+                    notify_cache_invalidation(cursor, 'screening', screening_id)
                     conn.commit()
-                    cursor.close()
-                    conn.close()
-                    flash('Screening added successfully', 'success')
-                except Exception as e:
-                    print(f"Error adding screening: {e}")
-                    if conn:
-                        conn.close()
-                    flash('Failed to add screening', 'error')
+                seat_availability.invalidate(screening_id)
+                flash('Screening added successfully', 'success')
+            except Exception as e:
+                print(f"Error adding screening: {e}")
+                flash('Failed to add screening', 'error')
             
             return redirect(url_for('admin_screenings'))
         
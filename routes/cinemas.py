@@ -45,8 +45,7 @@ def register_cinemas_routes(app):
             abort(404)
         
         # Get halls for this cinema
-        halls_data = get_cinema_halls_by_cinema(cinema_id)
-        halls = [CinemaHall.from_db_row(hall) for hall in halls_data]
+        halls = get_cinema_halls_by_cinema(cinema_id, row_factory=CinemaHall.row_factory)
         
         return render_template('cinema_halls.html', cinema=cinema, halls=halls)
     
@@ -62,12 +61,10 @@ def register_cinemas_routes(app):
             abort(404)
         
         # Get hall
-        hall_data = get_cinema_hall_by_id(hall_id)
-        if not hall_data:
-            abort(404)
-        
         from backend.models.cinema_hall import CinemaHall
-        hall = CinemaHall.from_db_row(hall_data)
+        hall = get_cinema_hall_by_id(hall_id, row_factory=CinemaHall.row_factory)
+        if not hall:
+            abort(404)
         
         # Verify hall belongs to this cinema
         if hall.cinema_id != cinema_id:
@@ -31,30 +31,16 @@ def register_dashboard_routes(app):
         }
         
         # Get booking statistics
-        bookings = BookingService.get_user_bookings_with_seats(user_id)
-        
-        # Calculate statistics
-        total_bookings = len(bookings)
-        upcoming = len([b for b in bookings if b.get('can_cancel', False)])
-        cancelled = len([b for b in bookings if b.get('status') == 'cancelled'])
-        
-        # Count unique movies watched (confirmed bookings only, by movie_id)
-        from datetime import datetime
-        movies_watched_ids = set()
-        for booking in bookings:
-            # Count confirmed bookings and get unique movies
-            if booking.get('status') == 'confirmed' and booking.get('movie_id'):
-                movies_watched_ids.add(booking.get('movie_id'))
-        movies_watched = len(movies_watched_ids)
+        stats = BookingService.get_user_booking_stats(user_id)
         
         # Get recent activity (last 5 bookings)
-        recent_bookings = sorted(bookings, key=lambda x: x.get('booking_date', ''), reverse=True)[:5]
+        recent_bookings = BookingService.get_user_bookings_with_seats(user_id, limit=5)
         
         # Pass data to template
         return render_template('dashboard.html', 
                              user=user_info,
-                             total_bookings=total_bookings,
-                             movies_watched=movies_watched,
-                             upcoming=upcoming,
-                             cancelled=cancelled,
+                             total_bookings=stats['total_bookings'],
+                             movies_watched=stats['movies_watched'],
+                             upcoming=stats['upcoming'],
+                             cancelled=stats['cancelled'],
                              recent_bookings=recent_bookings)
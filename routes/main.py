@@ -4,10 +4,25 @@ Author: Zhou Li
 Date: 2025-10-18
 """
 
-from flask import render_template, redirect, url_for, session, flash, request, abort
+import secrets
+
+from flask import render_template, redirect, url_for, session, flash, request, abort, jsonify
 from backend.services import CinemaService, MovieService, BookingService, ScreeningService, CinemaHallService
 
 
+def _hold_key():
+    """Get the key of this browser session's seat holds"""
+    if 'hold_key' not in session:
+        session['hold_key'] = secrets.token_urlsafe(16)
+    return session['hold_key']
+
+
+def _idempotency_key():
+    """Get the request's idempotency key (form field or Idempotency-Key header)"""
+    key = request.form.get('idempotency_key') or request.headers.get('Idempotency-Key')
+    return key if key and len(key) <= 64 else None
+
+
 def register_main_routes(app):
     """Register main routes"""
     
@@ -61,13 +76,51 @@ def register_main_routes(app):
         if not booking_data:
             abort(404)
         
+        # Holds change from second to second, so they are read per request
+        held_seats, own_held_seats = BookingService.get_seat_holds(screening_id, _hold_key())
+        
         return render_template('book_ticket.html', 
                               screening=booking_data['screening'], 
                               movie=booking_data['movie'], 
                               cinema=booking_data['cinema'],
                               hall=booking_data['hall'],
-                              seats=booking_data['seats'],
-                              booked_seats=booking_data['booked_seats'])
+                              seat_map=ScreeningService.encode_seat_map(booking_data['booked_seats']),
+                              held_seats=held_seats,
+                              own_held_seats=own_held_seats,
+                              idempotency_key=secrets.token_urlsafe(16))
+    
+    @app.route('/book/<int:screening_id>/best')
+    def best_available_seats(screening_id):
+        """API: Pick the best adjacent free seats for the customer"""
+        if 'user_id' not in session:
+            return jsonify({'error': 'Please login to book tickets'}), 401
+        
+        count = request.args.get('count', 2, type=int)
+        if not 1 <= count <= 5:
+            return jsonify({'error': 'You can book up to 5 seats'}), 400
+        seat_type = request.args.get('seat_type') or None
+        
+        seat_ids = ScreeningService.best_available_seats(screening_id, count, seat_type, _hold_key())
+        if seat_ids is None:
+            abort(404)
+        return jsonify({'seat_ids': seat_ids})
+    
+    @app.route('/book/<int:screening_id>/hold', methods=['POST'])
+    def hold_seats(screening_id):
+        """API: Hold the selected seats while the customer checks out"""
+        if 'user_id' not in session:
+            return jsonify({'error': 'Please login to book tickets'}), 401
+        
+        data = request.get_json(silent=True) or {}
+        try:
+            seat_ids = [int(seat_id) for seat_id in data.get('seat_ids', [])]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid seat IDs'}), 400
+        
+        result = BookingService.hold_seats(screening_id, _hold_key(), seat_ids)
+        if result is None:
+            return jsonify({'error': 'Could not hold seats. Please try again.'}), 400
+        return jsonify(result)
     
     @app.route('/create_booking', methods=['POST'])
     def create_booking():
@@ -76,7 +129,7 @@ def register_main_routes(app):
             flash('Please login to create bookings', 'error')
             return redirect(url_for('login'))
         
-        screening_id = request.form.get('screening_id')
+        screening_id = request.form.get('screening_id', type=int)
         seat_ids_str = request.form.get('seat_ids')
         
         if not screening_id or not seat_ids_str:
@@ -90,9 +143,10 @@ def register_main_routes(app):
             flash('Please select at least one seat', 'error')
             return redirect(url_for('book_ticket', screening_id=screening_id))
         
-        # Create booking using service
+        # Create booking using service; a resubmitted form returns the first outcome
         success, message, booking_number = BookingService.create_new_booking(
-            session['user_id'], screening_id, seat_ids
+            session['user_id'], screening_id, seat_ids, hold_key=session.get('hold_key'),
+            idempotency_key=_idempotency_key()
         )
         
         if success:
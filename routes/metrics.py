@@ -0,0 +1,89 @@
+"""
+Request instrumentation and metrics routes
+Author: Zhou Li
+Date: 2026-10-17
+"""
+
+import hmac
+
+from flask import request, session, g, jsonify, abort
+from database.db import INSTRUMENTATION_CONFIG, get_pool_stats, db_breaker
+from database.instrumentation import start_request, finish_request, query_metrics
+from backend.catalog_cache import catalog_cache
+from backend.cache_invalidation import get_listener_stats
+from backend.seat_counters import get_reconciler_stats
+from backend.availability_stream import availability_hub
+from backend.singleflight import get_singleflight_stats
+from backend.booking_queue import booking_queue
+
+
+def _has_metrics_token():
+    """Check the request's bearer token against [instrumentation] metrics_token"""
+    token = INSTRUMENTATION_CONFIG['metrics_token']
+    if not token:
+        return False
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(supplied.strip().encode(), token.encode())
+
+
+def register_metrics_routes(app):
+    """Register per-request DB instrumentation hooks and the /metrics view"""
+
+    repeat_threshold = INSTRUMENTATION_CONFIG['repeat_threshold']
+
+    if INSTRUMENTATION_CONFIG['enabled']:
+        @app.before_request
+        def start_query_stats():
+            """Start recording the request's database work"""
+            if request.endpoint != 'static':
+                g.query_stats_token = start_request()
+
+        @app.after_request
+        def add_query_stats(response):
+            """Add Server-Timing headers, warn about repeated statements and aggregate"""
+            token = g.pop('query_stats_token', None)
+            if token is None:
+                return response
+            stats = finish_request(token)
+
+            repeated = stats.repeated(repeat_threshold)
+            for statement, count in repeated:
+                app.logger.warning(
+                    f"Possible N+1: statement ran {count} times in {request.method} {request.path}: "
+                    f"{statement[:200]}"
+                )
+            query_metrics.record(request.endpoint or 'unknown', stats, repeated=bool(repeated))
+
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={stats.db_time * 1000:.2f};desc="Database", '
+                f'db-queries;desc="{stats.query_count} queries", '
+                f'db-connections;desc="{stats.connections} connections"'
+            )
+            return response
+
+        @app.teardown_request
+        def discard_query_stats(error=None):
+            """Stop recording if the request ended without a response"""
+            token = g.pop('query_stats_token', None)
+            if token is not None:
+                finish_request(token)
+
+    @app.route('/metrics')
+    def metrics():
+        """Aggregated per-endpoint DB metrics (admins or the configured token only)"""
+        if session.get('user_type') != 'admin' and not _has_metrics_token():
+            abort(404)
+
+        snapshot = query_metrics.snapshot(top=request.args.get('top', 20, type=int))
+        snapshot['pool'] = get_pool_stats()
+        snapshot['circuit_breaker'] = db_breaker.stats()
+        snapshot['catalog_cache'] = catalog_cache.stats()
+        snapshot['invalidation_listener'] = get_listener_stats()
+        snapshot['singleflight'] = get_singleflight_stats()
+        snapshot['booking_queue'] = booking_queue.stats()
+        snapshot['counter_reconciler'] = get_reconciler_stats()
+        snapshot['availability_streams'] = availability_hub.stats()
+        snapshot['repeat_threshold'] = repeat_threshold
+        return jsonify(snapshot)
+
@@ -4,8 +4,10 @@ Author: Zhou Li
 Date: 2025-10-21
 """
 
-from flask import render_template, request, abort, redirect, url_for
+from flask import render_template, request, abort, redirect, url_for, Response, jsonify
 from backend.services import MovieService, CinemaService, ScreeningService
+from backend.availability_stream import availability_hub, format_event
+from database.db import STREAM_CONFIG
 
 
 def register_screenings_routes(app):
@@ -66,4 +68,49 @@ def register_screenings_routes(app):
                               available_dates=available_dates,
                               selected_movie_id=movie_id,
                               selected_date=screening_date)
-
+    
+    @app.route('/screenings/<int:screening_id>/availability/stream')
+    def screening_availability_stream(screening_id):
+        """SSE: Live seats booked/released for a screening's seat map"""
+        subscriber = availability_hub.subscribe(screening_id)
+        if subscriber is None:
+            return Response('Too many open streams', status=503, headers={'Retry-After': '30'})
+        # Subscribed before the snapshot is read, so no change can fall in between
+        booked = ScreeningService.get_booked_seat_ids(screening_id)
+        if booked is None:
+            availability_hub.unsubscribe(subscriber)
+            abort(404)
+        
+        def events():
+            try:
+                yield 'retry: 5000\n' + format_event('snapshot', {'booked': booked})
+                while True:
+                    queued, overflowed = subscriber.get(STREAM_CONFIG['heartbeat_interval'])
+                    if overflowed:
+                        # Events were dropped for this slow client; send the full state instead
+                        yield format_event('snapshot', {'booked': ScreeningService.get_booked_seat_ids(screening_id) or []})
+                    elif queued:
+                        yield ''.join(queued)
+                    else:
+                        # Keep-alive comment (also detects closed connections)
+                        yield ': keep-alive\n\n'
+            finally:
+                availability_hub.unsubscribe(subscriber)
+        
+        return Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    
+    @app.route('/api/screenings/<int:screening_id>/seats')
+    def screening_seats_api(screening_id):
+        """JSON: Seats changed since ?since=<version>, or a snapshot without it"""
+        since = request.args.get('since', type=int)
+        result = ScreeningService.get_seat_sync(screening_id, since)
+        if result is None:
+            return jsonify({'error': 'Screening not found'}), 404
+        
+        response = jsonify(result)
+        # The version identifies the seat map state; a client polling with
+        # If-None-Match gets an empty 304 until something changes
+        response.set_etag(f"{screening_id}-{result['version']}", weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
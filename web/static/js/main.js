@@ -165,3 +165,57 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 });
+
+// Render a booking page seat map from its compact encoding (see
+// backend/seat_map.py) into the same buttons the page script works with.
+// held / selected: seat IDs (strings) held by others / by this session
+function renderSeatMap(container, seatMap, held, selected) {
+    const decode = text => Uint8Array.from(atob(text), c => c.charCodeAt(0));
+    const expand = runs => runs.flatMap(([first, count]) =>
+        Array.from({length: count}, (_, i) => first + i));
+    const ids = expand(seatMap.ids);
+    const numbers = expand(seatMap.numbers);
+    const codes = decode(seatMap.codes);
+    const booked = decode(seatMap.booked);
+    const heldSet = new Set(held);
+    const selectedSet = new Set(selected);
+
+    const fragment = document.createDocumentFragment();
+    let pos = 0;
+    seatMap.rows.forEach(([rowNumber, length]) => {
+        const row = document.createElement('div');
+        row.className = 'seat-row mb-2';
+        const label = document.createElement('div');
+        label.className = 'row-label';
+        label.textContent = rowNumber;
+        const seats = document.createElement('div');
+        seats.className = 'row-seats';
+        for (const end = pos + length; pos < end; pos++) {
+            const [seatType, priceMultiplier, isActive] = seatMap.types[codes[pos]];
+            const seatId = String(ids[pos]);
+            const btn = document.createElement('button');
+            let state = 'seat-available';
+            if (booked[pos >> 3] & (1 << (pos & 7))) {
+                state = 'seat-booked';
+            } else if (!isActive) {
+                state = 'seat-inactive';
+            } else if (heldSet.has(seatId)) {
+                state = 'seat-held';
+            } else if (selectedSet.has(seatId)) {
+                state = 'seat-available selected';
+            }
+            btn.className = 'seat-btn ' + state;
+            btn.disabled = state === 'seat-booked' || state === 'seat-inactive' || state === 'seat-held';
+            btn.dataset.seatId = seatId;
+            btn.dataset.row = rowNumber;
+            btn.dataset.seat = numbers[pos];
+            btn.dataset.seatType = seatType;
+            btn.dataset.priceMultiplier = priceMultiplier;
+            btn.textContent = numbers[pos];
+            seats.appendChild(btn);
+        }
+        row.append(label, seats);
+        fragment.appendChild(row);
+    });
+    container.replaceChildren(fragment);
+}